@@ -137,9 +137,10 @@ class CitizenSignupForm(SignupForm):
 
 from django import forms
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from allauth.account.forms import SignupForm
 from users.models import Citizen
-from contractors.models import Contractor
+from contractors.models import Contractor, normalize_license, normalize_phone
 import re
 
 # ... (CitizenSignupForm remains the same) ...
@@ -177,7 +178,7 @@ class ContractorSignupForm(SignupForm):
     )
 
     phone = forms.CharField(
-        max_length=10, required=True,
+        max_length=20, required=True,  # room for "+91 98765 43210", clean_phone() keeps the digits
         widget=forms.TextInput(attrs={'class': 'input input-bordered w-full', 'placeholder': '10-digit Contact'})
     )
 
@@ -204,38 +205,56 @@ class ContractorSignupForm(SignupForm):
         # Explicitly set choices to ensure they load
         self.fields['region'].choices = Contractor.REGION_CHOICES
 
+    # Uniqueness of phone and license is left to the unique indexes: save() catches
+    # the IntegrityError, which also covers two people signing up at the same moment.
     def clean_phone(self):
-        phone = self.cleaned_data.get('phone')
-        if not phone.isdigit():
-            raise forms.ValidationError('Use digits only.')
-        if Contractor.objects.filter(phone=phone).exists():
-            raise forms.ValidationError('This phone number is already in use by another contractor.')
+        phone = normalize_phone(self.cleaned_data.get('phone'))
+        if not phone or len(phone) != 10:
+            raise forms.ValidationError('Enter a 10-digit phone number.')
         return phone
 
     def clean_license_number(self):
-        lic = self.cleaned_data.get('license_number')
-        if Contractor.objects.filter(license_number=lic).exists():
-            raise forms.ValidationError('This license number is already registered in our system.')
+        lic = normalize_license(self.cleaned_data.get('license_number'))
+        if not lic:
+            raise forms.ValidationError('Enter your license number.')
         return lic
 
     # --- THE CRITICAL FIX ---
     # Renamed from 'try_save' to 'save' so the view calls it correctly
     def save(self, request):
-        # 1. Let Allauth create the User (Auth Table)
-        user = super().save(request)
-        
-        # 2. Create the Contractor Profile (Profile Table)
-        Contractor.objects.create(
-            user=user,
-            name=self.cleaned_data.get('name'),
-            email=user.email,
-            phone=self.cleaned_data.get('phone'),
-            company_name=self.cleaned_data.get('company_name'),
-            specialization=self.cleaned_data.get('specialization'),
-            region=self.cleaned_data.get('region'),
-            license_number=self.cleaned_data.get('license_number'),
-            status='pending', 
-        )
-        
+        """Creates the User and Contractor together; returns None (with field errors) on a duplicate."""
+        try:
+            with transaction.atomic():
+                # 1. Let Allauth create the User (Auth Table)
+                user = super().save(request)
+
+                # 2. Create the Contractor Profile (Profile Table)
+                Contractor.objects.create(
+                    user=user,
+                    name=self.cleaned_data.get('name'),
+                    email=user.email,
+                    phone=self.cleaned_data.get('phone'),
+                    company_name=self.cleaned_data.get('company_name'),
+                    specialization=self.cleaned_data.get('specialization'),
+                    region=self.cleaned_data.get('region'),
+                    license_number=self.cleaned_data.get('license_number'),
+                    status='pending',
+                )
+        except IntegrityError:
+            self._duplicate_errors()
+            return None
+
         # 3. Return user (Required)
-        return user
\ No newline at end of file
+        return user
+
+    def _duplicate_errors(self):
+        # Only reached after a failed insert, so these indexed lookups cost nothing on the normal path.
+        data = self.cleaned_data
+        if User.objects.filter(username__iexact=data.get('username')).exists():
+            self.add_error('username', 'This username is already taken.')
+        if Contractor.objects.filter(phone=data.get('phone')).exists():
+            self.add_error('phone', 'This phone number is already in use by another contractor.')
+        if Contractor.objects.filter(license_number=data.get('license_number')).exists():
+            self.add_error('license_number', 'This license number is already registered in our system.')
+        if not self.errors:
+            self.add_error(None, 'Could not create your account. Please try again.')
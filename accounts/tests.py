@@ -1,3 +1,38 @@
 from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
 
-# Create your tests here.
+from contractors.models import Contractor
+
+
+class ContractorSignupTest(TestCase):
+    def post(self, username, phone, license_number):
+        return self.client.post(reverse('accounts:contractor_signup'), {
+            'username': username, 'email': f'{username}@example.com',
+            'password1': 'Strong@Pass123', 'password2': 'Strong@Pass123',
+            'name': 'Ravi Kumar', 'company_name': 'Kumar Roads', 'phone': phone,
+            'specialization': 'road', 'region': 'north', 'license_number': license_number,
+        })
+
+    def test_phone_and_license_stored_normalized(self):
+        response = self.post('ravi', '+91 98765-43210', ' mh 12 ab ')
+        self.assertRedirects(response, reverse('account_login'), fetch_redirect_response=False)
+        contractor = Contractor.objects.get(user__username='ravi')
+        self.assertEqual((contractor.phone, contractor.license_number), ('9876543210', 'MH12AB'))
+
+    def test_duplicates_caught_by_unique_index(self):
+        self.post('ravi', '9876543210', 'MH12AB')
+        response = self.post('ravi2', '098765 43210', 'mh12ab')
+        self.assertEqual(response.status_code, 200)
+        errors = response.context['form'].errors
+        self.assertIn('phone', errors)
+        self.assertIn('license_number', errors)
+        # The user row was rolled back with the failed profile insert.
+        self.assertFalse(User.objects.filter(username='ravi2').exists())
+        self.assertEqual(Contractor.objects.count(), 1)
+
+    def test_blank_values_do_not_collide(self):
+        for name in ('a', 'b'):
+            Contractor.objects.create(user=User.objects.create_user(username=name), name=name,
+                                      company_name=name, specialization='road', region='north')
+        self.assertEqual(Contractor.objects.filter(phone=None, license_number=None).count(), 2)
@@ -22,10 +22,13 @@ def contractor_signup(request):
         # 2. Check if the form is valid
         if form.is_valid():
             # Ensure this matches the method name in your forms.py (save vs try_save)
-            user = form.save(request) 
-            
-            messages.success(request, "Account created! Please login. Approval is pending.")
-            return redirect('account_login')
+            user = form.save(request)
+
+            # None means the phone, license or username was taken in the meantime;
+            # the form now carries that error, so fall through and show it.
+            if user is not None:
+                messages.success(request, "Account created! Please login. Approval is pending.")
+                return redirect('account_login')
         
         # NOTE: Removed the 'messages.error' loop. 
         # The 'form' object already carries the errors to the template.
@@ -9,4 +9,9 @@ pip install -r requirements.txt
 python manage.py collectstatic --no-input
 
 # Run database migrations
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+
+# Table behind the shared rate-limit counters when REDIS_URL is not set (urbanwatch/ratelimit.py).
+# Rate limits are per client IP: set RATELIMIT_PROXY_COUNT to the number of proxies in front of the
+# app (defaults to 1 on Render, 0 elsewhere), or every visitor shares the proxy's single budget.
+python manage.py createcachetable
@@ -1,16 +1,23 @@
 from django.contrib import admin
-from .models import Complaint
+from django.db.models import Q
+
+from users.models import Citizen
+from .models import ArchivedComplaint, Complaint, ImageFingerprint, Incident, SLABreach, SLATarget
+from .search import is_supported, ranked_ids
 
 @admin.register(Complaint)
 class ComplaintAdmin(admin.ModelAdmin):
-    list_display = ['title', 'citizen', 'status', 'category', 'region', 'created_at', 'tracking_token']
+    list_display = ['title', 'citizen', 'status', 'category', 'region', 'created_at', 'tracking_code']
     list_filter = ['status', 'region', 'category', 'created_at']
-    search_fields = ['title', 'description', 'citizen__name', 'region']
-    readonly_fields = ['created_at', 'updated_at', 'tracking_token']
+    # Used on databases without a full-text index; see get_search_results().
+    search_fields = ['title', 'description', 'location', 'citizen__name']
+    readonly_fields = ['created_at', 'updated_at', 'tracking_code', 'tracking_token']
+    # Hard cap on full-text hits shown in the changelist.
+    search_limit = 1000
     
     fieldsets = (
         ('Report Information', {
-            'fields': ('title', 'description', 'category', 'location', 'proof_image', 'region', 'tracking_token')
+            'fields': ('title', 'description', 'category', 'location', 'proof_image', 'region', 'tracking_code', 'tracking_token')
         }),
         ('Assignment', {
             'fields': ('citizen', 'officer', 'contractor', 'status')
@@ -24,3 +31,51 @@ class ComplaintAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index (complaints/search.py) instead of icontains scans.
+        if not search_term.strip() or not is_supported():
+            return super().get_search_results(request, queryset, search_term)
+        ids = ranked_ids(search_term, limit=self.search_limit)
+        # Citizen names are matched separately (small table), then joined on the indexed FK.
+        citizens = Citizen.objects.filter(name__icontains=search_term.strip()).values('id')[:self.search_limit]
+        return queryset.filter(Q(id__in=ids) | Q(citizen__in=citizens)), False
+
+
+@admin.register(ImageFingerprint)
+class ImageFingerprintAdmin(admin.ModelAdmin):
+    list_display = ['complaint', 'kind', 'hash', 'created_at']
+    list_filter = ['kind']
+    search_fields = ['hash']
+    raw_id_fields = ['complaint']
+
+
+@admin.register(Incident)
+class IncidentAdmin(admin.ModelAdmin):
+    list_display = ['id', 'category', 'region', 'status', 'size', 'updated_at']
+    list_filter = ['status', 'region', 'category']
+
+
+@admin.register(SLATarget)
+class SLATargetAdmin(admin.ModelAdmin):
+    list_display = ['status', 'category', 'region', 'max_hours']
+    list_editable = ['max_hours']
+    list_filter = ['status']
+
+
+@admin.register(SLABreach)
+class SLABreachAdmin(admin.ModelAdmin):
+    list_display = ['complaint', 'status', 'level', 'target_hours', 'status_since', 'breached_at']
+    list_filter = ['status', 'level']
+    raw_id_fields = ['complaint']
+
+
+@admin.register(ArchivedComplaint)
+class ArchivedComplaintAdmin(admin.ModelAdmin):
+    list_display = ['id', 'title', 'citizen', 'category', 'region', 'closed_at', 'archived_at', 'tracking_code']
+    list_filter = ['region', 'category']
+    search_fields = ['title', 'tracking_code', 'tracking_token']
+    raw_id_fields = ['citizen', 'officer', 'contractor']
+
+    def has_change_permission(self, request, obj=None):
+        return False  # the archive is read-only history
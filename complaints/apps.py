@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ComplaintsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'complaints'
+
+    def ready(self):
+        from complaints import signals  # noqa: F401 (connects the receivers)
+        from complaints.search import ensure_sqlite_index
+        post_migrate.connect(ensure_sqlite_index, sender=self)
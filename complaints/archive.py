@@ -0,0 +1,195 @@
+# complaints/archive.py
+"""
+Hot/cold storage for closed complaints.
+
+Complaints closed more than ARCHIVE_AFTER_DAYS ago never change again, but
+they make up most of the Complaint table that every dashboard and count
+scans. archive_batch() moves them into ArchivedComplaint: one transaction per
+batch copies the rows (with their SLA breaches and change events folded into
+a JSON `history`, and their image fingerprints into ArchivedFingerprint) and
+deletes the originals, so an interrupted run leaves every complaint in exactly
+one table and simply continues where it stopped next time
+(`manage.py archive_complaints`).
+
+An archived complaint keeps its id, tracking token and tracking code. Reads stay transparent:
+
+* find_by_token() looks in both tables (tracking page, home page lookup);
+* History() lists hot rows, then archived ones, for closed/history tabs and
+  works with Paginator;
+* show_archived() sends detail-page links for archived complaints to the
+  read-only tracking page;
+* phash.find_similar() searches archived photos as well.
+
+The public map (heatmap tiles and GeoJSON) only covers the hot table, so
+archived complaints drop off it.
+
+A complaint is held back while a report still in the hot table points at it
+as a duplicate, so those links are never cut.
+"""
+from datetime import timedelta
+from itertools import chain
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django.utils import timezone
+
+# Fields copied one-to-one from Complaint.
+COPIED_FIELDS = (
+    'id', 'citizen_id', 'officer_id', 'contractor_id', 'title', 'description', 'status',
+    'location', 'latitude', 'longitude', 'pincode', 'region', 'category', 'tracking_token',
+    'tracking_code', 'officer_feedback', 'proof_image', 'completion_image', 'proof_thumbnail', 'completion_thumbnail',
+    'created_at', 'updated_at', 'assigned_at', 'in_progress_at', 'completed_at', 'closed_at',
+)
+
+
+def cutoff(days=None):
+    return timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS if days is None else days)
+
+
+def candidates(before, after_id=0, limit=500):
+    """Ids of closed complaints due for the archive, in id order from the cursor."""
+    from complaints.models import Complaint
+    ids = list(Complaint.objects.filter(status='closed', closed_at__lt=before, id__gt=after_id)
+               .order_by('id').values_list('id', flat=True)[:limit])
+    # Hold back originals that a report outside this batch still links to as its duplicate;
+    # they follow once those reports are archived (which records the link as duplicate_of_ref).
+    held = set(Complaint.objects.filter(duplicate_of_id__in=ids).exclude(id__in=ids)
+               .values_list('duplicate_of_id', flat=True))
+    return [i for i in ids if i not in held], (ids[-1] if ids else None)
+
+
+def _history(complaint_ids):
+    from complaints.models import ComplaintEvent, SLABreach
+    history = {i: {'sla_breaches': [], 'events': []} for i in complaint_ids}
+    for b in SLABreach.objects.filter(complaint_id__in=complaint_ids).order_by('breached_at'):
+        history[b.complaint_id]['sla_breaches'].append({
+            'status': b.status, 'level': b.level, 'target_hours': b.target_hours,
+            'status_since': b.status_since.isoformat(), 'breached_at': b.breached_at.isoformat(),
+        })
+    for e in ComplaintEvent.objects.filter(complaint_id__in=complaint_ids).order_by('id'):
+        history[e.complaint_id]['events'].append({
+            'kind': e.kind, 'status': e.status, 'at': e.created_at.isoformat(),
+        })
+    return history
+
+
+def _fingerprints(complaint_ids):
+    from complaints.models import ArchivedFingerprint, ImageFingerprint
+    return [
+        ArchivedFingerprint(complaint_id=f.complaint_id, kind=f.kind, hash=f.hash, chunk0=f.chunk0, chunk1=f.chunk1,
+                            chunk2=f.chunk2, chunk3=f.chunk3, created_at=f.created_at)
+        for f in ImageFingerprint.objects.filter(complaint_id__in=complaint_ids)
+    ]
+
+
+def archive_batch(ids):
+    """Move these closed complaints to the archive in one transaction; returns how many moved."""
+    from complaints.models import ArchivedComplaint, ArchivedFingerprint, Complaint
+
+    with transaction.atomic():
+        # Re-check under the lock: a row may have been reopened or archived since it was picked.
+        complaints = list(Complaint.objects.select_for_update().filter(id__in=ids, status='closed'))
+        if not complaints:
+            return 0
+        history = _history([c.id for c in complaints])
+        ArchivedComplaint.objects.bulk_create([
+            ArchivedComplaint(
+                **{field: getattr(c, field) for field in COPIED_FIELDS},
+                duplicate_of_ref=c.duplicate_of_id, incident_ref=c.incident_id, history=history[c.id],
+            )
+            for c in complaints
+        ])
+        ArchivedFingerprint.objects.bulk_create(_fingerprints([c.id for c in complaints]))
+        # Cascades to breaches, events, fingerprints and receipts; the delete signals drop caches.
+        Complaint.objects.filter(id__in=[c.id for c in complaints]).delete()
+    return len(complaints)
+
+
+def archive(before, batch_size=500, max_batches=None):
+    """Archive everything due, batch by batch. Returns the number of complaints moved."""
+    moved, after_id, batches = 0, 0, 0
+    while max_batches is None or batches < max_batches:
+        ids, after_id = candidates(before, after_id, batch_size)
+        if after_id is None:
+            break
+        moved += archive_batch(ids) if ids else 0
+        batches += 1
+    return moved
+
+
+# --- Transparent reads ---
+
+def find_by_token(token):
+    """
+    The complaint with this tracking code (or legacy UUID token), hot or archived.
+    Raises DoesNotExist, or ValueError for input tracking_codes.lookup() rejects.
+    """
+    from complaints.models import ArchivedComplaint, Complaint
+    from complaints.tracking_codes import lookup
+    match = lookup(token)
+    try:
+        return Complaint.objects.select_related('officer', 'contractor').get(**match)
+    except Complaint.DoesNotExist:
+        return ArchivedComplaint.objects.select_related('officer', 'contractor').get(**match)
+
+
+async def afind_by_token(token):
+    """find_by_token() for the async views. Raises Complaint.DoesNotExist when neither table has it."""
+    from complaints.models import ArchivedComplaint, Complaint
+    from complaints.tracking_codes import lookup
+    match = await sync_to_async(lookup)(token)
+    try:
+        return await Complaint.objects.select_related('officer', 'contractor').aget(**match)
+    except Complaint.DoesNotExist:
+        try:
+            return await ArchivedComplaint.objects.select_related('officer', 'contractor').aget(**match)
+        except ArchivedComplaint.DoesNotExist:
+            raise Complaint.DoesNotExist
+
+
+def archived_for(**owner):
+    """Archived complaints for a citizen/officer/contractor, most recently closed first."""
+    from complaints.models import ArchivedComplaint
+    return ArchivedComplaint.objects.filter(**owner).order_by('-closed_at')
+
+
+class History:
+    """Hot rows followed by archived ones, as one sliceable list (Paginator accepts it)."""
+
+    def __init__(self, hot, cold):
+        self.hot, self.cold = hot, cold
+        self._hot_count = self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._hot_count = self.hot.count()
+            self._count = self._hot_count + self.cold.count()
+        return self._count
+
+    __len__ = count
+
+    def __bool__(self):
+        return self.count() > 0
+
+    def __iter__(self):
+        return chain(self.hot, self.cold)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        self.count()
+        start, stop = index.start or 0, self._count if index.stop is None else index.stop
+        rows = list(self.hot[start:min(stop, self._hot_count)]) if start < self._hot_count else []
+        if stop > self._hot_count:
+            rows += list(self.cold[max(start - self._hot_count, 0):stop - self._hot_count])
+        return rows
+
+
+def show_archived(complaint_id, **owner):
+    """Response for a detail link to a complaint that is no longer hot: its tracking page, or 404."""
+    from complaints.models import ArchivedComplaint
+    archived = get_object_or_404(ArchivedComplaint, id=complaint_id, **owner)
+    return redirect(f"{reverse('complaints:track_issue')}?token={archived.tracking_code or archived.tracking_token}")
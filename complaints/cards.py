@@ -0,0 +1,57 @@
+# complaints/cards.py
+"""
+Fragment caching for the per-complaint cards on the dashboards and detail pages.
+
+Templates wrap each card in
+
+    {% cache card_cache_seconds <fragment> complaint.id complaint.updated_at viewer_role %}
+
+(`card_cache_seconds` and `viewer_role` come from context_processors.cards).
+Because updated_at is part of the key, a saved complaint simply renders under a
+new key. The old entries are deleted when the complaint is saved or deleted
+(see signals.py) so they do not linger; paths that change a card without
+touching updated_at (e.g. SLA escalation via .update()) call
+invalidate_complaints() themselves.
+"""
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+
+# Every fragment name used with {% cache %} for a complaint card.
+FRAGMENTS = (
+    'officer_card_take', 'officer_card_taken', 'officer_card_verify', 'officer_card_closed',
+    'contractor_card_active', 'contractor_card_rejected', 'contractor_card_verify', 'contractor_card_closed',
+    'citizen_card',
+    'card_description', 'card_evidence', 'card_team', 'card_timeline', 'card_token',
+)
+ROLES = ('officer', 'contractor', 'citizen', 'staff', 'anonymous')
+
+
+def viewer_role(user):
+    """The part of the cache key that separates what different kinds of users see."""
+    if not user.is_authenticated:
+        return 'anonymous'
+    for role in ('officer', 'contractor', 'citizen'):
+        if hasattr(user, f'{role}_profile'):
+            return role
+    return 'staff'
+
+
+def fragment_keys(complaint_id, updated_at):
+    return [
+        make_template_fragment_key(fragment, [complaint_id, updated_at, role])
+        for fragment in FRAGMENTS for role in ROLES
+    ]
+
+
+def invalidate(entries):
+    """Drop cached cards for [(complaint_id, updated_at), ...] once the transaction commits."""
+    keys = [key for complaint_id, updated_at in entries if complaint_id and updated_at
+            for key in fragment_keys(complaint_id, updated_at)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_complaints(complaints):
+    """invalidate() for complaints changed by .update() or bulk_update(), which skip the signals."""
+    invalidate([(c.pk, getattr(c, '_loaded_updated_at', c.updated_at)) for c in complaints])
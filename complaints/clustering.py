@@ -0,0 +1,171 @@
+# complaints/clustering.py
+"""
+Groups open complaints into incidents by location and category.
+
+Clustering is grid based: pins are projected to metres, dropped into square
+cells of INCIDENT_RADIUS_METRES, and touching occupied cells (8-neighbour) are
+merged into one cluster. Everything except the cell union is vectorised with
+NumPy, so a full city backlog re-clusters in well under a second.
+
+New complaints are attached incrementally with assign_incident(); the
+`cluster_incidents` management command rebuilds everything from scratch.
+"""
+import math
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from complaints.dedup import haversine_m
+
+# Complaints that can still be grouped and claimed together.
+CLUSTER_STATUSES = ['reported', 'assigned', 'in_progress', 'completed']
+METRES_PER_DEGREE = 111320.0
+
+
+def incident_radius():
+    return getattr(settings, 'INCIDENT_RADIUS_METRES', 100)
+
+
+def cluster_points(latitudes, longitudes, radius_m=None):
+    """Return an array of cluster labels (0..n-1) for the given coordinates."""
+    if radius_m is None:
+        radius_m = incident_radius()
+    lat = np.asarray(latitudes, dtype=np.float64)
+    lng = np.asarray(longitudes, dtype=np.float64)
+    if lat.size == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Equirectangular projection around the mean latitude (fine at city scale).
+    scale = METRES_PER_DEGREE * math.cos(math.radians(float(lat.mean())))
+    cx = np.floor(lng * scale / radius_m).astype(np.int64)
+    cy = np.floor(lat * METRES_PER_DEGREE / radius_m).astype(np.int64)
+
+    cells, point_cell = np.unique(np.stack([cx, cy], axis=1), axis=0, return_inverse=True)
+    point_cell = point_cell.ravel()
+    index = {(int(x), int(y)): i for i, (x, y) in enumerate(cells)}
+
+    # Union-find over occupied cells.
+    parent = list(range(len(cells)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, (x, y) in enumerate(cells):
+        x, y = int(x), int(y)
+        # Half of the 8-neighbourhood is enough; the other half is seen from the other side.
+        for nx, ny in ((x + 1, y), (x - 1, y + 1), (x, y + 1), (x + 1, y + 1)):
+            j = index.get((nx, ny))
+            if j is not None:
+                ri, rj = find(i), find(j)
+                if ri != rj:
+                    parent[rj] = ri
+
+    roots = np.fromiter((find(i) for i in range(len(cells))), dtype=np.int64, count=len(cells))
+    _, cell_labels = np.unique(roots, return_inverse=True)
+    return cell_labels.ravel()[point_cell]
+
+
+def _open_complaints():
+    from complaints.models import Complaint
+    return Complaint.objects.filter(
+        status__in=CLUSTER_STATUSES,
+        latitude__isnull=False,
+        longitude__isnull=False,
+    )
+
+
+@transaction.atomic
+def recluster(region=None):
+    """Rebuild incidents for all open complaints (optionally for one region)."""
+    from complaints.models import Complaint, Incident
+
+    qs = _open_complaints()
+    if region:
+        qs = qs.filter(region=region)
+    rows = list(qs.values_list('id', 'region', 'category', 'latitude', 'longitude', 'incident_id'))
+
+    groups = defaultdict(list)
+    for row in rows:
+        groups[(row[1], row[2])].append(row)
+
+    assignments = {}
+    kept_incidents = set()
+    for (group_region, category), members in groups.items():
+        labels = cluster_points([m[3] for m in members], [m[4] for m in members])
+        clusters = defaultdict(list)
+        for member, label in zip(members, labels):
+            clusters[int(label)].append(member)
+
+        for cluster in clusters.values():
+            lat = sum(m[3] for m in cluster) / len(cluster)
+            lng = sum(m[4] for m in cluster) / len(cluster)
+            # Reuse the incident most members already belong to, so ids stay stable.
+            previous = [m[5] for m in cluster if m[5] and m[5] not in kept_incidents]
+            incident_id = max(set(previous), key=previous.count) if previous else None
+            if incident_id:
+                Incident.objects.filter(id=incident_id).update(
+                    latitude=lat, longitude=lng, size=len(cluster), status='open'
+                )
+            else:
+                incident_id = Incident.objects.create(
+                    region=group_region, category=category, latitude=lat, longitude=lng, size=len(cluster)
+                ).id
+            kept_incidents.add(incident_id)
+            for member in cluster:
+                assignments[member[0]] = incident_id
+
+    changed = [Complaint(id=row[0], incident_id=assignments[row[0]]) for row in rows if row[5] != assignments[row[0]]]
+    Complaint.objects.bulk_update(changed, ['incident'], batch_size=500)
+
+    stale = Incident.objects.filter(status='open').exclude(id__in=kept_incidents)
+    if region:
+        stale = stale.filter(region=region)
+    stale.update(status='closed', size=0)
+    return len(kept_incidents)
+
+
+def assign_incident(complaint):
+    """Attach a newly submitted complaint to a nearby open incident (or start one)."""
+    from complaints.models import Incident
+
+    if complaint.latitude is None or complaint.longitude is None:
+        return None
+
+    radius = incident_radius()
+    dlat = radius / METRES_PER_DEGREE
+    dlng = radius / (METRES_PER_DEGREE * math.cos(math.radians(complaint.latitude)))
+    nearby = Incident.objects.filter(
+        status='open',
+        region=complaint.region,
+        category=complaint.category,
+        latitude__range=(complaint.latitude - 2 * dlat, complaint.latitude + 2 * dlat),
+        longitude__range=(complaint.longitude - 2 * dlng, complaint.longitude + 2 * dlng),
+    )
+
+    best, best_distance = None, None
+    for incident in nearby:
+        distance = haversine_m(complaint.latitude, complaint.longitude, incident.latitude, incident.longitude)
+        if distance <= 1.5 * radius and (best is None or distance < best_distance):
+            best, best_distance = incident, distance
+
+    with transaction.atomic():
+        if best is None:
+            best = Incident.objects.create(
+                region=complaint.region, category=complaint.category,
+                latitude=complaint.latitude, longitude=complaint.longitude, size=1,
+            )
+        else:
+            best = Incident.objects.select_for_update().get(id=best.id)
+            # Running mean keeps the centroid current without re-reading members.
+            best.latitude += (complaint.latitude - best.latitude) / (best.size + 1)
+            best.longitude += (complaint.longitude - best.longitude) / (best.size + 1)
+            best.size += 1
+            best.save(update_fields=['latitude', 'longitude', 'size', 'updated_at'])
+        type(complaint).objects.filter(id=complaint.id).update(incident=best)
+        complaint.incident = best
+    return best
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from complaints.cards import viewer_role
+
+
+def cards(request):
+    """Values used by the {% cache %} tags around complaint cards (see complaints/cards.py)."""
+    return {
+        # Lazy, so pages without cards do not pay for the profile lookups.
+        'viewer_role': SimpleLazyObject(lambda: viewer_role(request.user)),
+        'card_cache_seconds': settings.CARD_CACHE_SECONDS,
+    }
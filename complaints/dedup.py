@@ -0,0 +1,183 @@
+# complaints/dedup.py
+"""
+Duplicate-report detection for new complaints.
+
+Every complaint stores a geohash of its pin and a MinHash signature of its
+title + description (both filled in Complaint.save()). At submit time we:
+
+1. pick a geohash precision whose cells are at least DEDUP_RADIUS_METRES wide,
+   so the pin's cell plus its 8 neighbours cover the whole search circle;
+2. fetch open complaints of the same category in those cells (an indexed
+   range lookup on the `geohash` prefix);
+3. keep the ones within the radius and rank them by estimated Jaccard
+   similarity of the text signatures.
+
+Only a handful of rows come back from step 2, so a lookup is a single small
+indexed query plus a few vectorised NumPy comparisons.
+"""
+import math
+import re
+import zlib
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # stored precision (~4.8m x 4.8m cells).
+
+# Status values that still need work; duplicates are only linked to these.
+OPEN_STATUSES = ['reported', 'assigned', 'in_progress']
+
+SHINGLE_SIZE = 4
+NUM_PERMUTATIONS = 64
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.RandomState(20240601)  # fixed seed: signatures are stored in the DB.
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+EARTH_RADIUS_M = 6371000.0
+
+
+def dedup_radius():
+    return getattr(settings, 'DEDUP_RADIUS_METRES', 150)
+
+
+def dedup_min_similarity():
+    return getattr(settings, 'DEDUP_MIN_SIMILARITY', 0.2)
+
+
+# --- Geohash ---
+
+def geohash_encode(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def geohash_cell_size(precision):
+    """Return (lat_degrees, lng_degrees) covered by one cell."""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def precision_for_radius(lat, radius_m):
+    """Finest precision whose cells are still at least radius_m on each side."""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        dlat, dlng = geohash_cell_size(precision)
+        height = dlat * 111320.0
+        width = dlng * 111320.0 * math.cos(math.radians(lat))
+        if min(height, width) >= radius_m:
+            return precision
+    return 1
+
+
+def geohash_neighbourhood(lat, lng, precision):
+    """The cell containing (lat, lng) and its 8 neighbours."""
+    dlat, dlng = geohash_cell_size(precision)
+    cells = set()
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            cells.add(geohash_encode(
+                max(min(lat + i * dlat, 89.999999), -89.999999),
+                (lng + j * dlng + 180.0) % 360.0 - 180.0,
+                precision,
+            ))
+    return cells
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+# --- MinHash ---
+
+def _shingles(text):
+    text = re.sub(r'[^a-z0-9 ]+', ' ', (text or '').lower())
+    text = ' '.join(text.split())
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def text_signature(*parts):
+    """MinHash signature (NUM_PERMUTATIONS x uint32) of the given text, as bytes."""
+    shingles = _shingles(' '.join(p or '' for p in parts))
+    if not shingles:
+        return b''
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return (permuted.min(axis=1) & 0xFFFFFFFF).astype('<u4').tobytes()
+
+
+def signature_similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures (0.0 - 1.0)."""
+    if not sig_a or not sig_b:
+        return 0.0
+    a = np.frombuffer(bytes(sig_a), dtype='<u4')
+    b = np.frombuffer(bytes(sig_b), dtype='<u4')
+    return float(np.count_nonzero(a == b)) / NUM_PERMUTATIONS
+
+
+# --- Lookup ---
+
+def find_duplicates(category, latitude, longitude, title='', description='',
+                    exclude_id=None, limit=3):
+    """
+    Return open complaints that probably describe the same issue, best first.
+
+    Each result is a dict with the complaint, its distance in metres and the
+    estimated text similarity.
+    """
+    from complaints.models import Complaint
+
+    if latitude is None or longitude is None:
+        return []
+
+    radius = dedup_radius()
+    precision = precision_for_radius(latitude, radius)
+    # Prefix match written as a range so it uses the plain b-tree index everywhere.
+    cell_filter = Q()
+    for cell in geohash_neighbourhood(latitude, longitude, precision):
+        cell_filter |= Q(geohash__gte=cell, geohash__lt=cell + '~')
+
+    candidates = Complaint.objects.filter(
+        cell_filter,
+        category=category,
+        status__in=OPEN_STATUSES,
+        duplicate_of__isnull=True,
+    ).only('id', 'title', 'location', 'status', 'created_at', 'latitude', 'longitude', 'text_signature')
+    if exclude_id:
+        candidates = candidates.exclude(id=exclude_id)
+
+    signature = text_signature(title, description)
+    matches = []
+    for other in candidates:
+        distance = haversine_m(latitude, longitude, other.latitude, other.longitude)
+        if distance > radius:
+            continue
+        similarity = signature_similarity(signature, other.text_signature)
+        # Very close pins are flagged even when people describe it differently.
+        if similarity >= dedup_min_similarity() or distance <= radius / 5:
+            matches.append({'complaint': other, 'distance': round(distance), 'similarity': similarity})
+
+    matches.sort(key=lambda m: (-m['similarity'], m['distance']))
+    return matches[:limit]
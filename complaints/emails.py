@@ -2,7 +2,7 @@ from django.core.mail import send_mail
 from django.conf import settings
 import threading
 
-def send_alert(subject, message, recipients):
+def send_alert(subject, message, recipients, html_message=None):
     """
     Sends an email in the background to avoid freezing the browser.
     """
@@ -20,6 +20,7 @@ def send_alert(subject, message, recipients):
             send_mail(
                 subject=f"[UrbanWatch+] {subject}",
                 message=message,
+                html_message=html_message,
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=valid_recipients,
                 fail_silently=True,
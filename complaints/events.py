@@ -0,0 +1,109 @@
+# complaints/events.py
+"""
+Change feed behind the live officer and contractor dashboards.
+
+Every new complaint and every status change appends a ComplaintEvent row
+(signals.py for save(), record_many() for bulk_update()/.update() paths). The
+auto-increment id is the cursor: a dashboard is rendered with the latest id,
+opens the stream with it, and the browser's EventSource sends the last id it
+saw back as Last-Event-ID when it reconnects.
+
+Ids are handed out at insert but rows only become visible at commit, so a
+slow writer's event can appear behind a cursor that has already moved past
+it. Each poll therefore re-reads the last EVENT_LOOKBACK_IDS ids behind the
+cursor too (never further back than the page's own cursor), and the stream
+and the browser both drop events they have already shown.
+
+The feed polls this one narrow, indexed table instead of re-running every
+dashboard tab query, and only sends the deltas: held open under ASGI, one
+poll per request under WSGI (see views.live_events). Events are written once the
+surrounding transaction commits, so a client never hears about a change it
+cannot see yet. Old rows are removed by `manage.py prune_events`.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+
+def _event(complaint, kind):
+    from complaints.models import ComplaintEvent
+    return ComplaintEvent(
+        complaint_id=complaint.pk, kind=kind, status=complaint.status, region=complaint.region,
+        officer_id=complaint.officer_id, contractor_id=complaint.contractor_id,
+    )
+
+
+def record_many(complaints, kind='status'):
+    """Queue one event per complaint, written when the transaction commits."""
+    from complaints.models import ComplaintEvent
+    rows = [_event(complaint, kind) for complaint in complaints]
+    if rows:
+        transaction.on_commit(lambda: ComplaintEvent.objects.bulk_create(rows))
+
+
+def record(complaint, kind):
+    record_many([complaint], kind)
+
+
+def audience(user):
+    """Filter for the events `user` should hear about, or None if they have no live dashboard."""
+    officer = getattr(user, 'officer_profile', None)
+    if officer is not None:
+        # Their own complaints, plus the region's queue (new reports, and reports taken by others).
+        return Q(officer=officer) | Q(region=officer.region)
+    contractor = getattr(user, 'contractor_profile', None)
+    if contractor is not None and contractor.status == 'approved':
+        return Q(contractor=contractor)
+    return None
+
+
+def latest_id():
+    from complaints.models import ComplaintEvent
+    return ComplaintEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def _since_queryset(audience_filter, after_id, limit, floor):
+    from complaints.models import ComplaintEvent
+    start = after_id if floor is None else max(floor, after_id - settings.EVENT_LOOKBACK_IDS)
+    # The window holds at most after_id - start rows, so `limit` new ones still fit.
+    return (ComplaintEvent.objects.filter(audience_filter, id__gt=start)
+            .order_by('id')
+            .values('id', 'kind', 'complaint_id', 'complaint__title', 'status', 'created_at')[:limit + after_id - start])
+
+
+def _payload(row):
+    from complaints.models import Complaint
+    return {
+        'id': row['id'],
+        'kind': row['kind'],
+        'complaint': row['complaint_id'],
+        'title': row['complaint__title'],
+        'status': row['status'],
+        'status_label': dict(Complaint.STATUS_CHOICES).get(row['status'], row['status']),
+        'at': row['created_at'].isoformat(),
+    }
+
+
+def since(audience_filter, after_id, limit=100, floor=None):
+    """
+    Events after the cursor, oldest first, as JSON-ready dicts. With a `floor`,
+    late commits in the look-back window above it are included again, so the
+    caller must skip ids it has already sent.
+    """
+    return [_payload(row) for row in _since_queryset(audience_filter, after_id, limit, floor)]
+
+
+async def asince(audience_filter, after_id, limit=100, floor=None):
+    """since() for the ASGI stream."""
+    return [_payload(row) async for row in _since_queryset(audience_filter, after_id, limit, floor)]
+
+
+def prune(older_than_hours):
+    """Delete events older than the cut-off; returns how many went."""
+    from complaints.models import ComplaintEvent
+    cutoff = timezone.now() - timedelta(hours=older_than_hours)
+    deleted, _ = ComplaintEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,101 @@
+# complaints/geocode.py
+"""
+Offline reverse geocoding: map pin -> nearest pincode and locality.
+
+The gazetteer is a CSV of pincode centroids (pincode, locality, latitude,
+longitude; GEOCODE_GAZETTEER, complaints/data/mumbai_pincodes.csv by default).
+It is loaded once per process into a grid index of GRID_DEGREES cells, and a
+lookup searches rings of cells around the pin until no closer centroid can
+exist. Results are memoised per pin rounded to 4 decimals (about 11 m), so
+repeated clicks in the same spot are a dict lookup.
+
+Pins further than GEOCODE_MAX_DISTANCE_METRES from every centroid are outside
+the covered area and return None.
+"""
+import csv
+import math
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+from complaints.dedup import haversine_m
+from complaints.utils import get_region_from_pincode
+
+DEFAULT_GAZETTEER = Path(__file__).resolve().parent / 'data' / 'mumbai_pincodes.csv'
+GRID_DEGREES = 0.02  # about 2.2 km
+METRES_PER_DEGREE = 111320.0
+ROUND_DIGITS = 4
+
+
+def _cell(latitude, longitude):
+    return math.floor(latitude / GRID_DEGREES), math.floor(longitude / GRID_DEGREES)
+
+
+@lru_cache(maxsize=1)
+def gazetteer():
+    """(places, grid): the loaded rows and {cell: [row index, ...]}."""
+    path = getattr(settings, 'GEOCODE_GAZETTEER', '') or DEFAULT_GAZETTEER
+    places, grid = [], defaultdict(list)
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            place = {
+                'pincode': row['pincode'].strip(),
+                'locality': row['locality'].strip(),
+                'latitude': float(row['latitude']),
+                'longitude': float(row['longitude']),
+            }
+            grid[_cell(place['latitude'], place['longitude'])].append(len(places))
+            places.append(place)
+    return places, dict(grid)
+
+
+def nearest(latitude, longitude, max_distance_m):
+    """(place, distance in metres) for the closest centroid, or (None, None)."""
+    places, grid = gazetteer()
+    row, col = _cell(latitude, longitude)
+    # A cell is at least this many metres wide in any direction at this latitude.
+    cell_m = GRID_DEGREES * METRES_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.1)
+    max_ring = int(max_distance_m / cell_m) + 1
+
+    best, best_distance = None, None
+    for ring in range(max_ring + 1):
+        # Everything in this ring is at least (ring - 1) cells away.
+        if best is not None and (ring - 1) * cell_m > best_distance:
+            break
+        for dr in range(-ring, ring + 1):
+            for dc in range(-ring, ring + 1):
+                if max(abs(dr), abs(dc)) != ring:
+                    continue
+                for index in grid.get((row + dr, col + dc), ()):
+                    place = places[index]
+                    distance = haversine_m(latitude, longitude, place['latitude'], place['longitude'])
+                    if best_distance is None or distance < best_distance:
+                        best, best_distance = place, distance
+    if best is None or best_distance > max_distance_m:
+        return None, None
+    return best, best_distance
+
+
+@lru_cache(maxsize=8192)
+def _reverse_rounded(latitude, longitude, max_distance_m):
+    place, distance = nearest(latitude, longitude, max_distance_m)
+    if place is None:
+        return None
+    return {
+        'pincode': place['pincode'],
+        'locality': place['locality'],
+        'region': get_region_from_pincode(place['pincode']).lower(),
+        'location': f"{place['locality']}, Mumbai {place['pincode']}",
+        'distance_m': round(distance),
+    }
+
+
+def reverse(latitude, longitude):
+    """Address details for a pin, or None when it is outside the gazetteer's area."""
+    if latitude is None or longitude is None:
+        return None
+    result = _reverse_rounded(round(latitude, ROUND_DIGITS), round(longitude, ROUND_DIGITS),
+                              settings.GEOCODE_MAX_DISTANCE_METRES)
+    return dict(result) if result else None
@@ -0,0 +1,83 @@
+# complaints/idempotency.py
+"""
+Replay protection for complaint submission.
+
+A double-click or a mobile retry re-posts the same form. Two keys identify a
+repeat:
+
+* the form key - a random hidden token rendered into each submission form;
+* a fingerprint - SHA-256 of citizen, normalised title, pin (5 decimals,
+  about 1 m) and the photo's bytes, which also catches a resubmission from a
+  freshly loaded form.
+
+claim() records a SubmissionReceipt before the complaint is created, inside
+the same transaction. The (citizen, form_key) unique constraint makes a
+concurrent duplicate fail, and find_original() hands back the complaint the
+first request created, so the upload, insert and email happen only once.
+Receipts older than SUBMISSION_REPLAY_SECONDS are ignored and pruned.
+"""
+import hashlib
+import re
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+FORM_KEY_FIELD = 'idempotency_key'
+_FORM_KEY_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+def new_form_key():
+    return uuid.uuid4().hex
+
+
+def form_key_from(request):
+    """The posted form key, or None when it is missing or malformed."""
+    key = request.POST.get(FORM_KEY_FIELD, '')
+    return key if _FORM_KEY_RE.match(key) else None
+
+
+def fingerprint(citizen, title, latitude, longitude, upload=None):
+    digest = hashlib.sha256()
+    digest.update(f"{citizen.pk}|{' '.join((title or '').lower().split())}|".encode())
+    for value in (latitude, longitude):
+        digest.update(f"{round(value, 5) if value is not None else ''}|".encode())
+    if upload:
+        for chunk in upload.chunks():
+            digest.update(chunk)
+        upload.seek(0)  # the image pipeline reads it again.
+    return digest.hexdigest()
+
+
+def _window_start():
+    return timezone.now() - timedelta(seconds=settings.SUBMISSION_REPLAY_SECONDS)
+
+
+def find_original(citizen, form_key, digest):
+    """The complaint an earlier identical submission created, or None."""
+    from complaints.models import SubmissionReceipt
+
+    match = Q(fingerprint=digest, created_at__gte=_window_start())
+    if form_key:
+        match |= Q(form_key=form_key)
+    receipt = (SubmissionReceipt.objects.filter(match, citizen=citizen, complaint__isnull=False)
+               .select_related('complaint').order_by('created_at').first())
+    return receipt.complaint if receipt else None
+
+
+def claim(citizen, form_key, digest):
+    """
+    Record this submission. Returns the receipt, or None if another request
+    with the same form key got there first. Call inside transaction.atomic().
+    """
+    from complaints.models import SubmissionReceipt
+
+    SubmissionReceipt.objects.filter(citizen=citizen, created_at__lt=_window_start()).delete()
+    try:
+        with transaction.atomic():
+            return SubmissionReceipt.objects.create(citizen=citizen, form_key=form_key, fingerprint=digest)
+    except IntegrityError:
+        return None
@@ -0,0 +1,139 @@
+# complaints/images.py
+"""
+Background pipeline for complaint photos (proof_image / completion_image).
+
+Uploads are written to a local staging folder while the request is running
+and handed to a worker thread once the transaction commits. The worker strips
+EXIF, downscales and re-encodes the photo, builds a fixed-size thumbnail for
+the dashboard cards, pushes both files to the configured media storage and
+records a perceptual hash of the result (complaints/phash.py).
+This keeps the request (and any select_for_update lock) independent of the
+image size and of Cloudinary's upload speed.
+"""
+import io
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from complaints.phash import record_fingerprint
+
+# Full-size photos are capped to this many pixels on the longest side.
+MAX_DIMENSION = 1600
+# Matches the 16:9 "aspect-video" boxes used by the card templates.
+THUMBNAIL_SIZE = (480, 270)
+JPEG_QUALITY = 85
+THUMBNAIL_QUALITY = 80
+
+# Image field -> thumbnail field written by the worker.
+THUMBNAIL_FIELDS = {
+    'proof_image': 'proof_thumbnail',
+    'completion_image': 'completion_thumbnail',
+}
+
+logger = logging.getLogger(__name__)
+
+
+def staging_root():
+    root = Path(settings.IMAGE_STAGING_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def stage_image(complaint, field_name, uploaded_file):
+    """Write an upload to the local staging folder and return its path."""
+    if field_name not in THUMBNAIL_FIELDS:
+        raise ValueError(f"Unsupported image field: {field_name}")
+
+    # The file name carries everything the worker needs, so leftovers can be
+    # picked up again by `manage.py process_staged_images` after a restart.
+    ext = os.path.splitext(uploaded_file.name)[1].lower() or '.img'
+    path = staging_root() / f"{complaint.pk}__{field_name}__{uuid.uuid4().hex}{ext}"
+    with open(path, 'wb') as out:
+        for chunk in uploaded_file.chunks():
+            out.write(chunk)
+    return path
+
+
+def queue_image(complaint, field_name, uploaded_file):
+    """Stage an upload and process it after the current transaction commits."""
+    path = stage_image(complaint, field_name, uploaded_file)
+    transaction.on_commit(lambda: _dispatch(path))
+    return path
+
+
+def _dispatch(path):
+    if settings.IMAGE_PIPELINE_ASYNC:
+        threading.Thread(target=_run_in_thread, args=(path,), daemon=True).start()
+    else:
+        process_staged_image(path)
+
+
+def _run_in_thread(path):
+    try:
+        process_staged_image(path)
+    except Exception:
+        # The staged file is kept so the management command can retry it.
+        logger.exception("Image pipeline failed for %s", path)
+    finally:
+        close_old_connections()
+
+
+def _encode_jpeg(img, quality):
+    buffer = io.BytesIO()
+    # Saving without an `exif=` argument drops all metadata (GPS included).
+    img.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def render_variants(source):
+    """Return (full_jpeg_bytes, thumbnail_jpeg_bytes) for an image file/path."""
+    with Image.open(source) as img:
+        # Apply the camera rotation before the EXIF block is thrown away.
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGB')
+        img.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.Resampling.LANCZOS)
+        full = _encode_jpeg(img, JPEG_QUALITY)
+        thumb = ImageOps.fit(img, THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+        return full, _encode_jpeg(thumb, THUMBNAIL_QUALITY)
+
+
+def process_staged_image(path):
+    """Process one staged upload and attach the results to its complaint."""
+    from complaints.models import Complaint
+
+    path = Path(path)
+    complaint_id, field_name, stem = path.stem.split('__', 2)
+    thumb_field_name = THUMBNAIL_FIELDS[field_name]
+
+    if not Complaint.objects.filter(pk=complaint_id).exists():
+        path.unlink(missing_ok=True)  # complaint was deleted meanwhile.
+        return None
+
+    full, thumb = render_variants(path)
+
+    field = Complaint._meta.get_field(field_name)
+    thumb_field = Complaint._meta.get_field(thumb_field_name)
+    name = field.storage.save(field.generate_filename(None, f"{stem}.jpg"), ContentFile(full))
+    thumb_name = thumb_field.storage.save(
+        thumb_field.generate_filename(None, f"{stem}.jpg"), ContentFile(thumb)
+    )
+
+    # .update() avoids racing with a view that is saving the same row;
+    # updated_at is bumped by hand because auto_now only fires on save().
+    Complaint.objects.filter(pk=complaint_id).update(**{
+        field_name: name,
+        thumb_field_name: thumb_name,
+        'updated_at': timezone.now(),
+    })
+    # Perceptual hash of the stored photo, for near-duplicate checks.
+    record_fingerprint(complaint_id, field_name, io.BytesIO(full))
+    path.unlink(missing_ok=True)
+    return name
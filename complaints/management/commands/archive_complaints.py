@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from complaints.archive import archive, cutoff
+
+
+class Command(BaseCommand):
+    help = ('Moves complaints closed more than ARCHIVE_AFTER_DAYS ago to the archive table '
+            '(run nightly from cron; safe to interrupt and re-run).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Override ARCHIVE_AFTER_DAYS.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help='Stop after this many batches; the rest is picked up next run.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        moved = archive(cutoff(options['days']), batch_size=options['batch_size'], max_batches=options['max_batches'])
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} complaints in {elapsed:.0f} ms."))
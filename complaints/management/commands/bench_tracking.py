@@ -0,0 +1,81 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from complaints.models import Complaint
+
+
+class Command(BaseCommand):
+    help = ('Compares the public tracking and health endpoints under WSGI (a fixed pool of sync workers) '
+            'and ASGI (one event loop), in-process against the configured database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint and mode.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight at once.')
+        parser.add_argument('--workers', type=int, default=4, help='Sync workers in WSGI mode.')
+        parser.add_argument('--mode', choices=['both', 'wsgi', 'asgi'], default='both')
+        parser.add_argument('--no-page-cache', action='store_true',
+                            help='Render every request instead of serving anonymous hits from the page cache.')
+
+    def handle(self, *args, **options):
+        token = Complaint.objects.exclude(tracking_code=None).values_list('tracking_code', flat=True).first()
+        paths = {'health': reverse('health'), 'ready': reverse('health_ready')}
+        if token:
+            paths['track'] = f"{reverse('complaints:track_issue')}?token={token}"
+        else:
+            self.stdout.write(self.style.WARNING("No complaints yet; skipping the tracking page."))
+
+        modes = ['wsgi', 'asgi'] if options['mode'] == 'both' else [options['mode']]
+        overrides = {'RATELIMIT_ENABLED': False}  # every request comes from one address
+        if options['no_page_cache']:
+            overrides['PAGE_CACHE_SECONDS'] = 0
+        with override_settings(**overrides):
+            for name, path in paths.items():
+                for mode in modes:
+                    run = self.run_wsgi if mode == 'wsgi' else self.run_asgi
+                    started = time.perf_counter()
+                    latencies, errors = run(path, options)
+                    elapsed = time.perf_counter() - started
+                    self.report(name, mode, latencies, errors, elapsed)
+
+    def run_wsgi(self, path, options):
+        client = Client()
+
+        def one(_):
+            started = time.perf_counter()
+            status = client.get(path).status_code
+            return time.perf_counter() - started, status
+
+        # Each worker handles one request at a time, like a gunicorn sync worker.
+        with ThreadPoolExecutor(max_workers=min(options['workers'], options['concurrency'])) as pool:
+            results = list(pool.map(one, range(options['requests'])))
+        return [r[0] for r in results], sum(1 for r in results if r[1] >= 400)
+
+    def run_asgi(self, path, options):
+        async def main():
+            client = AsyncClient()
+            gate = asyncio.Semaphore(options['concurrency'])
+
+            async def one():
+                async with gate:
+                    started = time.perf_counter()
+                    status = (await client.get(path)).status_code
+                    return time.perf_counter() - started, status
+
+            return await asyncio.gather(*(one() for _ in range(options['requests'])))
+
+        results = asyncio.run(main())
+        return [r[0] for r in results], sum(1 for r in results if r[1] >= 400)
+
+    def report(self, name, mode, latencies, errors, elapsed):
+        ordered = sorted(latencies)
+        p95 = ordered[int(len(ordered) * 0.95) - 1] if ordered else 0
+        self.stdout.write(
+            f"{name:<7} {mode}: {len(latencies) / elapsed:8.0f} req/s  "
+            f"p50 {statistics.median(ordered) * 1000:6.1f} ms  p95 {p95 * 1000:6.1f} ms  errors {errors}"
+        )
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from complaints import tiles
+from complaints.models import Complaint
+
+
+class Command(BaseCommand):
+    help = 'Pre-builds cached heatmap tiles for every tile that contains complaints.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-zoom', type=int, default=12, help='Highest zoom level to build (default 12).')
+        parser.add_argument('--rebuild', action='store_true', help='Rebuild tiles that are already cached.')
+
+    def handle(self, *args, **options):
+        max_zoom = min(options['max_zoom'], tiles.MAX_ZOOM)
+        started = time.perf_counter()
+
+        base_tiles = set(Complaint.objects.filter(tile_x__isnull=False).values_list('tile_x', 'tile_y').distinct())
+        wanted = {t for base in base_tiles for t in tiles.tiles_containing(*base) if t[0] <= max_zoom}
+        for z, x, y in sorted(wanted):
+            if options['rebuild']:
+                tiles.tile_path(z, x, y).unlink(missing_ok=True)
+            tiles.get_tile_path(z, x, y)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Built {len(wanted)} tiles up to zoom {max_zoom} in {elapsed:.1f}s."))
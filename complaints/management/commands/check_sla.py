@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from complaints.sla import escalate
+
+
+class Command(BaseCommand):
+    help = 'Escalates complaints that have exceeded their SLA target (run every few minutes from cron).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='List breaches without recording or notifying.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        breaches = escalate(dry_run=options['dry_run'])
+        for complaint, level, hours in breaches:
+            self.stdout.write(f"#{complaint.id} {complaint.status} -> level {level} (target {hours}h)")
+        elapsed = (time.perf_counter() - started) * 1000
+        verb = 'Found' if options['dry_run'] else 'Escalated'
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(breaches)} complaints in {elapsed:.0f} ms."))
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from complaints.clustering import recluster
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds incidents by clustering open complaints by location and category.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--region', help='Only re-cluster one region (e.g. north).')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = recluster(region=options.get('region'))
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.SUCCESS(f"Built {count} incidents in {elapsed:.0f} ms."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from complaints.models import Complaint
+from complaints.phash import FIELD_KINDS, record_fingerprint
+
+
+class Command(BaseCommand):
+    help = 'Computes perceptual hashes for complaint photos that do not have one yet.'
+
+    def handle(self, *args, **kwargs):
+        done = failed = 0
+        for field_name, kind in FIELD_KINDS.items():
+            missing = (Complaint.objects
+                       .exclude(**{field_name: ''})
+                       .exclude(**{f'{field_name}__isnull': True})
+                       .exclude(image_fingerprints__kind=kind)
+                       .only('id', field_name))
+            for complaint in missing.iterator():
+                image = getattr(complaint, field_name)
+                try:
+                    with image.open('rb') as f:
+                        record_fingerprint(complaint.id, field_name, f)
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f" - #{complaint.id} {field_name}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"Fingerprinted {done} photos ({failed} failed)."))
@@ -83,9 +83,9 @@ class Command(BaseCommand):
                             region=region,
                             specialization=cat,
                             status='approved',
-                            phone=fake.numerify("##########"), # Strictly 10 digits
+                            phone=fake.unique.numerify("##########"), # Strictly 10 digits, unique per contractor
                             email=email,
-                            license_number=f"LIC-{batch_id}-{random.randint(1000,9999)}",
+                            license_number=f"LIC-{batch_id}-{region}-{cat}",
                             approved_by=approving_officer,
                             approved_at=timezone.now()
                         )
@@ -104,7 +104,7 @@ class Command(BaseCommand):
                         region=random.choice(REGIONS),
                         specialization=random.choice(CATEGORIES),
                         status='pending',
-                        phone=fake.numerify("##########"), # Strictly 10 digits
+                        phone=fake.unique.numerify("##########"), # Strictly 10 digits, unique per contractor
                         email=fake.email(),
                         license_number=f"TEMP-{batch_id}-{i}"
                     )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from complaints.images import process_staged_image, staging_root
+
+
+class Command(BaseCommand):
+    help = 'Processes complaint photos left in the staging folder (e.g. after a worker restart).'
+
+    def handle(self, *args, **kwargs):
+        staged = sorted(staging_root().iterdir())
+        if not staged:
+            self.stdout.write("No staged images found.")
+            return
+
+        failed = 0
+        for path in staged:
+            try:
+                process_staged_image(path)
+                self.stdout.write(f" - Processed {path.name}")
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f" - Failed {path.name}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {len(staged) - failed} processed, {failed} failed."
+        ))
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from complaints.events import prune
+
+
+class Command(BaseCommand):
+    help = 'Deletes old live-dashboard events (run from cron).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None,
+                            help='Keep this many hours of events (default: EVENT_RETENTION_HOURS).')
+
+    def handle(self, *args, **options):
+        hours = options['hours'] or settings.EVENT_RETENTION_HOURS
+        deleted = prune(hours)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} events older than {hours}h."))
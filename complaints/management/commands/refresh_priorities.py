@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from complaints.priority import refresh_priorities
+
+
+class Command(BaseCommand):
+    help = 'Re-scores stale open complaints for the priority-ordered officer queues (run from cron).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-batches', type=int, default=20,
+                            help='Stop after this many batches; the rest is picked up next run.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = 0
+        for _ in range(options['max_batches']):
+            done = refresh_priorities(batch_size=options['batch_size'])
+            total += done
+            if done < options['batch_size']:
+                break
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.SUCCESS(f"Re-scored {total} complaints in {elapsed:.0f} ms."))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0008_complaint_officer_feedback'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='completion_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='complaint_thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='proof_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='complaint_thumbs/'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:25
+
+import re
+import zlib
+
+import django.db.models.deletion
+import numpy as np
+from django.db import migrations, models
+
+# Frozen copies of complaints.dedup as of this migration, so later changes
+# to that module can't change what the backfill writes.
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+SHINGLE_SIZE = 4
+NUM_PERMUTATIONS = 64
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def geohash_encode(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def text_signature(perm_a, perm_b, *parts):
+    text = re.sub(r'[^a-z0-9 ]+', ' ', ' '.join(p or '' for p in parts).lower())
+    text = ' '.join(text.split())
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text} if text else set()
+    else:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    if not shingles:
+        return b''
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    permuted = (np.outer(perm_a, hashes) + perm_b[:, None]) % MERSENNE_PRIME
+    return (permuted.min(axis=1) & 0xFFFFFFFF).astype('<u4').tobytes()
+
+
+def backfill_dedup_index(apps, schema_editor):
+    rng = np.random.RandomState(20240601)
+    perm_a = rng.randint(1, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.uint64)
+    perm_b = rng.randint(0, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+    Complaint = apps.get_model('complaints', 'Complaint')
+    batch = []
+    for complaint in Complaint.objects.only('id', 'title', 'description', 'latitude', 'longitude').iterator():
+        if complaint.latitude is not None and complaint.longitude is not None:
+            complaint.geohash = geohash_encode(complaint.latitude, complaint.longitude)
+        complaint.text_signature = text_signature(perm_a, perm_b, complaint.title, complaint.description)
+        batch.append(complaint)
+        if len(batch) >= 500:
+            Complaint.objects.bulk_update(batch, ['geohash', 'text_signature'])
+            batch = []
+    if batch:
+        Complaint.objects.bulk_update(batch, ['geohash', 'text_signature'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0009_complaint_image_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, help_text='Earlier report of the same issue.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='complaints.complaint'),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='text_signature',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(backfill_dedup_index, migrations.RunPython.noop),
+    ]
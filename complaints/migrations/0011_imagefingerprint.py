@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0010_complaint_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('proof', 'Proof Image'), ('completion', 'Completion Image')], max_length=20)),
+                ('hash', models.BigIntegerField(db_index=True, help_text='64-bit dHash, stored signed.')),
+                ('chunk0', models.PositiveIntegerField(db_index=True)),
+                ('chunk1', models.PositiveIntegerField(db_index=True)),
+                ('chunk2', models.PositiveIntegerField(db_index=True)),
+                ('chunk3', models.PositiveIntegerField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('complaint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_fingerprints', to='complaints.complaint')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('complaint', 'kind'), name='unique_fingerprint_per_image')],
+            },
+        ),
+    ]
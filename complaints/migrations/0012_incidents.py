@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0011_imagefingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Incident',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(choices=[('north', 'North'), ('south', 'South'), ('east', 'East'), ('west', 'West'), ('central', 'Central')], max_length=50)),
+                ('category', models.CharField(choices=[('water', 'Water Supply'), ('road', 'Road & Infrastructure'), ('electricity', 'Electricity'), ('sanitation', 'Sanitation'), ('other', 'Other')], max_length=50)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('closed', 'Closed')], default='open', max_length=20)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-size', '-updated_at'],
+                'indexes': [models.Index(fields=['status', 'region', 'category', 'latitude'], name='incident_lookup_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='incident',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='complaints', to='complaints.incident'),
+        ),
+    ]
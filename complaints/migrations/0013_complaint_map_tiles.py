@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:32
+
+import math
+
+from django.db import migrations, models
+
+BASE_ZOOM = 18
+
+
+def tile_for(lat, lng):
+    # complaints.tiles.tile_for at BASE_ZOOM as of this migration, copied so later edits cannot change it.
+    lat = max(min(lat, 85.0511), -85.0511)
+    n = 1 << BASE_ZOOM
+    x = int((lng + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def backfill_tiles(apps, schema_editor):
+    Complaint = apps.get_model('complaints', 'Complaint')
+    batch = []
+    for complaint in Complaint.objects.filter(latitude__isnull=False, longitude__isnull=False).only('id', 'latitude', 'longitude').iterator():
+        complaint.tile_x, complaint.tile_y = tile_for(complaint.latitude, complaint.longitude)
+        batch.append(complaint)
+        if len(batch) >= 500:
+            Complaint.objects.bulk_update(batch, ['tile_x', 'tile_y'])
+            batch = []
+    if batch:
+        Complaint.objects.bulk_update(batch, ['tile_x', 'tile_y'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0012_incidents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='tile_x',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='tile_y',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['tile_x', 'tile_y'], name='complaint_tile_idx'),
+        ),
+        migrations.RunPython(backfill_tiles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+from django.db import migrations
+
+# Copied from complaints.search so the migration keeps running the DDL it
+# shipped with; search.ensure_sqlite_index keeps its own copy for repairs.
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE complaints_complaint ADD COLUMN search_document tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(location, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX complaint_search_gin ON complaints_complaint USING GIN (search_document)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS complaint_search_gin",
+    "ALTER TABLE complaints_complaint DROP COLUMN IF EXISTS search_document",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE complaints_complaint_fts USING fts5(
+        title, location, description,
+        content='complaints_complaint', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER complaints_complaint_fts_ai AFTER INSERT ON complaints_complaint BEGIN
+        INSERT INTO complaints_complaint_fts(rowid, title, location, description)
+        VALUES (new.id, new.title, new.location, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER complaints_complaint_fts_ad AFTER DELETE ON complaints_complaint BEGIN
+        INSERT INTO complaints_complaint_fts(complaints_complaint_fts, rowid, title, location, description)
+        VALUES ('delete', old.id, old.title, old.location, old.description);
+    END
+    """,
+    # Only re-index when the searchable text actually changes.
+    """
+    CREATE TRIGGER complaints_complaint_fts_au AFTER UPDATE OF title, location, description ON complaints_complaint BEGIN
+        INSERT INTO complaints_complaint_fts(complaints_complaint_fts, rowid, title, location, description)
+        VALUES ('delete', old.id, old.title, old.location, old.description);
+        INSERT INTO complaints_complaint_fts(rowid, title, location, description)
+        VALUES (new.id, new.title, new.location, new.description);
+    END
+    """,
+    "INSERT INTO complaints_complaint_fts(complaints_complaint_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS complaints_complaint_fts_ai",
+    "DROP TRIGGER IF EXISTS complaints_complaint_fts_ad",
+    "DROP TRIGGER IF EXISTS complaints_complaint_fts_au",
+    "DROP TABLE IF EXISTS complaints_complaint_fts",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD})
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0013_complaint_map_tiles'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
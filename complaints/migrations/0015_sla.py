@@ -0,0 +1,97 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+DEFAULT_TARGETS = [
+    ('reported', 48),
+    ('assigned', 72),
+    ('in_progress', 168),
+    ('completed', 48),
+]
+
+
+def seed_targets_and_clock(apps, schema_editor):
+    Complaint = apps.get_model('complaints', 'Complaint')
+    SLATarget = apps.get_model('complaints', 'SLATarget')
+    for status, hours in DEFAULT_TARGETS:
+        SLATarget.objects.get_or_create(status=status, category='', region='', defaults={'max_hours': hours})
+
+    # Best guess at when each existing complaint entered its current status.
+    started = {
+        'reported': F('created_at'),
+        'assigned': Coalesce('assigned_at', 'created_at'),
+        'in_progress': Coalesce('in_progress_at', 'assigned_at', 'created_at'),
+        'completed': Coalesce('completed_at', 'in_progress_at', 'created_at'),
+        'closed': Coalesce('closed_at', 'updated_at'),
+    }
+    for status, expression in started.items():
+        Complaint.objects.filter(status=status).update(status_changed_at=expression)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0014_complaint_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SLABreach',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('reported', 'Reported'), ('assigned', 'Assigned'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('closed', 'Closed')], max_length=50)),
+                ('level', models.PositiveSmallIntegerField(help_text='Escalation level reached (1 = first breach).')),
+                ('target_hours', models.PositiveIntegerField()),
+                ('status_since', models.DateTimeField()),
+                ('breached_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['-breached_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SLATarget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('reported', 'Reported (waiting for an officer)'), ('assigned', 'Assigned (waiting for a contractor)'), ('in_progress', 'In Progress'), ('completed', 'Completed (waiting for verification)')], max_length=50)),
+                ('category', models.CharField(blank=True, choices=[('water', 'Water Supply'), ('road', 'Road & Infrastructure'), ('electricity', 'Electricity'), ('sanitation', 'Sanitation'), ('other', 'Other')], max_length=50)),
+                ('region', models.CharField(blank=True, choices=[('north', 'North'), ('south', 'South'), ('east', 'East'), ('west', 'West'), ('central', 'Central')], max_length=50)),
+                ('max_hours', models.PositiveIntegerField(help_text='Escalate after this many hours in the status.')),
+            ],
+            options={
+                'ordering': ['status', 'category', 'region'],
+            },
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='escalation_level',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='status_changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['status', 'escalation_level', 'status_changed_at'], name='complaint_sla_idx'),
+        ),
+        migrations.AddField(
+            model_name='slabreach',
+            name='complaint',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sla_breaches', to='complaints.complaint'),
+        ),
+        migrations.AddConstraint(
+            model_name='slatarget',
+            constraint=models.UniqueConstraint(fields=('status', 'category', 'region'), name='unique_sla_target'),
+        ),
+        migrations.AddConstraint(
+            model_name='slabreach',
+            constraint=models.UniqueConstraint(fields=('complaint', 'status', 'status_since', 'level'), name='unique_sla_breach'),
+        ),
+        migrations.RunPython(seed_targets_and_clock, migrations.RunPython.noop),
+    ]
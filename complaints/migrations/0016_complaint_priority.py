@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0015_sla'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='priority',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='priority_updated_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['region', '-priority'], name='complaint_priority_idx'),
+        ),
+    ]
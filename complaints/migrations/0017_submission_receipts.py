@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0016_complaint_priority'),
+        ('users', '0002_citizen_profile_pic'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('form_key', models.CharField(blank=True, help_text='Hidden token rendered into the form.', max_length=64, null=True)),
+                ('fingerprint', models.CharField(help_text='SHA-256 of citizen, title, pin and photo.', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('citizen', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_receipts', to='users.citizen')),
+                ('complaint', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='complaints.complaint')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['citizen', 'fingerprint', 'created_at'], name='submission_fingerprint_idx')],
+                'constraints': [models.UniqueConstraint(fields=('citizen', 'form_key'), name='unique_submission_form_key')],
+            },
+        ),
+    ]
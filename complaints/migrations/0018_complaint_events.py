@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0017_submission_receipts'),
+        ('contractors', '0003_contractor_profile_pic'),
+        ('officers', '0002_officer_profile_pic'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('created', 'New complaint'), ('status', 'Status change')], max_length=20)),
+                ('status', models.CharField(choices=[('reported', 'Reported'), ('assigned', 'Assigned'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('closed', 'Closed')], max_length=50)),
+                ('region', models.CharField(choices=[('north', 'North'), ('south', 'South'), ('east', 'East'), ('west', 'West'), ('central', 'Central')], max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('complaint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='complaints.complaint')),
+                ('contractor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='contractors.contractor')),
+                ('officer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='officers.officer')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['region', 'id'], name='event_region_idx'), models.Index(fields=['officer', 'id'], name='event_officer_idx'), models.Index(fields=['contractor', 'id'], name='event_contractor_idx')],
+            },
+        ),
+    ]
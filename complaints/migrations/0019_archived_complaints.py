@@ -0,0 +1,55 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0018_complaint_events'),
+        ('contractors', '0003_contractor_profile_pic'),
+        ('officers', '0002_officer_profile_pic'),
+        ('users', '0002_citizen_profile_pic'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedComplaint',
+            fields=[
+                ('id', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('status', models.CharField(choices=[('reported', 'Reported'), ('assigned', 'Assigned'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('closed', 'Closed')], default='closed', max_length=50)),
+                ('location', models.CharField(blank=True, max_length=255, null=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('pincode', models.CharField(blank=True, max_length=6, null=True)),
+                ('region', models.CharField(choices=[('north', 'North'), ('south', 'South'), ('east', 'East'), ('west', 'West'), ('central', 'Central')], max_length=50)),
+                ('category', models.CharField(choices=[('water', 'Water Supply'), ('road', 'Road & Infrastructure'), ('electricity', 'Electricity'), ('sanitation', 'Sanitation'), ('other', 'Other')], default='other', max_length=50)),
+                ('tracking_token', models.UUIDField(editable=False, unique=True)),
+                ('officer_feedback', models.TextField(blank=True, null=True)),
+                ('proof_image', models.ImageField(blank=True, null=True, upload_to='complaint_proofs/')),
+                ('completion_image', models.ImageField(blank=True, null=True, upload_to='complaint_proofs/')),
+                ('proof_thumbnail', models.ImageField(blank=True, editable=False, null=True, upload_to='complaint_thumbs/')),
+                ('completion_thumbnail', models.ImageField(blank=True, editable=False, null=True, upload_to='complaint_thumbs/')),
+                ('duplicate_of_ref', models.PositiveIntegerField(blank=True, null=True)),
+                ('incident_ref', models.PositiveIntegerField(blank=True, null=True)),
+                ('history', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('assigned_at', models.DateTimeField(blank=True, null=True)),
+                ('in_progress_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('citizen', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_complaints', to='users.citizen')),
+                ('contractor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='contractors.contractor')),
+                ('officer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='officers.officer')),
+            ],
+            options={
+                'ordering': ['-closed_at'],
+                'indexes': [models.Index(fields=['citizen', '-closed_at'], name='archive_citizen_idx'), models.Index(fields=['officer', '-closed_at'], name='archive_officer_idx'), models.Index(fields=['contractor', '-closed_at'], name='archive_contractor_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:10
+
+import secrets
+
+from django.db import migrations, models
+
+# Frozen copy of complaints.tracking_codes.generate() as of this migration.
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+DATA_LENGTH = 9
+
+
+def generate():
+    data = ''.join(secrets.choice(ALPHABET) for _ in range(DATA_LENGTH))
+    total, factor = 0, 2  # Luhn mod 32 check character.
+    for symbol in reversed(data):
+        addend = factor * ALPHABET.index(symbol)
+        total += addend // 32 + addend % 32
+        factor = 1 if factor == 2 else 2
+    return data + ALPHABET[(32 - total % 32) % 32]
+
+
+def backfill_codes(apps, schema_editor):
+    issued = set()
+    for name in ('Complaint', 'ArchivedComplaint'):
+        model = apps.get_model('complaints', name)
+        batch = []
+        for complaint in model.objects.filter(tracking_code__isnull=True).only('id').iterator():
+            code = generate()
+            while code in issued:
+                code = generate()
+            issued.add(code)
+            complaint.tracking_code = code
+            batch.append(complaint)
+            if len(batch) >= 500:
+                model.objects.bulk_update(batch, ['tracking_code'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['tracking_code'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0019_archived_complaints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcomplaint',
+            name='tracking_code',
+            field=models.CharField(blank=True, editable=False, max_length=10, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='tracking_code',
+            field=models.CharField(blank=True, editable=False, max_length=10, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_codes, migrations.RunPython.noop),
+    ]
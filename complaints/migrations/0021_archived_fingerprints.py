@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of complaints.phash.split_chunks() as of this migration.
+CHUNKS = 4
+CHUNK_BITS = 16
+
+
+def split_chunks(signed):
+    value = signed + (1 << 64) if signed < 0 else signed
+    return [(value >> (CHUNK_BITS * (CHUNKS - 1 - i))) & 0xFFFF for i in range(CHUNKS)]
+
+
+def move_fingerprints_out_of_history(apps, schema_editor):
+    """Complaints archived so far kept their fingerprints only in `history`; index them."""
+    ArchivedComplaint = apps.get_model('complaints', 'ArchivedComplaint')
+    ArchivedFingerprint = apps.get_model('complaints', 'ArchivedFingerprint')
+    rows = []
+    for archived in ArchivedComplaint.objects.iterator():
+        for f in archived.history.get('fingerprints', []):
+            chunks = split_chunks(f['hash'])
+            rows.append(ArchivedFingerprint(
+                complaint_id=archived.id, kind=f['kind'], hash=f['hash'], created_at=archived.archived_at,
+                chunk0=chunks[0], chunk1=chunks[1], chunk2=chunks[2], chunk3=chunks[3],
+            ))
+    ArchivedFingerprint.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0020_tracking_codes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('proof', 'Proof Image'), ('completion', 'Completion Image')], max_length=20)),
+                ('hash', models.BigIntegerField(db_index=True, help_text='64-bit dHash, stored signed.')),
+                ('chunk0', models.PositiveIntegerField(db_index=True)),
+                ('chunk1', models.PositiveIntegerField(db_index=True)),
+                ('chunk2', models.PositiveIntegerField(db_index=True)),
+                ('chunk3', models.PositiveIntegerField(db_index=True)),
+                ('created_at', models.DateTimeField()),
+                ('complaint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_fingerprints', to='complaints.archivedcomplaint')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('complaint', 'kind'), name='unique_archived_fingerprint_per_image')],
+            },
+        ),
+        migrations.RunPython(move_fingerprints_out_of_history, migrations.RunPython.noop),
+    ]
@@ -7,6 +7,8 @@ from contractors.models import Contractor
 
 import uuid
 
+from django.utils import timezone
+
 class Complaint(models.Model):
     STATUS_CHOICES = [
         ('reported', 'Reported'),
@@ -53,10 +55,36 @@ class Complaint(models.Model):
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, default='other')
     proof_image = models.ImageField(upload_to='complaint_proofs/', null=True, blank=True)
     tracking_token = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
+    # Short, typeable ID with a check character (see complaints/tracking_codes.py); filled in save().
+    tracking_code = models.CharField(max_length=10, unique=True, null=True, blank=True, editable=False)
     completion_image = models.ImageField(upload_to='complaint_proofs/', null=True, blank=True)
+    # Card-sized thumbnails, written by the background image pipeline (complaints/images.py).
+    proof_thumbnail = models.ImageField(upload_to='complaint_thumbs/', null=True, blank=True, editable=False)
+    completion_thumbnail = models.ImageField(upload_to='complaint_thumbs/', null=True, blank=True, editable=False)
 
     officer_feedback = models.TextField(null=True, blank=True, help_text="Officer feedback when work is rejected.")
+
+    # Duplicate detection (see complaints/dedup.py). Both index fields are filled in save().
+    duplicate_of = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL,
+                    related_name='duplicates', help_text="Earlier report of the same issue.")
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True, editable=False)
+    text_signature = models.BinaryField(default=b'', editable=False)
+    # Map tile at tiles.BASE_ZOOM, used by the heatmap endpoints (see complaints/tiles.py).
+    tile_x = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    tile_y = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
+    # Spatial cluster this complaint belongs to (see complaints/clustering.py).
+    incident = models.ForeignKey('Incident', null=True, blank=True, on_delete=models.SET_NULL,
+                    related_name='complaints')
     
+    # SLA clock (see complaints/sla.py): when the current status began, and how
+    # many times the complaint has been escalated since then.
+    status_changed_at = models.DateTimeField(default=timezone.now, editable=False)
+    escalation_level = models.PositiveSmallIntegerField(default=0, editable=False)
+    # Queue ordering score (see complaints/priority.py); NULL timestamp = needs a refresh.
+    priority = models.PositiveIntegerField(default=0, editable=False)
+    priority_updated_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -68,6 +96,13 @@ class Complaint(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['tile_x', 'tile_y'], name='complaint_tile_idx'),
+            # SLA scans: equality on status/level, range on the status clock.
+            models.Index(fields=['status', 'escalation_level', 'status_changed_at'], name='complaint_sla_idx'),
+            # Officer queues: region, then most urgent first.
+            models.Index(fields=['region', '-priority'], name='complaint_priority_idx'),
+        ]
 
     # Define allowed status transitions. 
     # Meanss a complaint can only move to certain statuses from its current status.
@@ -87,6 +122,312 @@ class Complaint(models.Model):
         if self.status == 'completed' and not self.completion_image:
             raise ValidationError("Completion image is required to mark as completed.")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so save() can tell when it changes.
+        instance._loaded_status = instance.__dict__.get('status')
+        # ...and the stored updated_at, which keys the cached cards (complaints/cards.py).
+        instance._loaded_updated_at = instance.__dict__.get('updated_at')
+        # ...and what the dedup/tile columns are derived from, so save() only recomputes them on a change.
+        instance._loaded_index_inputs = instance._index_inputs()
+        return instance
+
+    # Fields the geohash, heatmap tile and MinHash signature are computed from.
+    INDEX_INPUT_FIELDS = ('title', 'description', 'latitude', 'longitude')
+
+    def _index_inputs(self):
+        # __dict__ rather than attributes, so deferred fields are not loaded just to compare them.
+        return tuple(self.__dict__.get(field) for field in self.INDEX_INPUT_FIELDS)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        # A new status restarts the SLA clock and clears earlier escalations.
+        loaded_status = getattr(self, '_loaded_status', None)
+        if loaded_status is not None and loaded_status != self.status:
+            self.status_changed_at = timezone.now()
+            self.escalation_level = 0
+            self.priority_updated_at = None  # re-scored by the next refresh_priorities run.
+            if update_fields is not None:
+                update_fields = set(update_fields) | {'status_changed_at', 'escalation_level', 'priority_updated_at'}
+
+        # Keep the duplicate-detection indexes in step with the pin and text, recomputing
+        # them only when those changed (not on every status update).
+        # The signal handler invalidates the heatmap tile the pin is moving away from, too.
+        self._previous_tile = (self.tile_x, self.tile_y)
+        derived = set()
+        inputs_changed = self._index_inputs() != getattr(self, '_loaded_index_inputs', None)
+        if inputs_changed and (update_fields is None or set(update_fields) & set(self.INDEX_INPUT_FIELDS)):
+            from complaints.dedup import geohash_encode, text_signature
+            from complaints.tiles import tile_for
+            if self.latitude is not None and self.longitude is not None:
+                self.geohash = geohash_encode(self.latitude, self.longitude)
+                self.tile_x, self.tile_y = tile_for(self.latitude, self.longitude)
+            else:
+                self.geohash = None
+                self.tile_x = self.tile_y = None
+            self.text_signature = text_signature(self.title, self.description)
+            derived |= {'geohash', 'text_signature', 'tile_x', 'tile_y'}
+        if not self.tracking_code:
+            from complaints.tracking_codes import new_code
+            self.tracking_code = new_code()
+            derived.add('tracking_code')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | derived
+        super().save(*args, **kwargs)
+        self._loaded_status = self.status
+        self._loaded_updated_at = self.updated_at
+        self._loaded_index_inputs = self._index_inputs()
+
     
+    # Complaint and ArchivedComplaint can be listed together (complaints/archive.py).
+    is_archived = False
+
+    @property
+    def display_code(self):
+        """Tracking code as shown to citizens, e.g. 7KQ2M-X9C4D."""
+        from complaints.tracking_codes import format_code
+        return format_code(self.tracking_code)
+
     def __str__(self):
         return f"{self.title} ({self.status})"
+
+
+class Incident(models.Model):
+    """A group of nearby open complaints of the same category that can be handled together."""
+
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('closed', 'Closed'),
+    ]
+
+    region = models.CharField(max_length=50, choices=Complaint.REGION_CHOICE)
+    category = models.CharField(max_length=50, choices=Complaint.CATEGORY_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    # Centroid of the member complaints.
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    size = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-size', '-updated_at']
+        indexes = [
+            models.Index(fields=['status', 'region', 'category', 'latitude'], name='incident_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_category_display()} incident in {self.get_region_display()} ({self.size} reports)"
+
+
+class SLATarget(models.Model):
+    """
+    How long a complaint may stay in one status.
+
+    Blank category/region means "any"; the most specific matching target wins.
+    """
+
+    STATUS_CHOICES = [
+        ('reported', 'Reported (waiting for an officer)'),
+        ('assigned', 'Assigned (waiting for a contractor)'),
+        ('in_progress', 'In Progress'),
+        ('completed', 'Completed (waiting for verification)'),
+    ]
+
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES)
+    category = models.CharField(max_length=50, choices=Complaint.CATEGORY_CHOICES, blank=True)
+    region = models.CharField(max_length=50, choices=Complaint.REGION_CHOICE, blank=True)
+    max_hours = models.PositiveIntegerField(help_text="Escalate after this many hours in the status.")
+
+    class Meta:
+        ordering = ['status', 'category', 'region']
+        constraints = [
+            models.UniqueConstraint(fields=['status', 'category', 'region'], name='unique_sla_target'),
+        ]
+
+    def __str__(self):
+        scope = ' / '.join(filter(None, [self.get_category_display(), self.get_region_display()])) or 'All'
+        return f"{self.get_status_display()} - {scope}: {self.max_hours}h"
+
+
+class SLABreach(models.Model):
+    """One escalation of a complaint that overstayed its SLA target."""
+
+    complaint = models.ForeignKey(Complaint, on_delete=models.CASCADE, related_name='sla_breaches')
+    status = models.CharField(max_length=50, choices=Complaint.STATUS_CHOICES)
+    level = models.PositiveSmallIntegerField(help_text="Escalation level reached (1 = first breach).")
+    target_hours = models.PositiveIntegerField()
+    status_since = models.DateTimeField()
+    breached_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-breached_at']
+        constraints = [
+            models.UniqueConstraint(fields=['complaint', 'status', 'status_since', 'level'], name='unique_sla_breach'),
+        ]
+
+    def __str__(self):
+        return f"#{self.complaint_id} {self.status} breach (level {self.level})"
+
+
+class ImageFingerprint(models.Model):
+    """Perceptual hash of a complaint photo (see complaints/phash.py)."""
+
+    KIND_CHOICES = [
+        ('proof', 'Proof Image'),
+        ('completion', 'Completion Image'),
+    ]
+
+    complaint = models.ForeignKey(Complaint, on_delete=models.CASCADE, related_name='image_fingerprints')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    hash = models.BigIntegerField(db_index=True, help_text="64-bit dHash, stored signed.")
+    # 16-bit slices of the hash for multi-index Hamming lookups.
+    chunk0 = models.PositiveIntegerField(db_index=True)
+    chunk1 = models.PositiveIntegerField(db_index=True)
+    chunk2 = models.PositiveIntegerField(db_index=True)
+    chunk3 = models.PositiveIntegerField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['complaint', 'kind'], name='unique_fingerprint_per_image'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} of #{self.complaint_id} ({self.hash & 0xFFFFFFFFFFFFFFFF:016x})"
+
+
+class SubmissionReceipt(models.Model):
+    """Short-lived record of a complaint submission, used to spot replays (see complaints/idempotency.py)."""
+
+    citizen = models.ForeignKey(Citizen, on_delete=models.CASCADE, related_name='submission_receipts')
+    form_key = models.CharField(max_length=64, null=True, blank=True, help_text="Hidden token rendered into the form.")
+    fingerprint = models.CharField(max_length=64, help_text="SHA-256 of citizen, title, pin and photo.")
+    complaint = models.ForeignKey(Complaint, null=True, blank=True, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # Two requests carrying the same form token cannot both get through.
+            models.UniqueConstraint(fields=['citizen', 'form_key'], name='unique_submission_form_key'),
+        ]
+        indexes = [
+            models.Index(fields=['citizen', 'fingerprint', 'created_at'], name='submission_fingerprint_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.citizen_id}: {self.fingerprint[:12]} -> #{self.complaint_id}"
+
+
+class ComplaintEvent(models.Model):
+    """One change to a complaint, streamed to the officer/contractor dashboards (see complaints/events.py)."""
+
+    KIND_CHOICES = [
+        ('created', 'New complaint'),
+        ('status', 'Status change'),
+    ]
+
+    complaint = models.ForeignKey(Complaint, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # Snapshot of who the change concerns, so the stream filters without a join.
+    status = models.CharField(max_length=50, choices=Complaint.STATUS_CHOICES)
+    region = models.CharField(max_length=50, choices=Complaint.REGION_CHOICE)
+    officer = models.ForeignKey(Officer, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    contractor = models.ForeignKey(Contractor, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # The id is the stream cursor: "everything after N for this audience".
+            models.Index(fields=['region', 'id'], name='event_region_idx'),
+            models.Index(fields=['officer', 'id'], name='event_officer_idx'),
+            models.Index(fields=['contractor', 'id'], name='event_contractor_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.id}: #{self.complaint_id} {self.kind} ({self.status})"
+
+
+class ArchivedComplaint(models.Model):
+    """
+    A complaint that was closed long ago, moved out of the hot Complaint table
+    (see complaints/archive.py). It keeps the original id and tracking token, so
+    links and tracking lookups keep working, and the names of its images.
+    """
+
+    is_archived = True
+
+    # Same id as the original complaint; set explicitly when archiving.
+    id = models.PositiveIntegerField(primary_key=True)
+    citizen = models.ForeignKey(Citizen, on_delete=models.CASCADE, related_name='archived_complaints')
+    officer = models.ForeignKey(Officer, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    contractor = models.ForeignKey(Contractor, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    status = models.CharField(max_length=50, choices=Complaint.STATUS_CHOICES, default='closed')
+    location = models.CharField(max_length=255, null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    pincode = models.CharField(max_length=6, null=True, blank=True)
+    region = models.CharField(max_length=50, choices=Complaint.REGION_CHOICE)
+    category = models.CharField(max_length=50, choices=Complaint.CATEGORY_CHOICES, default='other')
+    tracking_token = models.UUIDField(unique=True, editable=False)
+    tracking_code = models.CharField(max_length=10, unique=True, null=True, blank=True, editable=False)
+    officer_feedback = models.TextField(null=True, blank=True)
+
+    # The image files stay where they are; only the references move.
+    proof_image = models.ImageField(upload_to='complaint_proofs/', null=True, blank=True)
+    completion_image = models.ImageField(upload_to='complaint_proofs/', null=True, blank=True)
+    proof_thumbnail = models.ImageField(upload_to='complaint_thumbs/', null=True, blank=True, editable=False)
+    completion_thumbnail = models.ImageField(upload_to='complaint_thumbs/', null=True, blank=True, editable=False)
+
+    # Links to rows that may be archived or gone by now, kept as plain ids.
+    duplicate_of_ref = models.PositiveIntegerField(null=True, blank=True)
+    incident_ref = models.PositiveIntegerField(null=True, blank=True)
+    # SLA breaches and change events, as they were at archive time.
+    history = models.JSONField(default=dict, blank=True)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    assigned_at = models.DateTimeField(null=True, blank=True)
+    in_progress_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-closed_at']
+        indexes = [
+            models.Index(fields=['citizen', '-closed_at'], name='archive_citizen_idx'),
+            models.Index(fields=['officer', '-closed_at'], name='archive_officer_idx'),
+            models.Index(fields=['contractor', '-closed_at'], name='archive_contractor_idx'),
+        ]
+
+    display_code = Complaint.display_code
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+
+class ArchivedFingerprint(models.Model):
+    """ImageFingerprint of an archived complaint, so its photos are still checked for re-use."""
+
+    complaint = models.ForeignKey(ArchivedComplaint, on_delete=models.CASCADE, related_name='image_fingerprints')
+    kind = models.CharField(max_length=20, choices=ImageFingerprint.KIND_CHOICES)
+    hash = models.BigIntegerField(db_index=True, help_text="64-bit dHash, stored signed.")
+    chunk0 = models.PositiveIntegerField(db_index=True)
+    chunk1 = models.PositiveIntegerField(db_index=True)
+    chunk2 = models.PositiveIntegerField(db_index=True)
+    chunk3 = models.PositiveIntegerField(db_index=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['complaint', 'kind'], name='unique_archived_fingerprint_per_image'),
+        ]
+
+    __str__ = ImageFingerprint.__str__
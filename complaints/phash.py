@@ -0,0 +1,126 @@
+# complaints/phash.py
+"""
+Perceptual hashes for complaint photos, used to spot re-used images.
+
+Each processed proof/completion photo gets a 64-bit dHash (ImageFingerprint).
+The hash is also split into four 16-bit chunks stored in indexed columns, which
+turns "every photo within Hamming distance d" into a handful of exact index
+lookups (multi-index hashing): if two hashes differ in at most d bits, at
+least one of the four chunks differs in at most d // 4 bits, so we only have
+to query each chunk for the values within that small radius.
+"""
+from itertools import combinations
+
+import numpy as np
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.db.models import Q
+
+HASH_SIZE = 8        # 8x8 comparisons -> 64-bit hash.
+CHUNKS = 4
+CHUNK_BITS = 64 // CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+# Image field on Complaint -> ImageFingerprint.kind
+FIELD_KINDS = {
+    'proof_image': 'proof',
+    'completion_image': 'completion',
+}
+
+
+def max_distance():
+    return getattr(settings, 'PHASH_MAX_DISTANCE', 6)
+
+
+def dhash(source):
+    """64-bit difference hash of an image (path, file object or PIL image)."""
+    img = source if isinstance(source, Image.Image) else Image.open(source)
+    try:
+        img = ImageOps.exif_transpose(img).convert('L')
+        # One extra column so every row yields HASH_SIZE left/right comparisons.
+        small = img.resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+        pixels = np.asarray(small, dtype=np.int16)
+    finally:
+        if img is not source:
+            img.close()
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def split_chunks(value):
+    return [(value >> (CHUNK_BITS * (CHUNKS - 1 - i))) & CHUNK_MASK for i in range(CHUNKS)]
+
+
+def to_signed(value):
+    """Store unsigned 64-bit hashes in a signed BigIntegerField."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def hamming(a, b):
+    return (to_unsigned(a) ^ to_unsigned(b)).bit_count()
+
+
+def _chunk_variants(chunk, radius):
+    """All 16-bit values within `radius` bit flips of `chunk`."""
+    variants = [chunk]
+    for r in range(1, radius + 1):
+        for positions in combinations(range(CHUNK_BITS), r):
+            flipped = chunk
+            for bit in positions:
+                flipped ^= 1 << bit
+            variants.append(flipped)
+    return variants
+
+
+def record_fingerprint(complaint_id, field_name, source):
+    """Hash a stored photo and upsert its fingerprint row."""
+    from complaints.models import ImageFingerprint
+
+    value = dhash(source)
+    chunks = split_chunks(value)
+    fingerprint, _ = ImageFingerprint.objects.update_or_create(
+        complaint_id=complaint_id,
+        kind=FIELD_KINDS[field_name],
+        defaults={
+            'hash': to_signed(value),
+            'chunk0': chunks[0], 'chunk1': chunks[1], 'chunk2': chunks[2], 'chunk3': chunks[3],
+        },
+    )
+    return fingerprint
+
+
+def find_similar(fingerprint, distance=None):
+    """
+    Fingerprints from other complaints within `distance` bits, closest first.
+
+    Searches both proof and completion photos of hot and archived complaints
+    (ArchivedFingerprint rows have the same fields, so callers treat them alike).
+    """
+    from complaints.models import ArchivedFingerprint, ImageFingerprint
+
+    if distance is None:
+        distance = max_distance()
+    radius = distance // CHUNKS
+    value = to_unsigned(fingerprint.hash)
+
+    lookup = Q()
+    for i, chunk in enumerate(split_chunks(value)):
+        lookup |= Q(**{f'chunk{i}__in': _chunk_variants(chunk, radius)})
+
+    matches = []
+    for model in (ImageFingerprint, ArchivedFingerprint):
+        candidates = (model.objects
+                      .filter(lookup)
+                      .exclude(complaint_id=fingerprint.complaint_id)
+                      .select_related('complaint'))
+        for other in candidates:
+            d = hamming(value, other.hash)
+            if d <= distance:
+                other.distance = d
+                matches.append(other)
+    matches.sort(key=lambda f: f.distance)
+    return matches
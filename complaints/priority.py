@@ -0,0 +1,91 @@
+# complaints/priority.py
+"""
+Priority scores for the officer queues.
+
+The score (0-100+, higher is more urgent) is the sum of:
+
+* category severity  - a sparking pole outranks litter;
+* duplicate reports   - every citizen who linked the same issue adds weight;
+* age                 - slowly rising so nothing waits forever;
+* SLA proximity       - share of the SLA target already used, plus a jump for
+                        every escalation (complaints/sla.py).
+
+Scores are stored in the indexed `priority` column so the queues are a plain
+ORDER BY. `refresh_priorities()` recomputes in batches, oldest score first;
+new complaints, status changes and escalations mark their rows stale
+(priority_updated_at = NULL) so they are picked up on the next pass.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from complaints.sla import load_targets, target_hours
+
+CATEGORY_SEVERITY = {
+    'electricity': 40,
+    'water': 30,
+    'road': 25,
+    'sanitation': 20,
+    'other': 10,
+}
+DUPLICATE_WEIGHT, DUPLICATE_CAP = 8, 30
+AGE_POINTS_PER_DAY, AGE_CAP = 2, 20
+SLA_WEIGHT = 20
+ESCALATION_WEIGHT = 10
+
+# Scores are only kept for work that is still in a queue.
+OPEN_STATUSES = ['reported', 'assigned', 'in_progress', 'completed']
+
+
+def refresh_interval():
+    return timedelta(minutes=getattr(settings, 'PRIORITY_REFRESH_MINUTES', 15))
+
+
+def compute_priority(complaint, duplicate_count=0, targets=None, now=None):
+    now = now or timezone.now()
+    targets = load_targets() if targets is None else targets
+
+    score = CATEGORY_SEVERITY.get(complaint.category, CATEGORY_SEVERITY['other'])
+    score += min(duplicate_count * DUPLICATE_WEIGHT, DUPLICATE_CAP)
+
+    age_days = (now - complaint.created_at).total_seconds() / 86400
+    score += min(int(age_days * AGE_POINTS_PER_DAY), AGE_CAP)
+
+    hours = target_hours(targets, complaint.status, complaint.category, complaint.region)
+    if hours:
+        used = (now - complaint.status_changed_at).total_seconds() / (hours * 3600)
+        score += int(min(used, 1.0) * SLA_WEIGHT)
+    score += complaint.escalation_level * ESCALATION_WEIGHT
+    return score
+
+
+def refresh_priorities(complaint_ids=None, batch_size=500, now=None):
+    """
+    Recompute scores for one batch and return how many were refreshed.
+
+    With `complaint_ids`, only those complaints are refreshed; otherwise the
+    stale ones (never scored, or scored before the refresh interval) are.
+    """
+    from complaints.models import Complaint
+
+    now = now or timezone.now()
+    qs = Complaint.objects.filter(status__in=OPEN_STATUSES)
+    if complaint_ids is not None:
+        qs = qs.filter(id__in=complaint_ids)
+    else:
+        qs = qs.filter(
+            Q(priority_updated_at__isnull=True) | Q(priority_updated_at__lt=now - refresh_interval())
+        ).order_by(F('priority_updated_at').asc(nulls_first=True))
+    batch = list(qs.annotate(
+        duplicate_count=Count('duplicates', filter=Q(duplicates__status__in=OPEN_STATUSES))
+    ).only('id', 'category', 'region', 'status', 'created_at', 'status_changed_at',
+           'escalation_level', 'priority')[:batch_size])
+
+    targets = load_targets()
+    for complaint in batch:
+        complaint.priority = compute_priority(complaint, complaint.duplicate_count, targets, now)
+        complaint.priority_updated_at = now
+    Complaint.objects.bulk_update(batch, ['priority', 'priority_updated_at'], batch_size=500)
+    return len(batch)
@@ -0,0 +1,42 @@
+# complaints/samples.py
+"""
+Sample tracking codes for the "try one of these" buttons on the home page.
+
+A pool of the latest complaints' (tracking_code, title) pairs is kept in the
+cache. It is rebuilt with one narrow values() query when it expires
+(SAMPLE_POOL_SECONDS) or when a complaint is created or deleted. The home
+page then only picks from that list, without loading any model instances.
+"""
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from complaints.tracking_codes import format_code
+
+POOL_KEY = 'complaints:sample_pool'
+
+
+def _build_pool():
+    from complaints.models import Complaint
+    rows = (Complaint.objects.filter(duplicate_of__isnull=True)
+            .order_by('-created_at')
+            .values_list('tracking_code', 'title')[:settings.SAMPLE_POOL_SIZE])
+    # Only the code and title go into the pool; nothing else about the complaint is shown.
+    return [{'tracking_code': format_code(code), 'title': title} for code, title in rows if code]
+
+
+def sample_pool():
+    return cache.get_or_set(POOL_KEY, _build_pool, settings.SAMPLE_POOL_SECONDS)
+
+
+def sample_tokens(count=3):
+    """Up to `count` random {'tracking_code', 'title'} dicts from the pool."""
+    pool = sample_pool()
+    return random.sample(pool, min(count, len(pool)))
+
+
+def invalidate():
+    """Rebuild the pool on next use, once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(POOL_KEY))
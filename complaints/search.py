@@ -0,0 +1,190 @@
+# complaints/search.py
+"""
+Full-text search over complaint title, location and description.
+
+The index lives in the database and is maintained by the database itself, so
+it stays in sync with save(), .update() and bulk_update() alike (see
+migration 0014_complaint_search):
+
+* PostgreSQL: a stored, generated `search_document` tsvector column (title
+  weighted A, location B, description C) with a GIN index, ranked with ts_rank.
+* SQLite: an external-content FTS5 table (`complaints_complaint_fts`) kept in
+  step by triggers, ranked with bm25().
+
+Other backends fall back to icontains filters, the same as the old admin search.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+FTS_TABLE = 'complaints_complaint_fts'
+COMPLAINT_TABLE = 'complaints_complaint'
+DEFAULT_LIMIT = 50
+
+# Column weights for SQLite's bm25() in FTS column order (title, location, description).
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+
+# --- Index DDL (as created by migration 0014; used by ensure_sqlite_index) ---
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE complaints_complaint ADD COLUMN search_document tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(location, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX complaint_search_gin ON complaints_complaint USING GIN (search_document)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS complaint_search_gin",
+    "ALTER TABLE complaints_complaint DROP COLUMN IF EXISTS search_document",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE complaints_complaint_fts USING fts5(
+        title, location, description,
+        content='complaints_complaint', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER complaints_complaint_fts_ai AFTER INSERT ON complaints_complaint BEGIN
+        INSERT INTO complaints_complaint_fts(rowid, title, location, description)
+        VALUES (new.id, new.title, new.location, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER complaints_complaint_fts_ad AFTER DELETE ON complaints_complaint BEGIN
+        INSERT INTO complaints_complaint_fts(complaints_complaint_fts, rowid, title, location, description)
+        VALUES ('delete', old.id, old.title, old.location, old.description);
+    END
+    """,
+    # Only re-index when the searchable text actually changes.
+    """
+    CREATE TRIGGER complaints_complaint_fts_au AFTER UPDATE OF title, location, description ON complaints_complaint BEGIN
+        INSERT INTO complaints_complaint_fts(complaints_complaint_fts, rowid, title, location, description)
+        VALUES ('delete', old.id, old.title, old.location, old.description);
+        INSERT INTO complaints_complaint_fts(rowid, title, location, description)
+        VALUES (new.id, new.title, new.location, new.description);
+    END
+    """,
+    "INSERT INTO complaints_complaint_fts(complaints_complaint_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS complaints_complaint_fts_ai",
+    "DROP TRIGGER IF EXISTS complaints_complaint_fts_ad",
+    "DROP TRIGGER IF EXISTS complaints_complaint_fts_au",
+    "DROP TABLE IF EXISTS complaints_complaint_fts",
+]
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(query):
+    """Split user input into plain words (everything else is dropped)."""
+    return _TERM_RE.findall((query or '').lower())[:12]
+
+
+def is_supported():
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def _postgres_ids(terms, filters, params, limit):
+    # Every word must match; the last one is matched as a prefix for type-ahead.
+    tsquery = ' & '.join(f"{t}:*" if i == len(terms) - 1 else t for i, t in enumerate(terms))
+    sql = f"""
+        SELECT id FROM {COMPLAINT_TABLE}
+        WHERE search_document @@ to_tsquery('english', %s) {filters}
+        ORDER BY ts_rank(search_document, to_tsquery('english', %s)) DESC, created_at DESC
+        LIMIT %s
+    """
+    return sql, [tsquery, *params, tsquery, limit]
+
+
+def _sqlite_ids(terms, filters, params, limit):
+    match = ' '.join(f'"{t}"*' if i == len(terms) - 1 else f'"{t}"' for i, t in enumerate(terms))
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    sql = f"""
+        SELECT c.id FROM {FTS_TABLE} f
+        JOIN {COMPLAINT_TABLE} c ON c.id = f.rowid
+        WHERE {FTS_TABLE} MATCH %s {filters}
+        ORDER BY bm25({FTS_TABLE}, {weights}), c.created_at DESC
+        LIMIT %s
+    """
+    return sql, [match, *params, limit]
+
+
+def ranked_ids(query, region=None, status=None, limit=DEFAULT_LIMIT):
+    """Ids of matching complaints, best match first."""
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    if not is_supported():
+        lookup = Q()
+        for term in terms:
+            lookup &= Q(title__icontains=term) | Q(description__icontains=term) | Q(location__icontains=term)
+        qs = _filtered(region, status).filter(lookup)
+        return list(qs.values_list('id', flat=True)[:limit])
+
+    prefix = '' if connection.vendor == 'postgresql' else 'c.'
+    filters, params = '', []
+    if region:
+        filters += f' AND {prefix}region = %s'
+        params.append(region)
+    if status:
+        filters += f' AND {prefix}status = %s'
+        params.append(status)
+
+    build = _postgres_ids if connection.vendor == 'postgresql' else _sqlite_ids
+    sql, sql_params = build(terms, filters, params, limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, sql_params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _filtered(region, status):
+    from complaints.models import Complaint
+    qs = Complaint.objects.all()
+    if region:
+        qs = qs.filter(region=region)
+    if status:
+        qs = qs.filter(status=status)
+    return qs
+
+
+def search_complaints(query, region=None, status=None, limit=DEFAULT_LIMIT):
+    """Matching complaints in rank order."""
+    from complaints.models import Complaint
+
+    ids = ranked_ids(query, region=region, status=status, limit=limit)
+    by_id = Complaint.objects.select_related('citizen', 'officer', 'contractor').in_bulk(ids)
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def ensure_sqlite_index(using='default', **kwargs):
+    """
+    Re-create the FTS triggers if a later migration rebuilt the complaints table.
+
+    SQLite's ALTER TABLE emulation copies the table and drops the old one,
+    which silently drops its triggers too. Runs after every `migrate`.
+    """
+    from django.db import connections
+
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE %s", [f'{FTS_TABLE}%'])
+        existing = {row[0] for row in cursor.fetchall()}
+        if FTS_TABLE not in existing:
+            return  # migration 0014 not applied yet.
+        missing = [sql for sql in SQLITE_FORWARD if 'CREATE TRIGGER' in sql and sql.split()[2] not in existing]
+        if missing:
+            for sql in missing:
+                cursor.execute(sql)
+            cursor.execute(SQLITE_FORWARD[-1])  # rebuild from the content table.
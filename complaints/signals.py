@@ -0,0 +1,54 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from complaints import cards, events, samples, tiles, tracking_codes
+from complaints.models import Complaint
+
+
+@receiver(post_save, sender=Complaint)
+def invalidate_tiles_on_save(sender, instance, **kwargs):
+    # Any saved change can move a pin or flip it between open and closed.
+    tiles.invalidate([(instance.tile_x, instance.tile_y), getattr(instance, '_previous_tile', (None, None))])
+
+
+@receiver(post_delete, sender=Complaint)
+def invalidate_tiles_on_delete(sender, instance, **kwargs):
+    tiles.invalidate([(instance.tile_x, instance.tile_y)])
+
+
+@receiver(post_save, sender=Complaint)
+def invalidate_cards_on_save(sender, instance, **kwargs):
+    # Runs inside save(), before _loaded_updated_at moves on to the new value.
+    cards.invalidate([(instance.pk, getattr(instance, '_loaded_updated_at', None))])
+
+
+@receiver(post_delete, sender=Complaint)
+def invalidate_cards_on_delete(sender, instance, **kwargs):
+    cards.invalidate([(instance.pk, instance.updated_at)])
+
+
+@receiver(post_save, sender=Complaint)
+def invalidate_samples_on_create(sender, instance, created, **kwargs):
+    if created:
+        samples.invalidate()
+
+
+@receiver(post_delete, sender=Complaint)
+def invalidate_samples_on_delete(sender, instance, **kwargs):
+    samples.invalidate()
+
+
+@receiver(post_save, sender=Complaint)
+def record_event_on_save(sender, instance, created, **kwargs):
+    # _loaded_status still holds the stored value here; save() moves it on afterwards.
+    if created:
+        events.record(instance, 'created')
+    elif getattr(instance, '_loaded_status', None) not in (None, instance.status):
+        events.record(instance, 'status')
+
+
+@receiver(post_save, sender=Complaint)
+def remember_tracking_code(sender, instance, created, **kwargs):
+    # Lets the code through the lookup bloom filter before its next rebuild.
+    if created and instance.tracking_code:
+        tracking_codes.remember(instance.tracking_code)
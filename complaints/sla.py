@@ -0,0 +1,127 @@
+# complaints/sla.py
+"""
+SLA checks and escalation for complaints that sit too long in one status.
+
+Each complaint carries `status_changed_at` (reset whenever its status changes)
+and an `escalation_level`. A complaint at level L breaches again once it has
+been in its status for (L + 1) x the target hours, up to SLA_MAX_LEVEL.
+
+The scan is one query per (status, level) pair on the
+(status, escalation_level, status_changed_at) index: equality on the first two
+columns and a range on the clock, so it only touches rows that are already
+past the shortest target for that status, never the whole table. Run it from
+cron via `manage.py check_sla`.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from complaints import cards
+from notifications.outbox import notify_many, notify_template
+
+
+def max_level():
+    return getattr(settings, 'SLA_MAX_LEVEL', 3)
+
+
+def load_targets():
+    """{(status, category, region): max_hours}; blank category/region mean "any"."""
+    from complaints.models import SLATarget
+    return {
+        (t.status, t.category, t.region): t.max_hours
+        for t in SLATarget.objects.all()
+    }
+
+
+def target_hours(targets, status, category, region):
+    """Hours allowed for one complaint, preferring the most specific target."""
+    for key in ((status, category, region), (status, category, ''), (status, '', region), (status, '', '')):
+        if key in targets:
+            return targets[key]
+    return None
+
+
+def find_breaches(now=None, targets=None):
+    """Return (complaint, new_level, target_hours) for every complaint due for escalation."""
+    from complaints.models import Complaint
+
+    now = now or timezone.now()
+    targets = load_targets() if targets is None else targets
+
+    shortest = {}
+    for (status, _, _), hours in targets.items():
+        shortest[status] = min(hours, shortest.get(status, hours))
+
+    breaches = []
+    for status, hours in shortest.items():
+        for level in range(max_level()):
+            # Cheapest cut-off first; the exact per-category target is checked below.
+            cutoff = now - timedelta(hours=hours * (level + 1))
+            candidates = Complaint.objects.filter(
+                status=status,
+                escalation_level=level,
+                status_changed_at__lt=cutoff,
+                duplicate_of__isnull=True,
+            ).select_related('officer__user')
+            for complaint in candidates:
+                allowed = target_hours(targets, status, complaint.category, complaint.region)
+                if allowed and complaint.status_changed_at < now - timedelta(hours=allowed * (level + 1)):
+                    breaches.append((complaint, level + 1, allowed))
+    return breaches
+
+
+def supervisor_emails():
+    emails = [e for e in getattr(settings, 'SLA_SUPERVISOR_EMAILS', []) if e]
+    if not emails:
+        emails = list(User.objects.filter(is_superuser=True, is_active=True)
+                      .exclude(email='').values_list('email', flat=True))
+    return emails
+
+
+def escalate(now=None, dry_run=False):
+    """Record breaches, bump escalation levels and notify. Returns the breaches handled."""
+    from complaints.models import Complaint, SLABreach
+
+    breaches = find_breaches(now)
+    if dry_run or not breaches:
+        return breaches
+
+    with transaction.atomic():
+        SLABreach.objects.bulk_create([
+            SLABreach(complaint=c, status=c.status, level=level, target_hours=hours, status_since=c.status_changed_at)
+            for c, level, hours in breaches
+        ], ignore_conflicts=True)
+
+        by_level = defaultdict(list)
+        for complaint, level, _ in breaches:
+            by_level[(complaint.status, level)].append(complaint.id)
+        for (status, level), ids in by_level.items():
+            # Conditional update: a status change or a parallel run since the scan wins.
+            Complaint.objects.filter(id__in=ids, status=status, escalation_level=level - 1).update(escalation_level=level)
+        # The overdue badge is part of the cached cards, but .update() leaves updated_at alone.
+        cards.invalidate_complaints([c for c, _, _ in breaches])
+
+        # Escalation raises the priority score; re-rank these right away.
+        from complaints.priority import refresh_priorities
+        refresh_priorities([c.id for c, _, _ in breaches], batch_size=None)
+
+    transaction.on_commit(lambda: notify_breaches(breaches))
+    return breaches
+
+
+def notify_breaches(breaches):
+    """One digest per supervisor and per assigned officer."""
+    supervisors = supervisor_emails()
+    if supervisors:
+        notify_template('sla_breaches', {'breaches': breaches}, supervisors)
+
+    by_officer = defaultdict(list)
+    for breach in breaches:
+        officer = breach[0].officer
+        if officer and officer.user.email:
+            by_officer[officer.user.email].append(breach)
+    notify_many('sla_overdue', [([email], {'breaches': own}) for email, own in by_officer.items()])
@@ -1,9 +1,36 @@
+import io
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+import numpy as np
+from PIL import Image
 from django.test import TestCase
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from users.models import Citizen
-from .models import Complaint
+from .models import ArchivedComplaint, Complaint, ImageFingerprint, Incident, SLABreach, SLATarget, SubmissionReceipt
 from django.urls import reverse
 
+from urbanwatch.page_cache import _cache_key, cache_anonymous_page
+from . import geocode, tiles, tracking_codes
+from .archive import archive, archive_batch, cutoff
+from .clustering import assign_incident, cluster_points, recluster
+from .dedup import find_duplicates, geohash_encode, signature_similarity, text_signature
+from .images import THUMBNAIL_SIZE, MAX_DIMENSION, stage_image, process_staged_image
+from .phash import dhash, find_similar, hamming, record_fingerprint
+from .priority import refresh_priorities
+from .samples import POOL_KEY, sample_tokens
+from .search import ranked_ids, search_complaints
+from .sla import escalate, find_breaches
+
 # Create your tests here.
 class ComplaintModelTest(TestCase):
     def setUp(self):
@@ -51,3 +78,642 @@ class ComplaintViewTest(TestCase):
         complaint = Complaint.objects.first()
         self.assertEqual(complaint.title, 'Broken road')
         self.assertEqual(complaint.citizen, self.citizen)
+
+
+# --- Image pipeline ---
+
+
+def make_jpeg(size=(3000, 2000), exif=True):
+    img = Image.new('RGB', size, (200, 40, 40))
+    buffer = io.BytesIO()
+    if exif:
+        data = Image.Exif()
+        data[0x010F] = 'TestCam'  # Make
+        img.save(buffer, format='JPEG', exif=data)
+    else:
+        img.save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class ImagePipelineTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.staging_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.staging_root, ignore_errors=True)
+        overrides = override_settings(
+            MEDIA_ROOT=self.media_root,
+            IMAGE_STAGING_ROOT=self.staging_root,
+            IMAGE_PIPELINE_ASYNC=False,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.user = User.objects.create_user(username='photo', password='Test@123')
+        self.citizen = Citizen.objects.create(user=self.user, name='Photo Citizen')
+
+    def test_worker_strips_exif_downscales_and_thumbnails(self):
+        complaint = Complaint.objects.create(
+            title='Leak', description='Pipe', category='water', region='north', citizen=self.citizen
+        )
+        upload = SimpleUploadedFile('leak.jpg', make_jpeg(), content_type='image/jpeg')
+        path = stage_image(complaint, 'proof_image', upload)
+
+        process_staged_image(path)
+        complaint.refresh_from_db()
+
+        self.assertFalse(path.exists())
+        with Image.open(complaint.proof_image.path) as full:
+            self.assertLessEqual(max(full.size), MAX_DIMENSION)
+            self.assertEqual(len(full.getexif()), 0)
+        with Image.open(complaint.proof_thumbnail.path) as thumb:
+            self.assertEqual(thumb.size, THUMBNAIL_SIZE)
+
+    def test_submit_defers_upload_until_commit(self):
+        self.client.login(username='photo', password='Test@123')
+        upload = SimpleUploadedFile('road.jpg', make_jpeg((800, 600), exif=False), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('complaints:submit_complaint'), {
+                'title': 'Pothole',
+                'description': 'Deep pothole',
+                'category': 'road',
+                'proof_image': upload,
+            })
+        self.assertEqual(response.status_code, 302)
+        complaint = Complaint.objects.get()
+        self.assertTrue(complaint.proof_image.name.startswith('complaint_proofs/'))
+        self.assertTrue(complaint.proof_thumbnail)
+        # Pages show the thumbnail rather than the full-size photo.
+        response = self.client.get(reverse('complaints:track_issue'), {'token': complaint.tracking_code})
+        self.assertContains(response, complaint.proof_thumbnail.url)
+        self.assertNotContains(response, complaint.proof_image.url)
+
+
+# --- Duplicate detection ---
+
+
+class DuplicateDetectionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='dupe', password='Test@123')
+        self.citizen = Citizen.objects.create(user=self.user, name='Dupe Citizen')
+        self.original = Complaint.objects.create(
+            title='Huge pothole on Link Road', description='Deep pothole near the bus stop',
+            category='road', region='west', citizen=self.citizen,
+            latitude=19.1364, longitude=72.8296,
+        )
+
+    def test_geohash_and_signature(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744), 'u4pruydqq')
+        self.assertEqual(self.original.geohash, geohash_encode(19.1364, 72.8296))
+        same = text_signature('Huge pothole on Link Road', 'Deep pothole near the bus stop')
+        other = text_signature('Streetlight broken', 'Dark lane at night')
+        self.assertEqual(signature_similarity(same, self.original.text_signature), 1.0)
+        self.assertLess(signature_similarity(other, self.original.text_signature), 0.2)
+
+    def test_finds_nearby_open_complaint_of_same_category(self):
+        matches = find_duplicates('road', 19.1366, 72.8297, 'Pothole on Link Road', 'Big pothole at bus stop')
+        self.assertEqual([m['complaint'] for m in matches], [self.original])
+        self.assertLess(matches[0]['distance'], 50)
+
+        self.assertEqual(find_duplicates('water', 19.1366, 72.8297, 'Pothole on Link Road'), [])
+        self.assertEqual(find_duplicates('road', 19.1500, 72.8296, 'Pothole on Link Road'), [])
+
+        self.original.status = 'closed'
+        self.original.save()
+        self.assertEqual(find_duplicates('road', 19.1366, 72.8297, 'Pothole on Link Road'), [])
+
+    def test_check_endpoint_ignores_non_finite_pins(self):
+        self.client.login(username='dupe', password='Test@123')
+        for latitude in ('inf', 'nan', '19.1366'):
+            response = self.client.get(reverse('complaints:check_duplicates'), {
+                'latitude': latitude, 'longitude': '72.8297', 'category': 'road', 'title': 'Pothole on Link Road',
+            })
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['duplicates']), 1)  # the finite one still matches
+
+    def test_status_saves_leave_the_indexes_alone(self):
+        complaint = Complaint.objects.get(id=self.original.id)
+        complaint.status = 'assigned'
+        with mock.patch('complaints.dedup.text_signature') as signature:
+            complaint.save(update_fields=['status'])
+            complaint.save()
+        signature.assert_not_called()
+
+        complaint.title = 'Crater on Link Road'
+        complaint.save(update_fields=['title'])
+        complaint.refresh_from_db()
+        self.assertEqual(complaint.text_signature, text_signature('Crater on Link Road', complaint.description))
+
+    def test_submit_links_to_selected_duplicate(self):
+        self.client.login(username='dupe', password='Test@123')
+        self.client.post(reverse('complaints:submit_complaint'), {
+            'title': 'Pothole on Link Road', 'description': 'Big pothole at bus stop', 'category': 'road',
+            'latitude': '19.1366', 'longitude': '72.8297', 'duplicate_of': str(self.original.id),
+        })
+        new = Complaint.objects.exclude(id=self.original.id).get()
+        self.assertEqual(new.duplicate_of, self.original)
+
+
+# --- Perceptual hashes ---
+
+
+def make_pattern(seed, size=(320, 240)):
+    rng = np.random.RandomState(seed)
+    blocks = rng.randint(0, 255, size=(6, 8), dtype=np.uint8)
+    return Image.fromarray(blocks).resize(size, Image.Resampling.NEAREST).convert('RGB')
+
+
+class PerceptualHashTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='hash', password='Test@123')
+        self.citizen = Citizen.objects.create(user=self.user, name='Hash Citizen')
+        self.first = Complaint.objects.create(title='A', description='a', region='north', citizen=self.citizen)
+        self.second = Complaint.objects.create(title='B', description='b', region='north', citizen=self.citizen)
+        self.third = Complaint.objects.create(title='C', description='c', region='north', citizen=self.citizen)
+
+    def _jpeg(self, img, quality=90):
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG', quality=quality)
+        buffer.seek(0)
+        return buffer
+
+    def test_dhash_survives_recompression_and_resizing(self):
+        original = make_pattern(1)
+        recompressed = self._jpeg(original.resize((160, 120)), quality=40)
+        self.assertLessEqual(hamming(dhash(original), dhash(recompressed)), 4)
+        self.assertGreater(hamming(dhash(original), dhash(make_pattern(2))), 10)
+
+    def test_find_similar_across_complaints(self):
+        mine = record_fingerprint(self.first.id, 'completion_image', self._jpeg(make_pattern(1)))
+        record_fingerprint(self.second.id, 'proof_image', self._jpeg(make_pattern(1).resize((200, 150)), 50))
+        record_fingerprint(self.third.id, 'completion_image', self._jpeg(make_pattern(3)))
+
+        matches = find_similar(mine)
+        self.assertEqual([m.complaint_id for m in matches], [self.second.id])
+        self.assertEqual(ImageFingerprint.objects.count(), 3)
+
+    def test_archived_photos_are_still_matched(self):
+        record_fingerprint(self.second.id, 'proof_image', self._jpeg(make_pattern(1)))
+        Complaint.objects.filter(id=self.second.id).update(status='closed')
+        archive_batch([self.second.id])
+        self.assertFalse(ImageFingerprint.objects.filter(complaint_id=self.second.id).exists())
+
+        mine = record_fingerprint(self.first.id, 'completion_image', self._jpeg(make_pattern(1)))
+        matches = find_similar(mine)
+        self.assertEqual([(m.complaint_id, m.complaint.title) for m in matches], [(self.second.id, 'B')])
+
+
+# --- Incident clustering ---
+
+
+class IncidentClusteringTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='cluster', password='Test@123')
+        self.citizen = Citizen.objects.create(user=self.user, name='Cluster Citizen')
+
+    def _complaint(self, lat, lng, category='road'):
+        return Complaint.objects.create(
+            title='Pothole', description='Pothole', category=category, region='north',
+            citizen=self.citizen, latitude=lat, longitude=lng,
+        )
+
+    def test_cluster_points_groups_touching_cells(self):
+        labels = cluster_points([19.1000, 19.1003, 19.1006, 19.2000], [72.8000, 72.8001, 72.8002, 72.8000], 100)
+        self.assertEqual(labels[0], labels[1])
+        self.assertEqual(labels[1], labels[2])
+        self.assertNotEqual(labels[0], labels[3])
+
+    def test_assign_and_recluster(self):
+        a = self._complaint(19.1000, 72.8000)
+        b = self._complaint(19.1004, 72.8001)
+        far = self._complaint(19.2000, 72.8000)
+        water = self._complaint(19.1001, 72.8000, category='water')
+        incidents = [assign_incident(c) for c in (a, b, far, water)]
+        self.assertEqual(incidents[0], incidents[1])
+        self.assertEqual(incidents[1].size, 2)
+        self.assertEqual(len({i.id for i in incidents}), 3)
+
+        self.assertEqual(recluster(), 3)
+        a.refresh_from_db()
+        self.assertEqual(a.incident_id, incidents[0].id)  # ids stay stable
+        self.assertEqual(Incident.objects.get(id=incidents[0].id).size, 2)
+
+
+# --- Heatmap tiles ---
+
+
+class HeatmapTileTest(TestCase):
+    def setUp(self):
+        self.tile_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(TILE_CACHE_ROOT=self.tile_root)
+        self.settings_override.enable()
+        self.user = User.objects.create_user(username='heat', password='Test@123')
+        self.citizen = Citizen.objects.create(user=self.user, name='Heat Citizen')
+        self.road = Complaint.objects.create(title='Pothole', description='x', category='road', region='west',
+                                             citizen=self.citizen, latitude=19.1364, longitude=72.8296)
+        Complaint.objects.create(title='Leak', description='x', category='water', region='west', status='closed',
+                                 citizen=self.citizen, latitude=19.1365, longitude=72.8297)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.tile_root, ignore_errors=True)
+
+    def _tile(self, z):
+        x, y = tiles.tile_for(19.1364, 72.8296, z)
+        response = self.client.get(reverse('complaints:complaint_tile', args=[z, x, y]))
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b''.join(response.streaming_content)), tiles.tile_path(z, x, y)
+
+    def test_tile_counts_are_cached_and_invalidated(self):
+        data, path = self._tile(12)
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(sum(b['open'] for b in data['bins']), 1)
+        self.assertEqual(data['bins'][0]['categories'], {'road': [1, 0], 'water': [0, 1]})
+        self.assertTrue(path.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.road.status = 'closed'
+            self.road.save()
+        self.assertFalse(path.exists())
+        data, _ = self._tile(12)
+        self.assertEqual(sum(b['closed'] for b in data['bins']), 2)
+
+    def test_empty_tiles_are_not_written_to_disk(self):
+        response = self.client.get(reverse('complaints:complaint_tile', args=[15, 0, 0]))
+        self.assertEqual(response.json(), {'z': 15, 'x': 0, 'y': 0, 'total': 0, 'bins': []})
+        self.assertFalse(tiles.tile_path(15, 0, 0).exists())
+
+    @override_settings(DATABASE_READ_REPLICAS=['replica1'])
+    def test_tiles_are_built_from_the_primary(self):
+        # 'replica1' is not a configured database, so a replica read would raise.
+        with mock.patch.object(connection, 'in_atomic_block', False):
+            data, path = self._tile(12)
+        self.assertEqual(data['total'], 2)
+        self.assertTrue(path.exists())
+
+    def test_geojson_bbox_and_filters(self):
+        url = reverse('complaints:complaints_geojson')
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'bbox': 'nan,1,2,3'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'bbox': '72.82,-inf,72.84,19.14'}).status_code, 400)
+        data = self.client.get(url, {'bbox': '72.82,19.13,72.84,19.14', 'status': 'open'}).json()
+        self.assertEqual([f['properties']['category'] for f in data['features']], ['road'])
+        data = self.client.get(url, {'bbox': '72.90,19.13,72.95,19.14'}).json()
+        self.assertEqual(data['features'], [])
+        self.assertEqual(self.client.get(reverse('complaints:complaint_tile', args=[16, 0, 0])).status_code, 404)
+
+
+# --- Full-text search ---
+
+
+class ComplaintSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='search', password='Test@123')
+        self.citizen = Citizen.objects.create(user=self.user, name='Search Citizen')
+        self.pothole = Complaint.objects.create(title='Potholes on Station Road', description='Cars are swerving',
+                                                location='Andheri West', region='west', citizen=self.citizen)
+        self.mention = Complaint.objects.create(title='Broken footpath', description='Next to a pothole',
+                                                region='west', citizen=self.citizen)
+        self.light = Complaint.objects.create(title='Streetlight out', description='Dark lane',
+                                              region='north', citizen=self.citizen)
+
+    def test_ranked_with_title_matches_first(self):
+        self.assertEqual(ranked_ids('pothole'), [self.pothole.id, self.mention.id])
+        self.assertEqual(ranked_ids('andheri pot'), [self.pothole.id])  # last word is a prefix
+        self.assertEqual(ranked_ids('"; DROP TABLE --'), [])
+
+    def test_filters_and_index_follow_updates(self):
+        self.assertEqual(ranked_ids('pothole', status='closed'), [])
+        self.assertEqual(ranked_ids('streetlight', region='west'), [])
+
+        Complaint.objects.filter(id=self.light.id).update(title='Pothole near streetlight')
+        self.assertEqual([c.id for c in search_complaints('pothole', region='north')], [self.light.id])
+        self.light.delete()
+        self.assertEqual(ranked_ids('streetlight'), [])
+
+
+# --- SLA escalation ---
+
+
+class SLAEscalationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='sla', password='Test@123')
+        self.citizen = Citizen.objects.create(user=self.user, name='SLA Citizen')
+        User.objects.create_superuser(username='boss', password='Test@123', email='boss@example.com')
+        # Migration defaults are 48h for `reported`; water in the north gets 12h.
+        SLATarget.objects.create(status='reported', category='water', region='north', max_hours=12)
+
+    def _complaint(self, hours_ago, category='road', region='north'):
+        complaint = Complaint.objects.create(title='Issue', description='x', category=category,
+                                             region=region, citizen=self.citizen)
+        Complaint.objects.filter(id=complaint.id).update(status_changed_at=timezone.now() - timedelta(hours=hours_ago))
+        return complaint
+
+    def test_specific_target_and_levels(self):
+        water = self._complaint(30, category='water')   # 2.5x its 12h target
+        road = self._complaint(30)                       # within the default 48h
+        old_road = self._complaint(100)                  # 2x the default
+
+        found = {c.id: level for c, level, _ in find_breaches()}
+        self.assertEqual(found, {water.id: 1, old_road.id: 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            escalate()
+        with self.captureOnCommitCallbacks(execute=True):
+            escalate()  # second run reaches level 2 for both, nothing more
+        self.assertEqual(escalate(), [])
+        self.assertEqual(Complaint.objects.get(id=water.id).escalation_level, 2)
+        self.assertEqual(Complaint.objects.get(id=road.id).escalation_level, 0)
+        self.assertEqual(SLABreach.objects.filter(complaint=old_road).count(), 2)
+
+    def test_status_change_resets_clock(self):
+        complaint = self._complaint(100)
+        escalate()
+        complaint = Complaint.objects.get(id=complaint.id)
+        self.assertEqual(complaint.escalation_level, 1)
+
+        complaint.status = 'assigned'
+        complaint.save()
+        complaint.refresh_from_db()
+        self.assertEqual(complaint.escalation_level, 0)
+        self.assertLess(timezone.now() - complaint.status_changed_at, timedelta(minutes=1))
+
+
+# --- Priority scores ---
+
+
+class PriorityScoreTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='prio', password='Test@123')
+        self.citizen = Citizen.objects.create(user=self.user, name='Prio Citizen')
+
+    def _complaint(self, category, **extra):
+        return Complaint.objects.create(title='Issue', description='x', category=category,
+                                        region='north', citizen=self.citizen, **extra)
+
+    def test_severity_duplicates_and_staleness(self):
+        litter = self._complaint('other')
+        pole = self._complaint('electricity')
+        road = self._complaint('road')
+        reported_twice = self._complaint('road')
+        self._complaint('road', duplicate_of=reported_twice)
+
+        self.assertEqual(refresh_priorities(), 5)
+        self.assertEqual(refresh_priorities(), 0)  # nothing stale any more
+        ranked = list(Complaint.objects.filter(duplicate_of__isnull=True).order_by('-priority').values_list('id', flat=True))
+        self.assertEqual(ranked, [pole.id, reported_twice.id, road.id, litter.id])
+
+        # A status change marks the score stale for the next pass.
+        litter.status = 'assigned'
+        litter.save()
+        self.assertIsNone(Complaint.objects.get(id=litter.id).priority_updated_at)
+
+
+# --- Anonymous page cache ---
+
+
+@override_settings(PAGE_CACHE_SECONDS=60, PAGE_CACHE_STALE_SECONDS=300)
+class AnonymousPageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_hits_run_no_queries(self):
+        first = self.client.get('/')
+        self.assertNotIn('X-Page-Cache', first)
+        with self.assertNumQueries(0):
+            second = self.client.get('/')
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        # Every visitor gets a working CSRF token of their own, never the placeholder.
+        self.assertNotContains(second, '__csrf_token__')
+        self.assertContains(second, 'name="csrfmiddlewaretoken"')
+
+    def test_logged_in_users_bypass_the_cache(self):
+        self.client.get('/about/')
+        User.objects.create_user(username='member', password='Test@123')
+        self.client.login(username='member', password='Test@123')
+        self.assertNotIn('X-Page-Cache', self.client.get('/about/'))
+
+    def test_stale_copy_is_served_while_one_request_refreshes(self):
+        self.client.get('/complaints/track/')
+        key = _cache_key(RequestFactory().get('/complaints/track/'))
+        cache.set(key, dict(cache.get(key), fresh_until=0), 300)
+        cache.add(f'{key}:refresh', 1)  # another request is already re-rendering
+        self.assertEqual(self.client.get('/complaints/track/')['X-Page-Cache'], 'stale')
+        cache.delete(f'{key}:refresh')
+        self.assertNotIn('X-Page-Cache', self.client.get('/complaints/track/'))
+
+    def test_refresh_lock_is_released_when_the_view_fails(self):
+        view = cache_anonymous_page(mock.Mock(side_effect=RuntimeError))
+        request = RequestFactory().get('/broken/')
+        key = _cache_key(request)
+        cache.set(key, {'content': 'old', 'content_type': 'text/html', 'fresh_until': 0}, 300)
+        with self.assertRaises(RuntimeError):
+            view(request)
+        self.assertIsNone(cache.get(f'{key}:refresh'))
+
+
+# --- Home-page sample pool ---
+
+
+class SamplePoolTest(TestCase):
+    def setUp(self):
+        cache.delete(POOL_KEY)
+        self.citizen = Citizen.objects.create(user=User.objects.create_user(username='sampler'), name='Sampler')
+        for i in range(5):
+            Complaint.objects.create(title=f'Issue {i}', description='x', category='road', region='north',
+                                     citizen=self.citizen)
+
+    def test_samples_come_from_the_cached_pool(self):
+        picked = sample_tokens(3)
+        self.assertEqual(len(picked), 3)
+        self.assertEqual(set(picked[0]), {'tracking_code', 'title'})
+        with self.assertNumQueries(0):
+            sample_tokens(3)
+
+    def test_new_complaint_refreshes_the_pool(self):
+        sample_tokens()
+        with self.captureOnCommitCallbacks(execute=True):
+            Complaint.objects.create(title='Fresh', description='x', category='road', region='north',
+                                     citizen=self.citizen)
+        self.assertIn('Fresh', [s['title'] for s in sample_tokens(10)])
+
+
+# --- Idempotent submission ---
+
+
+class IdempotentSubmissionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='retry', password='Test@123', email='retry@example.com')
+        self.citizen = Citizen.objects.create(user=self.user, name='Retry Citizen')
+        self.client.login(username='retry', password='Test@123')
+        self.url = reverse('complaints:submit_complaint')
+        self.data = {'title': 'Broken road', 'description': 'Potholes', 'category': 'road',
+                     'latitude': '12.971599', 'longitude': '77.594566',
+                     'idempotency_key': self.client.get(self.url).context['idempotency_key']}
+
+    def test_double_submit_returns_the_original(self):
+        with self.captureOnCommitCallbacks(execute=True) as first_callbacks:
+            first = self.client.post(self.url, self.data)
+        with self.captureOnCommitCallbacks(execute=True) as second_callbacks:
+            second = self.client.post(self.url, self.data)
+        self.assertEqual(Complaint.objects.count(), 1)
+        self.assertEqual(first['Location'], second['Location'])
+        self.assertTrue(first_callbacks)
+        self.assertFalse(second_callbacks)  # no second email or image job
+
+    def test_fresh_form_with_same_content_is_a_replay(self):
+        self.client.post(self.url, self.data)
+        self.client.post(self.url, dict(self.data, idempotency_key='', title='  broken ROAD '))
+        self.assertEqual(Complaint.objects.count(), 1)
+
+        # A different report from the same spot is not.
+        self.client.post(self.url, dict(self.data, idempotency_key='', title='Fallen tree'))
+        self.assertEqual(Complaint.objects.count(), 2)
+        self.assertEqual(SubmissionReceipt.objects.filter(complaint__isnull=False).count(), 2)
+
+
+class ReverseGeocodeTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='pin', password='Test@123')
+        self.citizen = Citizen.objects.create(user=self.user, name='Pin Citizen')
+        self.client.login(username='pin', password='Test@123')
+        geocode._reverse_rounded.cache_clear()
+
+    def test_nearest_pincode_and_region(self):
+        place = geocode.reverse(19.0600, 72.8300)  # a few hundred metres from Bandra West
+        self.assertEqual(place['pincode'], '400050')
+        self.assertEqual(place['region'], 'west')
+        self.assertIn('Bandra West', place['location'])
+
+    def test_lookups_are_memoised_and_out_of_area_is_none(self):
+        geocode.reverse(18.9400, 72.8356)
+        geocode.reverse(18.94001, 72.83561)  # same 4-decimal cell
+        self.assertEqual(geocode._reverse_rounded.cache_info().hits, 1)
+        self.assertIsNone(geocode.reverse(12.971599, 77.594566))  # Bengaluru
+
+    def test_endpoint_and_submit_use_the_gazetteer(self):
+        response = self.client.get(reverse('complaints:reverse_geocode'), {'latitude': 18.9400, 'longitude': 72.8356})
+        self.assertEqual(response.json()['pincode'], '400001')
+
+        # Whatever pincode the browser sends, a pin inside the area wins.
+        self.client.post(reverse('complaints:submit_complaint'), {
+            'title': 'Broken lamp', 'description': 'Dark street', 'category': 'electricity',
+            'latitude': '18.9400', 'longitude': '72.8356', 'pincode': '400097',
+        })
+        complaint = Complaint.objects.get()
+        self.assertEqual((complaint.pincode, complaint.region), ('400001', 'south'))
+
+    def test_non_finite_pins_are_rejected(self):
+        response = self.client.get(reverse('complaints:reverse_geocode'), {'latitude': 'nan', 'longitude': '72.8'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('complaints:reverse_geocode'), {'latitude': '19.0', 'longitude': 'inf'})
+        self.assertEqual(response.status_code, 400)
+
+        # The form turns them away on submit as well.
+        response = self.client.post(reverse('complaints:submit_complaint'), {
+            'title': 'Broken lamp', 'description': 'Dark street', 'category': 'electricity',
+            'latitude': 'nan', 'longitude': '72.8356', 'pincode': '400001',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Complaint.objects.exists())
+
+
+# --- Hot/cold archive ---
+
+
+@override_settings(ARCHIVE_AFTER_DAYS=90, PAGE_CACHE_SECONDS=0)
+class ArchiveTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='old', password='Test@123')
+        self.citizen = Citizen.objects.create(user=self.user, name='Old Citizen')
+        long_ago = timezone.now() - timedelta(days=200)
+
+        def make(title, **fields):
+            return Complaint.objects.create(title=title, description='x', region='north', citizen=self.citizen, **fields)
+
+        self.old = make('Old pothole', status='closed', closed_at=long_ago)
+        SLABreach.objects.create(complaint=self.old, status='assigned', level=1, target_hours=24, status_since=long_ago)
+        self.recent = make('Recent leak', status='closed', closed_at=timezone.now())
+        # Still linked from an open duplicate, so it has to wait.
+        self.linked = make('Linked lamp', status='closed', closed_at=long_ago)
+        make('Same lamp', duplicate_of=self.linked)
+
+    def test_old_closed_complaints_move_to_the_archive(self):
+        self.assertEqual(archive(cutoff(), batch_size=1), 1)
+        self.assertEqual(archive(cutoff()), 0)  # re-running is a no-op
+
+        archived = ArchivedComplaint.objects.get()
+        self.assertEqual((archived.id, archived.tracking_token, archived.tracking_code),
+                         (self.old.id, self.old.tracking_token, self.old.tracking_code))
+        self.assertEqual(archived.history['sla_breaches'][0]['level'], 1)
+        self.assertFalse(Complaint.objects.filter(id=self.old.id).exists())
+        self.assertTrue(Complaint.objects.filter(id=self.linked.id).exists())
+
+    def test_archived_complaints_stay_readable(self):
+        archive(cutoff())
+        self.client.login(username='old', password='Test@123')
+
+        self.assertContains(self.client.get(reverse('complaints:track_issue'), {'token': self.old.display_code}),
+                            'Old pothole')
+        closed_tab = self.client.get(reverse('users:citizen_dashboard'), {'status': 'closed'})
+        titles = [c.title for c in closed_tab.context['page_obj']]
+        self.assertEqual(titles[-1], 'Old pothole')  # archived rows follow the hot ones
+        self.assertEqual(len(titles), 3)
+        self.assertEqual(closed_tab.context['counts']['closed'], 3)
+        self.assertContains(self.client.get(reverse('complaints:my_complaints')), 'Old pothole')
+
+        detail = self.client.get(reverse('users:complaint_status_detail', args=[self.old.id]))
+        self.assertRedirects(detail, f"{reverse('complaints:track_issue')}?token={self.old.tracking_code}")
+
+
+# --- Short tracking codes ---
+
+
+@override_settings(TRACKING_FILTER_SECONDS=3600, PAGE_CACHE_SECONDS=0)
+class TrackingCodeTest(TestCase):
+    def setUp(self):
+        tracking_codes._filter = None
+        self.citizen = Citizen.objects.create(user=User.objects.create_user(username='coder'), name='Coder')
+        self.complaint = Complaint.objects.create(title='Broken bench', description='x', region='north',
+                                                  citizen=self.citizen)
+
+    def track(self, token):
+        return self.client.get(reverse('complaints:track_issue'), {'token': token})
+
+    def test_new_complaints_get_a_valid_code(self):
+        code = self.complaint.tracking_code
+        self.assertTrue(tracking_codes.is_valid(code))
+        self.assertEqual(self.complaint.display_code, f'{code[:5]}-{code[5:]}')
+        # Any single changed character breaks the check.
+        typo = code[:3] + ('0' if code[3] != '0' else '1') + code[4:]
+        self.assertFalse(tracking_codes.is_valid(typo))
+
+    def test_lookup_by_code_is_forgiving_about_case_and_dashes(self):
+        typed = self.complaint.display_code.lower().replace('0', 'o').replace('1', 'l')
+        self.assertContains(self.track(typed), 'Broken bench')
+        self.assertContains(self.track(str(self.complaint.tracking_token)), 'Broken bench')  # old UUID links
+
+    def test_bad_codes_never_reach_the_complaint_tables(self):
+        tracking_codes.might_be_issued(self.complaint.tracking_code)  # build the filter
+        data = 'ZZZZZZZZZ' if not self.complaint.tracking_code.startswith('ZZZZZZZZZ') else 'YYYYYYYYY'
+        unknown = data + tracking_codes.check_symbol(data)
+        with self.assertNumQueries(0):
+            with self.assertRaises(ValueError):
+                tracking_codes.lookup('not-a-code')
+        # A well-formed miss only costs the shared recent-codes lookup.
+        with CaptureQueriesContext(connection) as queries:
+            with self.assertRaises(ValueError):
+                tracking_codes.lookup(unknown)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('complaints_complaint', queries[0]['sql'])
+        self.assertNotContains(self.track(unknown), 'Broken bench')
+
+    def test_codes_issued_by_another_worker_are_found(self):
+        ramp = Complaint.objects.create(title='Broken ramp', description='x', region='north', citizen=self.citizen)
+        # Stands in for another worker's filter, built just before the ramp was reported.
+        tracking_codes._filter = tracking_codes.BloomFilter(1024)
+        self.assertEqual(tracking_codes.lookup(ramp.tracking_code), {'tracking_code': ramp.tracking_code})
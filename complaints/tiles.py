@@ -0,0 +1,156 @@
+# complaints/tiles.py
+"""
+Aggregated map tiles for the public complaints heatmap.
+
+Every complaint stores the slippy-map tile it falls in at BASE_ZOOM
+(tile_x / tile_y, filled in Complaint.save()). A z/x/y tile for any zoom up to
+MAX_ZOOM is then an indexed range query on those two columns; the rows are
+binned into an 8 x 8 grid (BIN_BITS) with NumPy and the counts are written to a JSON
+file under TILE_CACHE_ROOT. Later requests are served straight from disk.
+Tiles without complaints are answered with an empty tile and never stored.
+Only the hot Complaint table is mapped; archived complaints (archive.py) drop off.
+
+When a complaint changes, only the tiles containing its old and new position
+are deleted (one per zoom level), after the transaction commits.
+"""
+import json
+import math
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+BASE_ZOOM = 18       # stored tile resolution (~150m at the equator).
+MAX_ZOOM = 15        # highest zoom the tile endpoint serves.
+BIN_BITS = 3         # each tile is split into 8 x 8 bins.
+
+CATEGORIES = ['water', 'road', 'electricity', 'sanitation', 'other']
+
+
+def cache_root():
+    return Path(settings.TILE_CACHE_ROOT)
+
+
+def tile_for(lat, lng, zoom=BASE_ZOOM):
+    """(x, y) of the Web Mercator tile containing the point."""
+    lat = max(min(lat, 85.0511), -85.0511)
+    n = 1 << zoom
+    x = int((lng + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= MAX_ZOOM and 0 <= x < (1 << z) and 0 <= y < (1 << z)
+
+
+def tile_path(z, x, y):
+    return cache_root() / str(z) / str(x) / f"{y}.json"
+
+
+def _base_range(z, x, y):
+    shift = BASE_ZOOM - z
+    return (x << shift, (x + 1) << shift), (y << shift, (y + 1) << shift)
+
+
+def empty_tile(z, x, y):
+    return {'z': z, 'x': x, 'y': y, 'total': 0, 'bins': []}
+
+
+def build_tile(z, x, y):
+    """Aggregate the complaints inside one tile into a dict of bins."""
+    from complaints.models import Complaint
+
+    (x0, x1), (y0, y1) = _base_range(z, x, y)
+    # Always from the primary: the tile is written to disk, and one built from a
+    # lagging replica would stay stale until the next change in it.
+    rows = list(Complaint.objects.using('default').filter(
+        tile_x__gte=x0, tile_x__lt=x1, tile_y__gte=y0, tile_y__lt=y1,
+    ).values_list('tile_x', 'tile_y', 'latitude', 'longitude', 'status', 'category'))
+
+    bins = []
+    if rows:
+        tx, ty, lat, lng, status, category = zip(*rows)
+        side_bits = min(BIN_BITS, BASE_ZOOM - z)
+        bin_shift = BASE_ZOOM - z - side_bits
+        cell_x = (np.asarray(tx, dtype=np.int64) - x0) >> bin_shift
+        cell_y = (np.asarray(ty, dtype=np.int64) - y0) >> bin_shift
+        keys, inverse = np.unique((cell_y << side_bits) + cell_x, return_inverse=True)
+        inverse = inverse.ravel()
+
+        counts = np.bincount(inverse)
+        mean_lat = np.bincount(inverse, weights=np.asarray(lat, dtype=np.float64)) / counts
+        mean_lng = np.bincount(inverse, weights=np.asarray(lng, dtype=np.float64)) / counts
+        is_closed = np.asarray(status) == 'closed'
+        closed = np.bincount(inverse, weights=is_closed).astype(np.int64)
+        category = np.asarray(category)
+        # Category -> (open, closed) counts per bin, so the map can filter on both.
+        per_category = {}
+        for name in CATEGORIES:
+            in_category = category == name
+            per_category[name] = (
+                np.bincount(inverse, weights=in_category & ~is_closed, minlength=len(keys)).astype(np.int64),
+                np.bincount(inverse, weights=in_category & is_closed, minlength=len(keys)).astype(np.int64),
+            )
+
+        for i in range(len(keys)):
+            bins.append({
+                'lat': round(float(mean_lat[i]), 6),
+                'lng': round(float(mean_lng[i]), 6),
+                'count': int(counts[i]),
+                'open': int(counts[i] - closed[i]),
+                'closed': int(closed[i]),
+                'categories': {
+                    name: [int(o[i]), int(c[i])] for name, (o, c) in per_category.items() if o[i] or c[i]
+                },
+            })
+
+    return dict(empty_tile(z, x, y), total=len(rows), bins=bins)
+
+
+def get_tile_path(z, x, y):
+    """
+    Path of the cached tile file, building it first if needed; None for a tile
+    with no complaints. Empty tiles are never written: the endpoint is public,
+    and caching every tile anyone asks for would let them fill the disk.
+    """
+    path = tile_path(z, x, y)
+    if not path.exists():
+        tile = build_tile(z, x, y)
+        if not tile['total']:
+            return None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(tile, separators=(',', ':')).encode()
+        # Write to a temp file and rename, so readers never see half a tile.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as out:
+            out.write(data)
+        os.replace(tmp, path)
+    return path
+
+
+def tiles_containing(tile_x, tile_y):
+    """Every cached tile (z, x, y) that covers a BASE_ZOOM tile."""
+    return [(z, tile_x >> (BASE_ZOOM - z), tile_y >> (BASE_ZOOM - z)) for z in range(MAX_ZOOM + 1)]
+
+
+def _delete_tiles(base_tiles):
+    stale = set()
+    for tile_x, tile_y in base_tiles:
+        stale.update(tiles_containing(tile_x, tile_y))
+    for z, x, y in stale:
+        tile_path(z, x, y).unlink(missing_ok=True)
+
+
+def invalidate(base_tiles):
+    """Drop cached tiles covering the given (tile_x, tile_y) pairs once the transaction commits."""
+    base_tiles = {t for t in base_tiles if t[0] is not None and t[1] is not None}
+    if base_tiles:
+        transaction.on_commit(lambda: _delete_tiles(base_tiles))
+
+
+def invalidate_complaints(complaints):
+    invalidate((c.tile_x, c.tile_y) for c in complaints)
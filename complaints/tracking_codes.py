@@ -0,0 +1,158 @@
+# complaints/tracking_codes.py
+"""
+Short tracking codes: "7KQ2M-X9C4D" instead of a 36-character UUID.
+
+A code is 9 random Crockford base32 characters (45 bits) plus one check
+character (Luhn mod 32), stored upper-case without the dash in a unique
+column. Crockford's alphabet has no I, L, O or U, and normalize() maps the
+look-alikes (o -> 0, i/l -> 1) and drops spaces and dashes, so codes read
+over the phone still match. The check character catches every single-symbol
+typo and most swapped neighbours.
+
+Lookups are screened before they reach the database:
+
+1. lookup() rejects anything that is not a well-formed code (or legacy UUID);
+2. might_be_issued() asks an in-memory bloom filter of every issued code
+   (~10 bits per code, 1% false positives) and rejects codes it has never seen.
+
+The filter is built per process from one values_list() scan. Codes created in
+this process are added at once, and every new code is also noted for
+TRACKING_FILTER_SECONDS in the 'ratelimit' cache, so other workers accept it
+before their next rebuild. A miss on a filter older than
+TRACKING_FILTER_SECONDS triggers one rebuild before the code is rejected.
+
+So only malformed input is turned away with no I/O. A well-formed code the
+filter has not seen costs one read of the 'ratelimit' cache, which with the
+default DatabaseCache is a primary-key SELECT on the ratelimit_cache table
+(never the complaint tables).
+"""
+import hashlib
+import math
+import secrets
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+DATA_LENGTH = 9
+CODE_LENGTH = DATA_LENGTH + 1
+_VALUES = {symbol: value for value, symbol in enumerate(ALPHABET)}
+_LOOKALIKES = str.maketrans({'O': '0', 'I': '1', 'L': '1', '-': None, ' ': None})
+RECENT_KEY = 'tracking_code:{}'
+
+
+def check_symbol(data):
+    """Luhn mod 32 check character for `data`."""
+    total, factor = 0, 2
+    for symbol in reversed(data):
+        addend = factor * _VALUES[symbol]
+        total += addend // 32 + addend % 32
+        factor = 1 if factor == 2 else 2
+    return ALPHABET[(32 - total % 32) % 32]
+
+
+def generate():
+    data = ''.join(secrets.choice(ALPHABET) for _ in range(DATA_LENGTH))
+    return data + check_symbol(data)
+
+
+def normalize(text):
+    return (text or '').upper().translate(_LOOKALIKES)
+
+
+def is_valid(code):
+    return (len(code) == CODE_LENGTH and all(symbol in _VALUES for symbol in code)
+            and check_symbol(code[:-1]) == code[-1])
+
+
+def format_code(code):
+    """'7KQ2MX9C4D' -> '7KQ2M-X9C4D' for display."""
+    return f"{code[:5]}-{code[5:]}" if code else ''
+
+
+def new_code():
+    """A fresh code that no complaint, hot or archived, has yet."""
+    from complaints.models import ArchivedComplaint, Complaint
+    while True:
+        code = generate()
+        if not (Complaint.objects.filter(tracking_code=code).exists()
+                or ArchivedComplaint.objects.filter(tracking_code=code).exists()):
+            return code
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings, sized for `capacity` items at `error_rate`."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1024)
+        self.size = int(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+_filter = None
+_built_at = 0.0
+
+
+def _build():
+    global _filter, _built_at
+    from complaints.models import ArchivedComplaint, Complaint
+    codes = []
+    for model in (Complaint, ArchivedComplaint):
+        codes += model.objects.exclude(tracking_code=None).values_list('tracking_code', flat=True).iterator(chunk_size=5000)
+    # Room to grow until the next rebuild without the error rate creeping up.
+    bloom = BloomFilter(len(codes) * 2)
+    for code in codes:
+        bloom.add(code)
+    _filter, _built_at = bloom, time.monotonic()
+    return bloom
+
+
+def remember(code):
+    """Note a newly issued code (called from signals.py)."""
+    if _filter is not None:
+        _filter.add(code)
+    # Not the default cache: that's per-process LocMem unless configured otherwise.
+    caches['ratelimit'].set(RECENT_KEY.format(code), 1, settings.TRACKING_FILTER_SECONDS)
+
+
+def might_be_issued(code):
+    """False only for codes that were certainly never issued."""
+    bloom = _build() if _filter is None else _filter
+    if code in bloom or caches['ratelimit'].get(RECENT_KEY.format(code)):
+        return True
+    if time.monotonic() - _built_at > settings.TRACKING_FILTER_SECONDS:
+        return code in _build()  # maybe issued by another worker since the last build
+    return False
+
+
+def lookup(text):
+    """
+    Queryset filter for a typed tracking ID: {'tracking_code': ...} or, for the
+    old UUID tokens, {'tracking_token': ...}. Raises ValueError for anything that
+    cannot be a real complaint without querying the complaint tables (an unknown
+    well-formed code still costs one 'ratelimit' cache read, see above).
+    """
+    text = (text or '').strip()
+    if len(text) == 36:
+        return {'tracking_token': uuid.UUID(text)}
+    code = normalize(text)
+    if not is_valid(code):
+        raise ValueError("Malformed tracking code.")
+    if not might_be_issued(code):
+        raise ValueError("Unknown tracking code.")
+    return {'tracking_code': code}
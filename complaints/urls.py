@@ -10,4 +10,10 @@ urlpatterns = [
     path('submitted/', TemplateView.as_view(
         template_name='complaints/submitted.html'), name='submit_success'),
     path("track/", views.track_issue, name="track_issue"),
+    path("check-duplicates/", views.check_duplicates, name="check_duplicates"),
+    path("geocode/reverse/", views.reverse_geocode, name="reverse_geocode"),
+    path("events/", views.live_events, name="live_events"),
+    path("map/", views.heatmap, name="heatmap"),
+    path("map/complaints.geojson", views.complaints_geojson, name="complaints_geojson"),
+    path("map/tiles/<int:z>/<int:x>/<int:y>.json", views.complaint_tile, name="complaint_tile"),
 ]
@@ -1,9 +1,29 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.db import transaction
+import asyncio
+import json
+import math
+import time
 from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET
 
-from complaints.emails import send_alert
+from complaints.clustering import assign_incident
+from complaints.dedup import find_duplicates
+from complaints.idempotency import claim, find_original, fingerprint, form_key_from, new_form_key
+from notifications.outbox import notify_template
+from complaints.images import queue_image
+from complaints.priority import refresh_priorities
+from complaints import archive, events, geocode, tiles
 from complaints.models import Complaint
+from urbanwatch.db_router import read_from_replica
+from urbanwatch.page_cache import cache_anonymous_page
+from urbanwatch.ratelimit import rate_limit
 from .forms import ComplaintForm
 from django.contrib import messages
 from users.models import Citizen
@@ -12,6 +32,7 @@ from .utils import get_region_from_pincode # This will help us auto-fill the reg
 
 
 @login_required #a decorator to ensure only logged-in users can access
+@rate_limit('submit', 'RATELIMIT_SUBMIT_RATE', key='user', methods=('POST',)) #uploads are expensive; see urbanwatch/ratelimit.py
 def submit_complaint(request): #this form allows citizens to submit complaints
     """View to handle complaint submission by citizens."""
     """print("🔥 VIEW CALLED!")  # Add this debug line
@@ -27,74 +48,123 @@ def submit_complaint(request): #this form allows citizens to submit complaints
     if request.method == 'POST': #this checks if the form is submitted
         form = ComplaintForm(request.POST, request.FILES) #bind form with POST data and files
         if form.is_valid():     #validate the form data
-            complaint = form.save(commit=False) #create complaint object but don't save to DB yet
-            complaint.citizen = citizen #associate complaint with the logged-in citizen
-
-            # GRAB DATA FROM HIDDEN INPUTS
-            complaint.latitude = float(request.POST.get('latitude')) if request.POST.get('latitude') else None
-            complaint.longitude = float(request.POST.get('longitude')) if request.POST.get('longitude') else None
-
-            complaint.pincode = request.POST.get('pincode') # Capture pincode from hidden input (if provided)
-            complaint.location = request.POST.get('location') # This captures the full address
-
-            # Auto-fill region based on pincode if provided
-            pincode = request.POST.get('pincode') # We will send this from the frontend
-            if pincode: # If pincode is provided, use it to determine the region
-                complaint.pincode = pincode
-                # Use the utility function to get region from pincode and convert to lowercase
-                complaint.region = get_region_from_pincode(pincode).lower() 
-            else:
-                complaint.region = 'central' #default region if no pincode
+            # A double-click or retry of the same submission gets the original complaint back.
+            form_key = form_key_from(request)
+            digest = fingerprint(citizen, form.cleaned_data.get('title'),
+                                 float(request.POST.get('latitude')) if request.POST.get('latitude') else None,
+                                 float(request.POST.get('longitude')) if request.POST.get('longitude') else None,
+                                 form.cleaned_data.get('proof_image'))
+            original = find_original(citizen, form_key, digest)
+            if original:
+                messages.info(request, f'This complaint was already submitted. Your Tracking ID is: {original.display_code}')
+                return redirect(f"{reverse('complaints:submit_success')}?token={original.display_code}")
+
+            with transaction.atomic():
+                receipt = claim(citizen, form_key, digest)
+                if receipt is None: # the same form is being saved by a parallel request right now.
+                    original = find_original(citizen, form_key, digest)
+                    messages.info(request, 'This complaint was already submitted.')
+                    if original:
+                        return redirect(f"{reverse('complaints:submit_success')}?token={original.display_code}")
+                    return redirect('complaints:my_complaints')
+
+                complaint = form.save(commit=False) #create complaint object but don't save to DB yet
+                complaint.citizen = citizen #associate complaint with the logged-in citizen
+
+                # GRAB DATA FROM HIDDEN INPUTS
+                complaint.latitude = float(request.POST.get('latitude')) if request.POST.get('latitude') else None
+                complaint.longitude = float(request.POST.get('longitude')) if request.POST.get('longitude') else None
+                if not (math.isfinite(complaint.latitude or 0) and math.isfinite(complaint.longitude or 0)):
+                    complaint.latitude = complaint.longitude = None # nan/inf is not a pin
+
+                complaint.pincode = request.POST.get('pincode') # Capture pincode from hidden input (if provided)
+                complaint.location = request.POST.get('location') # This captures the full address
+
+                # Pincode and region come from our own gazetteer when there is a pin, not from the browser.
+                place = geocode.reverse(complaint.latitude, complaint.longitude)
+                pincode = request.POST.get('pincode') # We will send this from the frontend
+                if place:
+                    complaint.pincode = place['pincode']
+                    complaint.region = place['region']
+                    complaint.location = complaint.location or place['location']
+                elif pincode: # Otherwise auto-fill region based on the pincode if provided
+                    complaint.pincode = pincode
+                    # Use the utility function to get region from pincode and convert to lowercase
+                    complaint.region = get_region_from_pincode(pincode).lower() 
+                else:
+                    complaint.region = 'central' #default region if no pincode
+
+                complaint.status = 'reported'   #set initial status.
+
+                # Link to an existing report if the citizen picked one from the duplicate check.
+                # The choice is re-validated so only nearby open reports can be linked.
+                duplicate_id = request.POST.get('duplicate_of')
+                if duplicate_id:
+                    matches = find_duplicates(complaint.category, complaint.latitude, complaint.longitude,
+                                              complaint.title, complaint.description)
+                    for match in matches:
+                        if str(match['complaint'].id) == duplicate_id:
+                            complaint.duplicate_of = match['complaint']
+                            break
+
+                # Don't upload inside the request: stage the photo locally and let
+                # the background pipeline resize it and push it to storage.
+                proof_upload = form.cleaned_data.get('proof_image')
+                complaint.proof_image = None
+                complaint.save() #save complaint to DB.
+                receipt.complaint = complaint
+                receipt.save(update_fields=['complaint'])
+                if proof_upload:
+                    queue_image(complaint, 'proof_image', proof_upload)
+                assign_incident(complaint) # group with nearby reports of the same kind.
+                # Score it now (and the report it duplicates, which just gained weight).
+                refresh_priorities([complaint.id, complaint.duplicate_of_id])
 
-            complaint.status = 'reported'   #set initial status.
-            complaint.save() #save complaint to DB.
-           
 
             # --- 📧 NEW: SEND EMAIL TO CITIZEN ---
             # --- 📧 DEBUG EMAIL BLOCK ---
             print(f"--- ATTEMPTING EMAIL ---")
             print(f"User Email: '{request.user.email}'") # Check if this is empty!
-            
+        
             if request.user.email:
-                subject = "Complaint Received"
-                message = f"""
-                Hello {request.user.first_name},
-
-                We have successfully received your complaint.
-                Tracking ID: {complaint.tracking_token}
-                
-                - UrbanWatch+ Team
-                """
-                
                 try:
                     # CALLING SEND_ALERT
-                    print("Calling send_alert function...")
-                    send_alert(subject, message, [request.user.email])
-                    print("send_alert called successfully.")
+                    print("Calling notify...")
+                    notify_template('complaint_received', {'name': request.user.first_name, 'complaint': complaint},
+                                    [request.user.email])
+                    print("notify called successfully.")
                 except Exception as e:
                     print(f"CRITICAL ERROR CALLING EMAIL: {e}")
             else:
                 print("❌ SKIPPING EMAIL: User has no email address in database.")
 
             # Inside submit_complaint view, after complaint.save()
-            messages.success(request, f'Complaint Submitted! Your Tracking ID is: {complaint.tracking_token}')
+            if complaint.duplicate_of:
+                messages.info(request, f'Your report was linked to an existing complaint: "{complaint.duplicate_of.title}".')
+            messages.success(request, f'Complaint Submitted! Your Tracking ID is: {complaint.display_code}')
             print("✅ Form is valid! Redirecting...")
-            return redirect(f"{reverse('complaints:submit_success')}?token={complaint.tracking_token}")  #redirect to citizen's complaints page
+            return redirect(f"{reverse('complaints:submit_success')}?token={complaint.display_code}")  #redirect to citizen's complaints page
         else:
             print("❌ Form Errors:", form.errors) # This will print to your terminal/console
             messages.error(request, 'Please correct the errors below.')
     else:
         form = ComplaintForm() #initialize an empty form for GET request
     
-    return render(request, 'complaints/submit_complaint.html', {'form': form, 'citizen': citizen})
+    return render(request, 'complaints/submit_complaint.html', {
+        'form': form,
+        'citizen': citizen,
+        # Re-rendering after errors keeps the key, so a retry is still recognised.
+        'idempotency_key': form_key_from(request) or new_form_key(),
+    })
 
 
 @login_required
+@read_from_replica
 def my_complaints(request): 
     """View for the citizen to see their submitted complaints."""
     try:
         citizen = Citizen.objects.get(user=request.user)
-        complaints = citizen.complaints.all() #fetch complaints related to this citizen
+        complaints = archive.History(citizen.complaints.all(), archive.archived_for(citizen=citizen)) #fetch complaints related to this citizen, archived ones last
     except Citizen.DoesNotExist:
         complaints = []  # Fixed: initialize empty list
         messages.error(request, "Citizen profile not found.")
@@ -105,16 +175,20 @@ def my_complaints(request):
 
     return render(request, 'complaints/my_complaints.html', context)
 
-def track_issue(request):
-    """Public view to track a complaint using a UUID token."""
+@cache_anonymous_page
+@rate_limit('track', 'RATELIMIT_TRACK_RATE') #cache hits are served before this; misses count
+async def track_issue(request):
+    """Public view to track a complaint by tracking code or legacy UUID token (async, see urbanwatch/asgi.py)."""
     token = request.GET.get('token', '').strip()
     complaint = None
     timeline = []
 
     if token:
         try:
-            # Search for the complaint using the UUID
-            complaint = Complaint.objects.get(tracking_token=token)
+            # Search for the complaint using the UUID. The template shows the officer and
+            # contractor, so they are joined here: lazy loads can't run in an async view.
+            # Closed long ago? Then it lives in the archive (complaints/archive.py).
+            complaint = await archive.afind_by_token(token)
             
             # Build the timeline (Same logic as dashboard)
             timeline = [
@@ -127,8 +201,194 @@ def track_issue(request):
         except (Complaint.DoesNotExist, ValueError):
             messages.error(request, "Invalid Tracking ID. Please check and try again.")
 
-    return render(request, 'complaints/track_issue.html', {
+    # Rendering runs the auth/messages context processors, which are sync.
+    return await sync_to_async(render)(request, 'complaints/track_issue.html', {
         'complaint': complaint,
         'token': token,
         'timeline': timeline
-    })
\ No newline at end of file
+    })
+
+
+@login_required
+@require_GET
+def check_duplicates(request):
+    """JSON: open complaints near the pin that look like the one being submitted."""
+    try:
+        latitude = float(request.GET.get('latitude', ''))
+        longitude = float(request.GET.get('longitude', ''))
+    except ValueError:
+        return JsonResponse({'duplicates': []})
+    if not (math.isfinite(latitude) and math.isfinite(longitude)):
+        return JsonResponse({'duplicates': []})
+
+    matches = find_duplicates(
+        request.GET.get('category', 'other'), latitude, longitude,
+        request.GET.get('title', ''), request.GET.get('description', ''),
+    )
+    return JsonResponse({'duplicates': [
+        {
+            'id': m['complaint'].id,
+            'title': m['complaint'].title,
+            'location': m['complaint'].location or '',
+            'status': m['complaint'].get_status_display(),
+            'created_at': m['complaint'].created_at.strftime('%b %d, %Y'),
+            'distance': m['distance'],
+            'similarity': round(m['similarity'], 2),
+        }
+        for m in matches
+    ]})
+
+
+@login_required
+@require_GET
+def live_events(request):
+    """
+    Server-Sent Events feed of complaint changes for the officer/contractor dashboards.
+
+    Under ASGI this is a long-lived stream; under WSGI each request answers one
+    poll and the browser reconnects.
+    """
+    audience = events.audience(request.user)
+    if audience is None:
+        return HttpResponseForbidden("No live dashboard for this account.")
+
+    def to_int(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    # EventSource resends the last id it saw on reconnect; the first connect uses the page's cursor.
+    # ?after= stays in the URL on every reconnect, and nothing before it is ever re-read: the page has it.
+    floor = to_int(request.GET.get('after'))
+    cursor = to_int(request.headers.get('Last-Event-ID'))
+    if cursor is None:
+        cursor = floor if floor is not None else events.latest_id()
+    if floor is None:
+        floor = cursor
+    sent = set()
+
+    def fresh(batch, cursor):
+        """Drop what this response already sent (the look-back re-reads it); returns (batch, cursor)."""
+        batch = [event for event in batch if event['id'] not in sent]
+        sent.update(event['id'] for event in batch)
+        return batch, max([cursor] + [event['id'] for event in batch])
+
+    def frames(batch, cursor):
+        # Every frame carries the highest id so far, so a late, lower id never moves Last-Event-ID back.
+        if not batch:
+            return [f"id: {cursor}\n: keep-alive\n\n"]
+        return [f"id: {cursor}\nevent: {event['kind']}\ndata: {json.dumps(event)}\n\n" for event in batch]
+
+    if not isinstance(request, ASGIRequest):
+        # A sync worker must not be held for a whole stream: send one poll's worth and close.
+        # EventSource reconnects after `retry` ms, so under WSGI this is plain short polling.
+        batch, cursor = fresh(events.since(audience, cursor, floor=floor), cursor)
+        response = HttpResponse(f"retry: {settings.EVENT_STREAM_RETRY_MS}\n\n" + ''.join(frames(batch, cursor)),
+                                content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    async def astream(cursor):
+        # Under ASGI the stream waits on the event loop instead of holding a thread.
+        yield f"retry: {settings.EVENT_STREAM_RETRY_MS}\n\n"
+        deadline = time.monotonic() + settings.EVENT_STREAM_SECONDS
+        while True:
+            batch, cursor = fresh(await events.asince(audience, cursor, floor=floor), cursor)
+            for frame in frames(batch, cursor):
+                yield frame
+            if time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(settings.EVENT_POLL_SECONDS)
+
+    response = StreamingHttpResponse(astream(cursor), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx hold the events back
+    return response
+
+
+@login_required
+@require_GET
+def reverse_geocode(request):
+    """JSON: pincode, locality and region for a map pin (complaints/geocode.py)."""
+    try:
+        latitude = float(request.GET.get('latitude', ''))
+        longitude = float(request.GET.get('longitude', ''))
+        if not (math.isfinite(latitude) and math.isfinite(longitude)):
+            raise ValueError
+    except ValueError:
+        return JsonResponse({'found': False}, status=400)
+
+    place = geocode.reverse(latitude, longitude)
+    if place is None:
+        return JsonResponse({'found': False})
+    return JsonResponse({'found': True, **place})
+
+
+def heatmap(request):
+    """Public map of open and closed complaints, drawn from the tile endpoint."""
+    return render(request, 'complaints/heatmap.html', {
+        'categories': Complaint.CATEGORY_CHOICES,
+        'max_zoom': tiles.MAX_ZOOM,
+    })
+
+
+@require_GET
+@cache_control(public=True, max_age=60)
+@read_from_replica
+def complaint_tile(request, z, x, y):
+    """Aggregated complaint counts for one z/x/y map tile, served from the disk cache."""
+    if not tiles.is_valid_tile(z, x, y):
+        raise Http404("Tile out of range.")
+    path = tiles.get_tile_path(z, x, y)
+    if path is None:
+        return JsonResponse(tiles.empty_tile(z, x, y))
+    return FileResponse(open(path, 'rb'), content_type='application/json')
+
+
+@require_GET
+@cache_control(public=True, max_age=60)
+@read_from_replica
+def complaints_geojson(request):
+    """
+    GeoJSON points for the public map: ?bbox=west,south,east,north is required,
+    with optional ?category= and ?status=open|closed filters.
+    """
+    try:
+        west, south, east, north = (float(v) for v in request.GET.get('bbox', '').split(','))
+        if not all(math.isfinite(v) for v in (west, south, east, north)):
+            raise ValueError
+    except ValueError:
+        return JsonResponse({'error': 'bbox=west,south,east,north is required.'}, status=400)
+
+    # The bbox is turned into a range on the indexed tile columns (tile y grows southwards).
+    x0, y0 = tiles.tile_for(north, west)
+    x1, y1 = tiles.tile_for(south, east)
+    qs = Complaint.objects.filter(
+        tile_x__gte=x0, tile_x__lte=x1, tile_y__gte=y0, tile_y__lte=y1,
+        latitude__range=(south, north), longitude__range=(west, east),
+    )
+    category = request.GET.get('category')
+    if category:
+        qs = qs.filter(category=category)
+    status = request.GET.get('status')
+    if status == 'closed':
+        qs = qs.filter(status='closed')
+    elif status == 'open':
+        qs = qs.exclude(status='closed')
+
+    limit = settings.MAP_FEATURE_LIMIT
+    rows = list(qs.values_list('id', 'latitude', 'longitude', 'category', 'status', 'created_at')[:limit + 1])
+    return JsonResponse({
+        'type': 'FeatureCollection',
+        'truncated': len(rows) > limit,
+        'features': [
+            {
+                'type': 'Feature',
+                'id': pk,
+                'geometry': {'type': 'Point', 'coordinates': [round(lng, 6), round(lat, 6)]},
+                'properties': {'category': category, 'status': status, 'created_at': created_at.date().isoformat()},
+            }
+            for pk, lat, lng, category, status, created_at in rows[:limit]
+        ],
+    })
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contractors', '0003_contractor_profile_pic'),
+        ('officers', '0002_officer_profile_pic'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contractor',
+            index=models.Index(fields=['status', '-created_at'], name='contractor_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:21
+
+import django.core.validators
+from django.db import migrations, models
+
+STATUS_RANK = {'approved': 0, 'pending': 1, 'rejected': 2}
+
+
+# Frozen copies of contractors.models.normalize_phone / normalize_license.
+def normalize_phone(phone):
+    digits = ''.join(ch for ch in (phone or '') if ch.isdigit())
+    if len(digits) > 10 and digits.startswith(('91', '0')):
+        digits = digits[-10:]
+    return digits or None
+
+
+def normalize_license(license_number):
+    return ''.join((license_number or '').split()).upper() or None
+
+
+def normalize_and_dedupe(apps, schema_editor):
+    """
+    Rewrite phone and license numbers in their canonical form, then clear the
+    value on every duplicate except the one worth keeping (approved first, then
+    pending, then the oldest application), so 0006 can add the unique indexes.
+    Every cleared value is printed with the migration output so it can be
+    followed up by hand.
+    """
+    Contractor = apps.get_model('contractors', 'Contractor')
+    rows = list(Contractor.objects.only('id', 'phone', 'license_number', 'status', 'created_at'))
+    rows.sort(key=lambda c: (STATUS_RANK.get(c.status, 3), c.created_at, c.id))
+    seen = {'phone': {}, 'license_number': {}}  # value -> id of the contractor keeping it
+    changed, cleared = [], []
+    for contractor in rows:
+        before = (contractor.phone, contractor.license_number)
+        contractor.phone = normalize_phone(contractor.phone)
+        contractor.license_number = normalize_license(contractor.license_number)
+        for field, values in seen.items():
+            value = getattr(contractor, field)
+            if value in values:
+                setattr(contractor, field, None)
+                cleared.append(f"  Cleared duplicate {field} {value!r} on contractor #{contractor.id} "
+                               f"(kept by #{values[value]})")
+            elif value is not None:
+                values[value] = contractor.id
+        if (contractor.phone, contractor.license_number) != before:
+            changed.append(contractor)
+    Contractor.objects.bulk_update(changed, ['phone', 'license_number'], batch_size=500)
+    if cleared:
+        print()
+        print('\n'.join(cleared))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contractors', '0004_approval_queue_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contractor',
+            name='license_number',
+            field=models.CharField(help_text='License number (required, must be unique)', max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='contractor',
+            name='phone',
+            field=models.CharField(help_text='10-digit phone number (required)', max_length=20, null=True, validators=[django.core.validators.RegexValidator(code='invalid_phone', message='Phone number must be 10 digits', regex='^[0-9]{10}$')]),
+        ),
+        migrations.RunPython(normalize_and_dedupe, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:21
+
+# Separate from 0005 so the index is built after its data changes are committed
+# (PostgreSQL will not ALTER a table with pending trigger events).
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contractors', '0005_normalize_contractor_contacts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contractor',
+            name='license_number',
+            field=models.CharField(help_text='License number (required, must be unique)', max_length=100, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='contractor',
+            name='phone',
+            field=models.CharField(help_text='10-digit phone number (required)', max_length=20, null=True, unique=True, validators=[django.core.validators.RegexValidator(code='invalid_phone', message='Phone number must be 10 digits', regex='^[0-9]{10}$')]),
+        ),
+    ]
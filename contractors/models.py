@@ -3,6 +3,20 @@ from django.contrib.auth.models import User
 from django.core.validators import RegexValidator, EmailValidator  
 from django.core.exceptions import ValidationError
 
+
+def normalize_phone(phone):
+    """'+91 98765-43210' -> '9876543210'; blank -> None so the unique index skips it."""
+    digits = ''.join(ch for ch in (phone or '') if ch.isdigit())
+    if len(digits) > 10 and digits.startswith(('91', '0')):
+        digits = digits[-10:]
+    return digits or None
+
+
+def normalize_license(license_number):
+    """' mh-12 3456 ' -> 'MH-123456'; blank -> None."""
+    return ''.join((license_number or '').split()).upper() or None
+
+
 class Contractor(models.Model):
 
     REGION_CHOICES = (
@@ -36,7 +50,7 @@ class Contractor(models.Model):
     
     profile_pic = models.ImageField(upload_to='contractor_logos/', blank=True, null=True)
     
-    phone = models.CharField(max_length=20,
+    phone = models.CharField(max_length=20, unique=True, null=True,
                 validators=[RegexValidator(regex = r'^[0-9]{10}$',
                 message="Phone number must be 10 digits",code='invalid_phone',)]
                 , help_text="10-digit phone number (required)")
@@ -58,7 +72,8 @@ class Contractor(models.Model):
     
     license_number = models.CharField(
         max_length=100,
-        #unique=True,
+        unique=True,
+        null=True,
         help_text="License number (required, must be unique)"
     )
 
@@ -94,6 +109,16 @@ class Contractor(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Officers' approval queue: pending applications, newest first.
+            models.Index(fields=['status', '-created_at'], name='contractor_queue_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Store the canonical form so the unique indexes catch "+91 98765 43210" vs "9876543210".
+        self.phone = normalize_phone(self.phone)
+        self.license_number = normalize_license(self.license_number)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.name} ({self.company_name}) - {self.get_status_display()}"
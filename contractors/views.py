@@ -6,11 +6,14 @@ from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q
 
-from complaints.emails import send_alert
+from notifications.outbox import notify_template
+from complaints import archive, events
+from complaints.images import queue_image
 from officers.models import Officer
 from officers.forms import StatusUpdateForm #
 
 from complaints.models import Complaint
+from urbanwatch.db_router import read_from_replica
 
 from .models import Contractor
 from .forms import ContractorStatusUpdateForm
@@ -31,6 +34,7 @@ def application_rejected(request):
     return render(request, 'contractors/rejected.html', {'reason': reason})
 
 @login_required
+@read_from_replica
 def contractor_dashboard(request):
     """Conttractor dashboard shwoing assigned complaints."""
     try:
@@ -68,10 +72,10 @@ def contractor_dashboard(request):
         status__in = ['completed']
     ).select_related('officer', 'citizen').order_by('-updated_at')
 
-    closed_complaints = Complaint.objects.filter(
+    closed_complaints = archive.History(Complaint.objects.filter(
         contractor=contractor,
         status='closed'
-    ).select_related('officer').order_by('-closed_at')
+    ).select_related('officer').order_by('-closed_at'), archive.archived_for(contractor=contractor))
 
     #paginate active complaints.
     pagination = Paginator(active_complaints, 5) 
@@ -85,6 +89,7 @@ def contractor_dashboard(request):
         'verification_complaints': verification_complaints,
         'closed_complaints': closed_complaints,
         'rejected_complaints': rejected_complaints,
+        'event_cursor': events.latest_id(), # live updates pick up from here
         
         # Counts for badges
         'active_count': active_complaints.count(),
@@ -106,7 +111,10 @@ def contractor_complaint_detail(request, complaint_id):
         return redirect('home')
     
     #Ensure the complaint exists and is assigned to this contractor.
-    complaint = get_object_or_404(Complaint, id=complaint_id, contractor=contractor)
+    try:
+        complaint = Complaint.objects.get(id=complaint_id, contractor=contractor)
+    except Complaint.DoesNotExist:
+        return archive.show_archived(complaint_id, contractor=contractor)
 
     #Check if contractor is assigned to this complaint.
     if complaint.contractor != contractor:
@@ -149,6 +157,10 @@ def contractor_update_status(request, complaint_id):
         return redirect('contractors:contractor_complaint_detail', complaint_id=complaint.id)
     
     if request.method == 'POST':
+        # Remember the stored photo: a new upload is staged and processed in the
+        # background instead of being pushed to storage while the row is locked.
+        previous_image = complaint.completion_image.name or None
+        new_upload = request.FILES.get('completion_image')
         form = ContractorStatusUpdateForm(request.POST, request.FILES, instance=complaint)
         
         if form.is_valid():
@@ -172,7 +184,11 @@ def contractor_update_status(request, complaint_id):
                 complaint.status = 'in_progress'
                 if not complaint.in_progress_at:
                     complaint.in_progress_at = timezone.now()
+                if new_upload:
+                    complaint.completion_image = previous_image
                 complaint.save()
+                if new_upload:
+                    queue_image(complaint, 'completion_image', new_upload)
                 messages.success(request, "Work started! Status is now In Progress.")
 
             # --- CASE 2: FINISHING WORK (In Progress -> Completed) ---
@@ -190,22 +206,16 @@ def contractor_update_status(request, complaint_id):
                 
                 # Clear any previous feedback since they are resubmitting
                 complaint.officer_feedback = None 
-                
+
+                if new_upload:
+                    complaint.completion_image = previous_image
                 complaint.save()
+                if new_upload:
+                    queue_image(complaint, 'completion_image', new_upload)
                 # --- 📧 EMAIL 1: TO CONTRACTOR (Confirmation) ---
                 if contractor.user.email:
-                    subject = f"Work Submitted: {complaint.title}"
-                    msg = f"""
-                    Hello {contractor.company_name},
-                    
-                    You have successfully marked the job "{complaint.title}" as COMPLETED.
-                    Proof of work has been uploaded.
-                    
-                    Current Status: PENDING VERIFICATION
-                    
-                    Please wait while Officer {complaint.officer.name if complaint.officer else 'assigned'} verifies the work.
-                    """
-                    send_alert(subject, msg, [contractor.user.email])
+                    notify_template('work_submitted', {'complaint': complaint, 'contractor': contractor},
+                                    [contractor.user.email])
 
                 # --- 📧 EMAIL 2: TO OFFICER (Verification Needed) ---
                 # Check if an officer is assigned, otherwise notify all officers in region (fallback)
@@ -214,19 +224,8 @@ def contractor_update_status(request, complaint_id):
                     officer_email = complaint.officer.user.email
                     
                 if officer_email:
-                    subject = f"Verification Required: {complaint.title}"
-                    msg = f"""
-                    Contractor {contractor.company_name} has completed the job.
-                    
-                    Complaint: "{complaint.title}"
-                    Status: COMPLETED (Pending Verification)
-                    
-                    Action Required:
-                    1. Login to UrbanWatch+
-                    2. View the 'After' photo (Proof of Work)
-                    3. Verify and Close the ticket
-                    """
-                    send_alert(subject, msg, [officer_email])
+                    notify_template('verification_required', {'complaint': complaint, 'contractor': contractor},
+                                    [officer_email])
                 messages.success(request, "Proof uploaded! Work marked as completed and sent for review.")
 
             # --- CASE 3: INVALID TRANSITION ---
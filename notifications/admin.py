@@ -0,0 +1,16 @@
+from django.contrib import admin
+from .models import Notification, NotificationPreference
+
+
+@admin.register(NotificationPreference)
+class NotificationPreferenceAdmin(admin.ModelAdmin):
+    list_display = ['user', 'frequency', 'updated_at']
+    list_filter = ['frequency']
+    search_fields = ['user__username', 'user__email']
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'email', 'frequency', 'created_at', 'sent_at']
+    list_filter = ['frequency', 'sent_at']
+    search_fields = ['email', 'subject']
@@ -0,0 +1,11 @@
+from django import forms
+from .models import NotificationPreference
+
+
+class NotificationPreferenceForm(forms.ModelForm):
+    class Meta:
+        model = NotificationPreference
+        fields = ['frequency']
+        widgets = {
+            'frequency': forms.Select(attrs={'class': 'select select-bordered w-full'}),
+        }
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import send_digests
+
+
+class Command(BaseCommand):
+    help = 'Sends pending notification digests (run hourly and daily from cron).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--frequency', choices=['hourly', 'daily'], required=True)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        sent = send_digests(options['frequency'])
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} {options['frequency']} digests in {elapsed:.0f} ms."))
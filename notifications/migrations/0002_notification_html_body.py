@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='html_body',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+FREQUENCY_CHOICES = [
+    ('immediate', 'Immediately'),
+    ('hourly', 'Hourly digest'),
+    ('daily', 'Daily digest'),
+]
+
+
+class NotificationPreference(models.Model):
+    """How often a user wants to receive email updates."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='notification_preference')
+    frequency = models.CharField(max_length=20, choices=FREQUENCY_CHOICES, default='immediate')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username}: {self.get_frequency_display()}"
+
+
+class Notification(models.Model):
+    """One queued event for a digest recipient (see notifications/outbox.py)."""
+
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.CASCADE, related_name='notifications')
+    email = models.EmailField()
+    frequency = models.CharField(max_length=20, choices=FREQUENCY_CHOICES)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            # send_digests: pending rows of one frequency, grouped by recipient.
+            models.Index(fields=['frequency', 'sent_at', 'email'], name='notification_outbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.email} ({'sent' if self.sent_at else 'pending'})"
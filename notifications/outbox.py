@@ -0,0 +1,169 @@
+# notifications/outbox.py
+"""
+Email notifications that respect each user's digest preference.
+
+notify() is a drop-in replacement for complaints.emails.send_alert. Recipients
+on "immediate" get the email as before, sent only after the transaction commits.
+Everyone else gets a Notification row. `manage.py send_digests --frequency
+hourly|daily` later turns each recipient's pending rows into a single message
+and sends them all over one SMTP connection, marking each as it goes.
+
+notify_template() and notify_many() take a template name from registry.py
+instead of a hand-written body, so every email has a text and an HTML part.
+When one call sends several immediate messages (a bulk approval, say), they
+go out together from one background thread over one SMTP connection.
+"""
+import logging
+import textwrap
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from complaints.emails import send_alert
+from . import registry
+from .models import Notification
+
+SUBJECT_PREFIX = '[UrbanWatch+]'
+
+logger = logging.getLogger(__name__)
+
+
+def _recipients(recipients):
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    return list(dict.fromkeys(r for r in recipients if r))
+
+
+def _send_batch(messages):
+    """Send [(subject, text, html, recipients), ...] in the background over one connection."""
+    if len(messages) == 1:
+        subject, text, html, recipients = messages[0]
+        send_alert(subject, text, recipients, html_message=html)
+        return
+
+    def _send():
+        emails = []
+        for subject, text, html, recipients in messages:
+            email = EmailMultiAlternatives(f"{SUBJECT_PREFIX} {subject}", text, settings.DEFAULT_FROM_EMAIL, recipients)
+            if html:
+                email.attach_alternative(html, 'text/html')
+            emails.append(email)
+        try:
+            get_connection(fail_silently=True).send_messages(emails)
+        except Exception:
+            logger.exception("Sending %d notification emails failed", len(emails))
+
+    threading.Thread(target=_send).start()
+
+
+def _dispatch(messages):
+    """Send or queue [(subject, text, html, recipients), ...] with one preference lookup."""
+    messages = [(subject, text, html, _recipients(recipients)) for subject, text, html, recipients in messages]
+    everyone = {email for *_, recipients in messages for email in recipients}
+    if not everyone:
+        return
+
+    # One query for user ids and preferences; unknown addresses are "immediate".
+    known = {}
+    for email, user_id, frequency in (User.objects.filter(email__in=everyone)
+                                      .values_list('email', 'id', 'notification_preference__frequency')):
+        known.setdefault(email, (user_id, frequency or 'immediate'))
+
+    queued, outgoing = [], []
+    for subject, text, html, recipients in messages:
+        immediate = []
+        for email in recipients:
+            user_id, frequency = known.get(email, (None, 'immediate'))
+            if frequency == 'immediate':
+                immediate.append(email)
+            else:
+                queued.append(Notification(user_id=user_id, email=email, frequency=frequency, subject=subject,
+                                           body=textwrap.dedent(text).strip(), html_body=html or ''))
+        if immediate:
+            # A single message to all immediate recipients of each email.
+            outgoing.append((subject, text, html, immediate))
+
+    if outgoing:
+        # Nothing is sent if the transaction rolls back.
+        transaction.on_commit(lambda: _send_batch(outgoing))
+    if queued:
+        Notification.objects.bulk_create(queued)
+
+
+def notify(subject, message, recipients, html_message=None):
+    """Send now or queue for a digest, depending on each recipient's preference."""
+    _dispatch([(subject, message, html_message, recipients)])
+
+
+def notify_template(name, context, recipients):
+    """notify() with the subject and bodies rendered from an email template (see registry.py)."""
+    subject, text, html = registry.render(name, context)
+    _dispatch([(subject, text, html, recipients)])
+
+
+def notify_many(name, batch):
+    """
+    One template, many recipients: `batch` is [(recipients, context), ...].
+
+    The template is rendered for every context in one pass and all recipients'
+    preferences are looked up with a single query.
+    """
+    batch = [(recipients, context) for recipients, context in batch if _recipients(recipients)]
+    if not batch:
+        return
+    rendered = registry.render_many(name, [context for _, context in batch])
+    _dispatch([(subject, text, html, recipients)
+               for (recipients, _), (subject, text, html) in zip(batch, rendered)])
+
+
+def render_digest(frequency, items):
+    """(subject, text, html) for one recipient's pending notifications."""
+    if len(items) == 1:
+        return f"{SUBJECT_PREFIX} {items[0].subject}", items[0].body, items[0].html_body or None
+
+    label = dict(Notification._meta.get_field('frequency').choices)[frequency]
+    subject, text, html = registry.render('digest', {'label': label, 'items': items})
+    return f"{SUBJECT_PREFIX} {subject}", text, html
+
+
+def send_digests(frequency, now=None):
+    """
+    Send one digest per recipient for all pending notifications. Returns messages sent.
+
+    Each recipient is its own short transaction: their rows are locked, the
+    digest sent and the rows marked, so a failure part-way leaves everyone
+    already sent marked as such and only the failed recipient pending.
+    """
+    now = now or timezone.now()
+    emails = list(Notification.objects.filter(frequency=frequency, sent_at__isnull=True)
+                  .order_by('email').values_list('email', flat=True).distinct())
+    if not emails:
+        return 0
+
+    sent = 0
+    with get_connection() as connection:
+        for email in emails:
+            try:
+                with transaction.atomic():
+                    # skip_locked lets overlapping cron runs split the work instead of double-sending.
+                    items = list(Notification.objects.select_for_update(skip_locked=True)
+                                 .filter(email=email, frequency=frequency, sent_at__isnull=True)
+                                 .order_by('created_at'))
+                    if not items:
+                        continue
+                    subject, text, html = render_digest(frequency, items)
+                    message = EmailMultiAlternatives(subject, text, settings.DEFAULT_FROM_EMAIL, [email],
+                                                     connection=connection)
+                    if html:
+                        message.attach_alternative(html, 'text/html')
+                    message.send()
+                    Notification.objects.filter(id__in=[n.id for n in items]).update(sent_at=now)
+                sent += 1
+            except Exception:
+                # The rows roll back to pending and go out with the next run.
+                logger.exception("Sending the %s digest to %s failed", frequency, email)
+    return sent
@@ -0,0 +1,76 @@
+# notifications/registry.py
+"""
+Email templates for every notification the site sends.
+
+Each notification kind is a pair of files in templates/notifications/email/:
+
+* `<name>.txt`  - plain-text body; its first line is "Subject: ...".
+* `<name>.html` - optional HTML body. Without one, the text body is wrapped in
+                  `_layout.html`, so every email still goes out with both parts.
+
+Templates are compiled once per process and kept in memory. The text engine
+does not autoescape (it is plain text); the HTML engine does. render_many()
+renders one template for a whole list of recipients, reusing the compiled
+template and a single Context.
+
+They use standalone Django template engines, the same language as the rest
+of the site's templates. Jinja2 is installed (requirements.txt pins it) but
+no TEMPLATES backend uses it.
+"""
+from functools import lru_cache
+from pathlib import Path
+
+from django.template import Context, Engine, TemplateDoesNotExist
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / 'templates' / 'notifications' / 'email'
+LAYOUT = '_layout'
+SUBJECT_PREFIX = 'Subject:'
+
+_engines = {
+    'txt': Engine(dirs=[str(TEMPLATE_DIR)], autoescape=False),
+    'html': Engine(dirs=[str(TEMPLATE_DIR)], autoescape=True),
+}
+
+
+@lru_cache(maxsize=None)
+def get_template(name, kind='txt'):
+    """Compiled template for `name`, or None when the kind has no such file."""
+    try:
+        return _engines[kind].get_template(f'{name}.{kind}')
+    except TemplateDoesNotExist:
+        if kind == 'txt':
+            raise
+        return None
+
+
+def clear_cache():
+    """Forget the compiled templates (after editing them in a running shell)."""
+    get_template.cache_clear()
+
+
+def _split_subject(rendered, name):
+    first, _, body = rendered.lstrip().partition('\n')
+    if not first.startswith(SUBJECT_PREFIX):
+        raise ValueError(f"Email template '{name}.txt' must start with a '{SUBJECT_PREFIX}' line.")
+    return first[len(SUBJECT_PREFIX):].strip(), body.strip()
+
+
+def render_many(name, contexts):
+    """[(subject, text, html), ...] for each context, in order."""
+    text_template = get_template(name, 'txt')
+    html_template = get_template(name, 'html') or get_template(LAYOUT, 'html')
+
+    results = []
+    text_context, html_context = Context(autoescape=False), Context()
+    for values in contexts:
+        with text_context.push(values):
+            subject, text = _split_subject(text_template.render(text_context), name)
+        with html_context.push(values, subject=subject, text=text):
+            html = html_template.render(html_context).strip()
+        results.append((subject, text, html))
+    return results
+
+
+def render(name, context):
+    """(subject, text, html) for one notification."""
+    return render_many(name, [context])[0]
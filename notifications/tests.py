@@ -0,0 +1,97 @@
+from smtplib import SMTPException
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives
+from django.test import TestCase
+
+from . import registry
+from .models import Notification, NotificationPreference
+from .outbox import notify, notify_many, send_digests
+
+
+class DigestTest(TestCase):
+    def setUp(self):
+        self.hourly = User.objects.create_user(username='hourly', email='hourly@example.com', password='Test@123')
+        self.daily = User.objects.create_user(username='daily', email='daily@example.com')
+        NotificationPreference.objects.create(user=self.hourly, frequency='hourly')
+        NotificationPreference.objects.create(user=self.daily, frequency='daily')
+
+    def test_events_are_coalesced_per_recipient(self):
+        for i in range(30):
+            notify(f"Resolved: Complaint {i}", "\n        Closed by the officer.\n        ", ['hourly@example.com'])
+        notify("Work Approved", "Done.", ['hourly@example.com', 'daily@example.com'])
+        self.assertEqual(Notification.objects.count(), 32)
+
+        self.assertEqual(send_digests('hourly'), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('31 updates', mail.outbox[0].subject)
+        self.assertIn('Resolved: Complaint 29', mail.outbox[0].body)
+        self.assertEqual(send_digests('hourly'), 0)  # already sent
+        self.assertEqual(Notification.objects.filter(frequency='daily', sent_at__isnull=True).count(), 1)
+
+    def test_a_failed_send_leaves_only_that_recipient_pending(self):
+        broken = User.objects.create_user(username='broken', email='broken@example.com')
+        NotificationPreference.objects.create(user=broken, frequency='hourly')
+        notify("Work Approved", "Done.", ['broken@example.com', 'hourly@example.com'])
+        real_send = EmailMultiAlternatives.send
+
+        def send(message, *args, **kwargs):
+            if message.to == ['broken@example.com']:
+                raise SMTPException("mailbox unavailable")
+            return real_send(message, *args, **kwargs)
+
+        with mock.patch.object(EmailMultiAlternatives, 'send', send), self.assertLogs('notifications.outbox'):
+            self.assertEqual(send_digests('hourly'), 1)
+        self.assertEqual([m.to for m in mail.outbox], [['hourly@example.com']])
+        pending = Notification.objects.filter(sent_at__isnull=True).values_list('email', flat=True)
+        self.assertEqual(list(pending), ['broken@example.com'])
+        self.assertEqual(send_digests('hourly'), 1)  # retried next run, nothing re-sent to the others
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_immediate_recipients_are_not_queued(self):
+        User.objects.create_user(username='now', email='now@example.com')
+        with self.captureOnCommitCallbacks() as callbacks:
+            notify("Complaint Received", "Thanks", ['now@example.com', 'unknown@example.com'])
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_preference_form(self):
+        self.client.login(username='hourly', password='Test@123')
+        self.client.post('/notifications/preferences/', {'frequency': 'daily'})
+        self.assertEqual(NotificationPreference.objects.get(user=self.hourly).frequency, 'daily')
+
+
+class TemplateRegistryTest(TestCase):
+    def test_renders_subject_text_and_html(self):
+        subject, text, html = registry.render('contractor_rejected', {
+            'contractor': {'name': 'Ravi', 'company_name': 'Fix & Co'}, 'reason': 'No <b>licence</b>',
+        })
+        self.assertEqual(subject, 'Application Status Update')
+        self.assertTrue(text.startswith('Hello Ravi,'))
+        self.assertIn('No <b>licence</b>', text)  # plain text is not escaped
+        self.assertIn('No &lt;b&gt;licence&lt;/b&gt;', html)
+        self.assertIn('Fix &amp; Co', html)
+
+    def test_templates_are_compiled_once(self):
+        registry.clear_cache()
+        registry.render_many('incident_closed', [{'count': n} for n in range(50)])
+        registry.render('incident_closed', {'count': 1})
+        info = registry.get_template.cache_info()
+        self.assertEqual(info.misses, 3)  # .txt, missing .html, _layout.html
+
+    def test_notify_many_batches_recipients(self):
+        NotificationPreference.objects.create(
+            user=User.objects.create_user(username='later', email='later@example.com'), frequency='daily')
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_many('incident_closed', [
+                (['now@example.com'], {'count': 2}),
+                (['later@example.com'], {'count': 3}),
+            ])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Incident Closed: 2 complaints', mail.outbox[0].subject)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        queued = Notification.objects.get(email='later@example.com')
+        self.assertEqual(queued.subject, 'Incident Closed: 3 complaints')
+        self.assertIn('<html>', queued.html_body)
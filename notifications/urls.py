@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'notifications'
+
+urlpatterns = [
+    path('preferences/', views.update_preferences, name='update_preferences'),
+]
@@ -0,0 +1,21 @@
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect
+from django.views.decorators.http import require_POST
+
+from .forms import NotificationPreferenceForm
+from .models import NotificationPreference
+
+
+@login_required
+@require_POST
+def update_preferences(request):
+    """Save how often the user wants email updates (form lives on the profile page)."""
+    preference, _ = NotificationPreference.objects.get_or_create(user=request.user)
+    form = NotificationPreferenceForm(request.POST, instance=preference)
+    if form.is_valid():
+        form.save()
+        messages.success(request, f"Email updates: {preference.get_frequency_display()}.")
+    else:
+        messages.error(request, "Please choose a valid option.")
+    return redirect('users:profile')
@@ -1,9 +1,15 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
 from users.models import Citizen
 from officers.models import Officer
 from contractors.models import Contractor
-from complaints.models import Complaint
+from complaints.models import Complaint, ComplaintEvent, Incident
 
 class OfficerAssignmentTest(TestCase):
     def setUp(self):
@@ -65,3 +71,261 @@ class OfficerAssignmentTest(TestCase):
         })
         self.complaint.refresh_from_db()
         self.assertEqual(self.complaint.status, 'assigned')  # Should not change
+
+
+class IncidentBulkActionTest(TestCase):
+    def setUp(self):
+        self.officer_user = User.objects.create_user(username='officer2', password='Test@123', is_staff=True)
+        citizen_user = User.objects.create_user(username='citizen2', password='Test@123')
+        self.citizen = Citizen.objects.create(user=citizen_user, name='Citizen Two', region='north')
+        self.officer = Officer.objects.create(user=self.officer_user, name='Officer Two', region='north')
+        self.incident = Incident.objects.create(region='north', category='road', latitude=19.1, longitude=72.8, size=3)
+        self.complaints = [
+            Complaint.objects.create(title=f'Pothole {i}', description='Pothole', category='road',
+                                     region='north', citizen=self.citizen, incident=self.incident)
+            for i in range(3)
+        ]
+        self.client.login(username='officer2', password='Test@123')
+
+    def test_claim_then_close_incident(self):
+        duplicate = Complaint.objects.create(title='Same pothole', description='Pothole', category='road',
+                                             region='north', citizen=self.citizen, incident=self.incident,
+                                             duplicate_of=self.complaints[0])
+        self.client.post(f'/officers/incident/{self.incident.id}/claim/')
+        statuses = set(Complaint.objects.filter(incident=self.incident, duplicate_of__isnull=True)
+                       .values_list('status', 'officer'))
+        self.assertEqual(statuses, {('assigned', self.officer.id)})
+        duplicate.refresh_from_db()
+        self.assertEqual((duplicate.status, duplicate.officer), ('reported', None))  # follows its original
+
+        Complaint.objects.filter(incident=self.incident, duplicate_of__isnull=True).update(status='completed')
+        Complaint.objects.filter(incident=self.incident).update(priority_updated_at=timezone.now())
+        self.client.post(f'/officers/incident/{self.incident.id}/close/')
+        self.assertFalse(Complaint.objects.filter(incident=self.incident).exclude(status='closed').exists())
+        # Closed rows are queued for re-scoring, as a single close_complaint would do.
+        self.assertFalse(Complaint.objects.filter(incident=self.incident, priority_updated_at__isnull=False).exists())
+        self.incident.refresh_from_db()
+        self.assertEqual(self.incident.status, 'closed')
+
+
+class OfficerSearchTest(TestCase):
+    def test_search_is_limited_to_officer_region(self):
+        user = User.objects.create_user(username='officer3', password='Test@123', is_staff=True)
+        Officer.objects.create(user=user, name='Officer Three', region='north')
+        citizen = Citizen.objects.create(user=User.objects.create_user(username='c3'), name='C3', region='north')
+        mine = Complaint.objects.create(title='Water leak', description='Pipe burst', region='north', citizen=citizen)
+        Complaint.objects.create(title='Water leak', description='Pipe burst', region='south', citizen=citizen)
+
+        self.client.login(username='officer3', password='Test@123')
+        response = self.client.get('/officers/search/', {'q': 'leak'})
+        self.assertEqual(response.context['results'], [mine])
+
+
+class PriorityQueueTest(TestCase):
+    def test_take_queue_sorts_by_priority(self):
+        user = User.objects.create_user(username='officer4', password='Test@123', is_staff=True)
+        Officer.objects.create(user=user, name='Officer Four', region='north')
+        citizen = Citizen.objects.create(user=User.objects.create_user(username='c4'), name='C4', region='north')
+        low = Complaint.objects.create(title='Low', description='x', region='north', citizen=citizen, priority=10)
+        high = Complaint.objects.create(title='High', description='x', region='north', citizen=citizen, priority=70)
+
+        self.client.login(username='officer4', password='Test@123')
+        response = self.client.get('/officers/dashboard/')
+        self.assertEqual(list(response.context['take_issues']), [high, low])
+
+
+class DashboardCardCacheTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='cardofficer', password='Test@123')
+        Officer.objects.create(user=user, name='Card Officer', region='north')
+        citizen = Citizen.objects.create(user=User.objects.create_user(username='cardcitizen'), name='C', region='north')
+        self.complaint = Complaint.objects.create(title='Broken road', description='Potholes', category='road',
+                                                  region='north', citizen=citizen)
+        self.client.login(username='cardofficer', password='Test@123')
+
+    def _key(self, complaint):
+        return make_template_fragment_key('officer_card_take', [complaint.id, complaint.updated_at, 'officer'])
+
+    def test_cards_are_cached_and_dropped_on_save(self):
+        self.client.get('/officers/dashboard/')
+        key = self._key(self.complaint)
+        self.assertIn('Broken road', cache.get(key))
+
+        complaint = Complaint.objects.get(id=self.complaint.id)
+        complaint.title = 'Collapsed road'
+        with self.captureOnCommitCallbacks(execute=True):
+            complaint.save()
+        self.assertIsNone(cache.get(key))
+
+        response = self.client.get('/officers/dashboard/')
+        self.assertContains(response, 'Collapsed road')
+        self.assertIsNotNone(cache.get(self._key(complaint)))
+
+
+@override_settings(EVENT_STREAM_SECONDS=0, EVENT_POLL_SECONDS=0)
+class LiveEventStreamTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='officer6', password='Test@123', is_staff=True)
+        self.officer = Officer.objects.create(user=user, name='Officer Six', region='north')
+        self.citizen = Citizen.objects.create(user=User.objects.create_user(username='c6'), name='C6', region='north')
+        self.client.login(username='officer6', password='Test@123')
+
+    def read_stream(self, **headers):
+        response = self.client.get(reverse('complaints:live_events'), headers=headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertFalse(response.streaming)  # WSGI gets one poll, never a held-open stream
+        return response.content.decode()
+
+    def test_stream_sends_only_changes_after_the_cursor(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            complaint = Complaint.objects.create(title='Leak', description='x', region='north', citizen=self.citizen)
+            Complaint.objects.create(title='Elsewhere', description='x', region='south', citizen=self.citizen)
+        cursor = self.client.get(reverse('officers:dashboard')).context['event_cursor']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            complaint.officer = self.officer
+            complaint.status = 'assigned'
+            complaint.save()
+            complaint.title = 'Leak (edited)'
+            complaint.save()  # no status change, no event
+
+        body = self.read_stream(**{'Last-Event-ID': str(cursor)})
+        self.assertEqual(body.count('event: '), 1)
+        self.assertIn('event: status', body)
+        self.assertIn('"status": "assigned"', body)
+        self.assertNotIn('Elsewhere', body)
+
+    def test_late_commits_behind_the_cursor_are_still_sent(self):
+        leak = Complaint.objects.create(title='Leak', description='x', region='north', citizen=self.citizen)
+        page_cursor = ComplaintEvent.objects.create(complaint=leak, kind='created', status='reported', region='north').id
+        # The row with the higher id commits first...
+        ComplaintEvent.objects.create(id=page_cursor + 2, complaint=leak, kind='status', status='assigned', region='north')
+        url = f"{reverse('complaints:live_events')}?after={page_cursor}"
+        first = self.client.get(url).content.decode()
+        self.assertEqual(first.count('event: '), 1)
+        self.assertIn(f'id: {page_cursor + 2}', first)
+
+        # ...and the slower, lower id turns up on the next poll, without moving Last-Event-ID back.
+        ComplaintEvent.objects.create(id=page_cursor + 1, complaint=leak, kind='status', status='in_progress', region='north')
+        second = self.client.get(url, headers={'Last-Event-ID': str(page_cursor + 2)}).content.decode()
+        self.assertIn('"status": "in_progress"', second)
+        self.assertNotIn(f'"id": {page_cursor},', second)  # already on the page
+        self.assertNotIn(f'id: {page_cursor + 1}\n', second)
+
+    async def test_asgi_stream_is_async(self):
+        await self.async_client.aforce_login(self.officer.user)
+        response = await self.async_client.get(reverse('complaints:live_events'), {'after': 0})
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn(': keep-alive', body)
+
+    def test_citizens_have_no_stream(self):
+        self.client.logout()
+        self.client.force_login(self.citizen.user)
+        self.assertEqual(self.client.get(reverse('complaints:live_events')).status_code, 403)
+        self.assertEqual(ComplaintEvent.objects.count(), 0)
+
+
+class OfficerBulkActionTest(TestCase):
+    def setUp(self):
+        officer_user = User.objects.create_user(username='bulk_officer', password='Test@123', email='officer@example.com')
+        self.officer = Officer.objects.create(user=officer_user, name='Bulk Officer', region='north')
+        citizen = Citizen.objects.create(user=User.objects.create_user(username='bulk_citizen', email='citizen@example.com'),
+                                         name='Bulk Citizen', region='north')
+        self.contractor = Contractor.objects.create(
+            user=User.objects.create_user(username='bulk_contractor', email='fixit@example.com'), name='Fixer',
+            company_name='FixIt', specialization='road', region='north', license_number='L-1', status='approved',
+        )
+        self.complaints = [
+            Complaint.objects.create(title=f'Pothole {i}', description='x', category='road', region='north', citizen=citizen)
+            for i in range(3)
+        ]
+        self.elsewhere = Complaint.objects.create(title='South pothole', description='x', category='road',
+                                                  region='south', citizen=citizen)
+        self.client.login(username='bulk_officer', password='Test@123')
+
+    def post(self, name, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse(f'officers:{name}'), data)
+
+    def test_claim_skips_what_is_not_eligible(self):
+        ids = [self.complaints[0].id, self.complaints[1].id, self.elsewhere.id]
+        self.post('bulk_claim', {'complaint_ids': ids})
+        claimed = Complaint.objects.filter(officer=self.officer)
+        self.assertEqual(set(claimed.values_list('id', flat=True)), set(ids[:2]))
+        self.assertEqual(set(claimed.values_list('status', flat=True)), {'assigned'})
+        self.assertIsNone(Complaint.objects.get(id=self.elsewhere.id).officer)
+        self.assertEqual(ComplaintEvent.objects.filter(kind='status').count(), 2)
+
+    @override_settings(OFFICER_BULK_LIMIT=2)
+    def test_rows_over_the_limit_are_reported_separately(self):
+        ids = [c.id for c in self.complaints] + [self.elsewhere.id]
+        response = self.client.post(reverse('officers:bulk_claim'), {'complaint_ids': ids}, follow=True)
+        self.assertEqual(Complaint.objects.filter(officer=self.officer).count(), 2)
+        notes = [str(m) for m in response.context['messages']]
+        self.assertIn("1 selected complaint was skipped (no longer eligible).", notes)  # the south one
+        self.assertIn("1 more complaint left for the next batch (at most 2 per action).", notes)
+
+        response = self.client.post(reverse('officers:bulk_claim'), {'select_all': '1'}, follow=True)
+        notes = [str(m) for m in response.context['messages']]
+        self.assertEqual(notes, ["Assigned to you: 1 complaint."])
+
+    def test_assign_close_and_reject_in_bulk(self):
+        self.post('bulk_claim', {'select_all': '1'})
+        self.post('bulk_assign_contractor', {'select_all': '1', 'contractor_id': self.contractor.id})
+        self.assertEqual(Complaint.objects.filter(contractor=self.contractor, status='in_progress').count(), 3)
+
+        Complaint.objects.filter(contractor=self.contractor).update(status='completed')
+        self.post('bulk_reject', {'complaint_ids': [self.complaints[0].id]})  # no reason given
+        self.assertEqual(Complaint.objects.filter(status='completed').count(), 3)
+        self.post('bulk_reject', {'complaint_ids': [self.complaints[0].id], 'rejection_reason': 'Still broken'})
+        self.assertEqual(Complaint.objects.get(id=self.complaints[0].id).officer_feedback, 'Still broken')
+
+        mail.outbox.clear()
+        with self.assertNumQueries(13):  # the same however many are selected
+            self.post('bulk_close', {'select_all': '1'})
+        self.assertEqual(Complaint.objects.filter(status='closed').count(), 2)
+        # One email to the contractor for both jobs, not one each.
+        to_contractor = [m for m in mail.outbox if 'fixit@example.com' in m.to]
+        self.assertEqual(len(to_contractor), 1)
+        self.assertIn('2 jobs', to_contractor[0].subject)
+
+
+class ContractorApprovalQueueTest(TestCase):
+    def setUp(self):
+        User.objects.create_user(username='approver', password='Test@123')
+        Officer.objects.create(user=User.objects.get(username='approver'), name='Approver', region='north')
+        self.pending = [
+            Contractor.objects.create(
+                user=User.objects.create_user(username=f'applicant{i}', email=f'applicant{i}@example.com'),
+                name=f'Applicant {i}', company_name=f'Builders {i}', specialization='road' if i % 2 else 'water',
+                region='north', license_number=f'LIC-{i}',
+            )
+            for i in range(25)
+        ]
+        self.client.login(username='approver', password='Test@123')
+        self.url = reverse('officers:contractor_approvals')
+
+    def test_queue_is_paginated_and_filterable(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context['pending_contractors']), 20)
+        self.assertEqual(response.context['page_obj'].paginator.count, 25)
+        water = self.client.get(self.url, {'specialization': 'water', 'q': 'builders'})
+        self.assertEqual(water.context['page_obj'].paginator.count, 13)
+
+    def test_bulk_approve_and_reject(self):
+        ids = [c.id for c in self.pending[:10]]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.client.post(self.url, {'action': 'approve', 'contractor_ids': ids})
+        self.assertEqual(len(callbacks), 1)  # all ten welcome emails go out together
+        self.assertEqual(Contractor.objects.filter(status='approved').count(), 10)
+
+        self.client.post(self.url, {'action': 'reject', 'contractor_ids': [c.id for c in self.pending[5:15]]})
+        self.assertEqual(Contractor.objects.filter(status='rejected').count(), 0)  # a reason is required
+        self.client.post(self.url, {'action': 'reject', 'rejection_reason': 'Expired licence',
+                                    'contractor_ids': [c.id for c in self.pending[5:15]]})
+        # The five already approved stay approved.
+        self.assertEqual(Contractor.objects.filter(status='approved').count(), 10)
+        self.assertEqual(set(Contractor.objects.filter(status='rejected').values_list('rejection_reason', flat=True)),
+                         {'Expired licence'})
+        self.assertEqual(Contractor.objects.filter(status='rejected').count(), 5)
@@ -6,6 +6,7 @@ app_name = 'officers'
 urlpatterns = [
     # Define your complaint-related URL patterns here.
     path('dashboard/', views.officer_dashboard, name='dashboard'),
+    path('search/', views.search, name='search'),
     path('assign/<int:complaint_id>/', views.assign_to_me, name='assign_to_me'),
     path('complaint/<int:complaint_id>/', views.complaint_detail, name='complaint_detail'),
     path('complaint/<int:complaint_id>/update-status/', views.update_status, name='update_status'), 
@@ -13,4 +14,10 @@ urlpatterns = [
     path('complaint/<int:complaint_id>/close/', views.close_complaint, name='close_complaint'),
     path('approvals/', views.contractor_approvals, name = 'contractor_approvals'),\
     path('complaint/<int:complaint_id>/reject/', views.reject_work, name='reject_work'),
+    path('incident/<int:incident_id>/claim/', views.claim_incident, name='claim_incident'),
+    path('incident/<int:incident_id>/close/', views.close_incident, name='close_incident'),
+    path('bulk/claim/', views.bulk_claim, name='bulk_claim'),
+    path('bulk/assign-contractor/', views.bulk_assign_contractor, name='bulk_assign_contractor'),
+    path('bulk/close/', views.bulk_close, name='bulk_close'),
+    path('bulk/reject/', views.bulk_reject, name='bulk_reject'),
 ]
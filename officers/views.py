@@ -4,17 +4,27 @@ from django.shortcuts import render, redirect, get_object_or_404 # For rendering
 from django.contrib.auth.decorators import login_required # To restrict access to logged-in users.
 from django.contrib import messages # For user feedback messages.
 from django.core.paginator import Paginator # For paginating long lists.
+from django.db.models import Count, Q
+from django.views.decorators.http import require_POST
+from django.conf import settings
+from django.urls import reverse
 
-from complaints.emails import send_alert
-from complaints.models import Complaint 
+from complaints import archive, cards, events, tiles
+from notifications.outbox import notify_many, notify_template
+from complaints.models import Complaint, Incident
+from complaints.phash import find_similar
+from complaints.search import search_complaints
 
 from contractors.models import Contractor
 from django.utils import timezone
 
+from urbanwatch.db_router import read_from_replica
+
 from .models import Officer 
 from .forms import StatusUpdateForm, ContractorAssignmentForm
 
 @login_required
+@read_from_replica
 def officer_dashboard(request):
     try:
         officer = Officer.objects.get(user=request.user)
@@ -23,10 +33,12 @@ def officer_dashboard(request):
         return redirect('home')
 
     # --- 1. TAKE ISSUES (Unassigned in Region) ---
+    # Linked duplicates ride along with their original report, so they are not queued separately.
     unassigned_qs = Complaint.objects.filter(
         region=officer.region, 
-        officer__isnull=True
-    ).order_by('-created_at')
+        officer__isnull=True,
+        duplicate_of__isnull=True,
+    ).order_by('-priority', '-created_at') # most urgent first (complaints/priority.py)
     p_take = Paginator(unassigned_qs, 6)
     page_take = request.GET.get('page_take')
     take_issues = p_take.get_page(page_take)
@@ -35,7 +47,7 @@ def officer_dashboard(request):
     taken_qs = Complaint.objects.filter(
         officer=officer, 
         status__in=['assigned', 'in_progress']
-    ).select_related('contractor').order_by('-updated_at')
+    ).select_related('contractor').order_by('-priority', '-updated_at')
     p_taken = Paginator(taken_qs, 6)
     page_taken = request.GET.get('page_taken')
     taken_issues = p_taken.get_page(page_taken)
@@ -44,21 +56,29 @@ def officer_dashboard(request):
     verification_qs = Complaint.objects.filter(
         officer=officer, 
         status='completed'
-    ).select_related('contractor').order_by('-completed_at')
+    ).select_related('contractor').order_by('-priority', '-completed_at')
 
     p_verify = Paginator(verification_qs, 6) # Paginate the queryset with 6 items per page
     page_verify = request.GET.get('page_verify')
     verification_issues = p_verify.get_page(page_verify)
 
     # --- 4. CLOSED ISSUES (History) ---
-    closed_qs = Complaint.objects.filter(
+    closed_qs = archive.History(Complaint.objects.filter(
         officer=officer, 
         status='closed'
-    ).order_by('-closed_at')
+    ).order_by('-closed_at'), archive.archived_for(officer=officer)) # older ones come from the archive
     p_closed = Paginator(closed_qs, 6)
     page_closed = request.GET.get('page_closed')
     closed_issues = p_closed.get_page(page_closed)
 
+    # --- 5. INCIDENTS (clusters of nearby reports that can be handled in bulk) ---
+    incidents = Incident.objects.filter(
+        status='open', region=officer.region, size__gte=2
+    ).annotate(
+        unclaimed=Count('complaints', filter=Q(complaints__officer__isnull=True, complaints__status='reported')),
+        to_verify=Count('complaints', filter=Q(complaints__officer=officer, complaints__status='completed')),
+    ).filter(Q(unclaimed__gt=0) | Q(to_verify__gt=0))[:6]
+
     # Determine which tab should be active after a reload (e.g. clicking pagination)
     active_tab = 'take'
     if 'page_taken' in request.GET: active_tab = 'taken'
@@ -72,7 +92,11 @@ def officer_dashboard(request):
         'verification_issues': verification_issues,
         'closed_issues': closed_issues,
         'active_tab': active_tab,
-        
+        'incidents': incidents,
+        'event_cursor': events.latest_id(), # live updates pick up from here
+        # For the bulk "assign contractor" bar on the Taken tab.
+        'contractors': Contractor.objects.filter(status='approved', region=officer.region).order_by('company_name'),
+
         # Counts for Badges
         'count_take': unassigned_qs.count(),
         'count_taken': taken_qs.count(),
@@ -114,28 +138,11 @@ def assign_to_me(request, complaint_id):
 
     # --- 📧 EMAIL TO CITIZEN (Officer Assigned) ---
     if complaint.citizen.user.email:
-        subject = f"Update: Officer Assigned"
-        msg = f"""
-        Hello {complaint.citizen.name},
-        
-        Officer {complaint.officer.name} has been assigned to your complaint:
-        "{complaint.title}"
-        
-        They will review the issue and assign a contractor shortly.
-        """
-        send_alert(subject, msg, [complaint.citizen.user.email])
+        notify_template('officer_assigned', {'complaint': complaint, 'officer': officer}, [complaint.citizen.user.email])
 
     # --- 📧 EMAIL TO OFFICER (Confirmation) ---
     if request.user.email:
-        subject = f"Complaint Accepted: #{complaint.id}"
-        msg = f"""
-        You have successfully accepted the complaint:
-        "{complaint.title}"
-        
-        Current Status: ASSIGNED
-        Next Step: Please assign a contractor.
-        """
-        send_alert(subject, msg, [request.user.email])
+        notify_template('complaint_accepted', {'complaint': complaint}, [request.user.email])
 
     messages.success(request, f"Complaint '{complaint.title}' assigned to you.")
     return redirect('officers:dashboard')
@@ -149,7 +156,10 @@ def complaint_detail(request, complaint_id):
         messages.error(request, "Officer profile not found.")
         return redirect('home')
     
-    complaint = get_object_or_404(Complaint, id=complaint_id)
+    try:
+        complaint = Complaint.objects.get(id=complaint_id)
+    except Complaint.DoesNotExist:
+        return archive.show_archived(complaint_id, officer=officer)
 
     if complaint.officer != officer:
         messages.error(request, "You are not assigned to this complaint.")
@@ -174,15 +184,49 @@ def complaint_detail(request, complaint_id):
         specialization=complaint.category
     ).order_by('name')
 
+    # Before closing, flag completion photos that were already used elsewhere.
+    similar_photos = []
+    if complaint.status == 'completed':
+        fingerprint = complaint.image_fingerprints.filter(kind='completion').first()
+        if fingerprint:
+            similar_photos = find_similar(fingerprint)
+
     context = {
             'officer' : officer,
             'complaint' : complaint,
             'status_form' : status_form,
             'contractor_form' : contractor_form,
+            'similar_photos' : similar_photos,
     }
 
     return render(request, 'officers/complaint_detail.html', context)
 
+@login_required
+@read_from_replica
+def search(request):
+    """Full-text search over complaints in the officer's region."""
+    try:
+        officer = Officer.objects.get(user=request.user)
+    except Officer.DoesNotExist:
+        messages.error(request, "Officer profile not found.")
+        return redirect('home')
+
+    query = request.GET.get('q', '').strip()
+    status = request.GET.get('status', '')
+    if status not in dict(Complaint.STATUS_CHOICES):
+        status = ''
+
+    results = search_complaints(query, region=officer.region, status=status or None) if query else []
+
+    context = {
+        'officer': officer,
+        'query': query,
+        'status': status,
+        'status_choices': Complaint.STATUS_CHOICES,
+        'results': results,
+    }
+    return render(request, 'officers/search.html', context)
+
 @login_required
 def update_status(request, complaint_id):
     """Update the complaint status with validation."""
@@ -276,20 +320,7 @@ def assign_contractor(request, complaint_id):
             # --- 📧 EMAIL TO CONTRACTOR (New Job) ---
             contractor = complaint_obj.contractor
             if contractor.user.email:
-                subject = f"New Work Order: {complaint.title}"
-                msg = f"""
-                Hello {contractor.company_name},
-                
-                You have been assigned a new job by Officer {complaint.officer.name}.
-                
-                Details:
-                Title: {complaint.title}
-                Location: {complaint.location}
-                
-                Status: IN PROGRESS
-                Action: Please start work immediately and upload proof when done.
-                """
-                send_alert(subject, msg, [contractor.user.email])
+                notify_template('work_order', {'complaint': complaint_obj, 'contractor': contractor}, [contractor.user.email])
 
             messages.success(request, f'Job assigned to {contractor.company_name}. Status: In Progress.')
             return redirect('officers:dashboard')
@@ -329,40 +360,20 @@ def close_complaint(request, complaint_id):
     
     complaint.save()
 
+    # Reports linked as duplicates are resolved by the same work.
+    _close_duplicates([complaint], officer, complaint.closed_at)
+
     # --- 📧 EMAIL 1: TO CITIZEN (Resolved) ---
     if complaint.citizen.user.email:
-        subject = f"Resolved: {complaint.title}"
-        msg = f"""
-        Great News!
-        
-        Your complaint "{complaint.title}" has been successfully Verified & Closed by Officer {officer.name}.
-        
-        You can view the 'After' photo in the app.
-        Thank you for helping us keep the city clean!
-        """
-        send_alert(subject, msg, [complaint.citizen.user.email])
+        notify_template('complaint_resolved', {'complaint': complaint, 'officer': officer}, [complaint.citizen.user.email])
 
     # --- 📧 EMAIL 2: TO CONTRACTOR (Approved) ---
     if complaint.contractor and complaint.contractor.user.email:
-        subject = f"Work Approved: {complaint.title}"
-        msg = f"""
-        Job Well Done!
-        
-        The complaint "{complaint.title}" has been verified and closed by the Officer.
-        This job is officially complete and closed.
-        """
-        send_alert(subject, msg, [complaint.contractor.user.email])
+        notify_template('work_approved', {'complaint': complaint}, [complaint.contractor.user.email])
 
     # --- 📧 EMAIL 3: TO OFFICER (Self-Confirmation) ---
     if request.user.email:
-        subject = f"Case Closed: #{complaint.id}"
-        msg = f"""
-        You have successfully verified and closed the complaint:
-        "{complaint.title}"
-        
-        This case is now archived in your history.
-        """
-        send_alert(subject, msg, [request.user.email])
+        notify_template('case_closed', {'complaint': complaint}, [request.user.email])
 
     messages.success(request, "Complaint closed successfully!")
     return redirect('officers:complaint_detail', complaint_id)
@@ -370,90 +381,97 @@ def close_complaint(request, complaint_id):
 
 @login_required
 def contractor_approvals(request):
-    """Officer view to approve/reject pending contractors"""
+    """Officer view to approve/reject pending contractors, several at a time."""
     try:
         officer = Officer.objects.get(user=request.user)
     except Officer.DoesNotExist:
         messages.error(request, "Officer profile not found.")
         return redirect('home')
-    
-    # Get pending contractors
-    pending_contractors = Contractor.objects.filter(
-        status='pending'
-    ).order_by('-created_at')
-    
-    if request.method == 'POST':
-        contractor_id = request.POST.get('contractor_id')
-        action = request.POST.get('action')
-        reason = request.POST.get('rejection_reason', '')
-        
-        contractor = get_object_or_404(Contractor, id=contractor_id)
-        
-        if action == 'approve':
-            contractor.status = 'approved'
-            contractor.approved_by = officer
-            contractor.approved_at = timezone.now()
-            contractor.save()
-
-            # --- 📧 EMAIL 1: WELCOME (Approved) ---
-            if contractor.user.email:
-                subject = "Application Approved - Welcome to UrbanWatch+"
-                msg = f"""
-                Hello {contractor.name},
-
-                Congratulations! Your application for '{contractor.company_name}' has been APPROVED.
 
-                You can now login to your dashboard to view available work orders in the {contractor.get_region_display()} region.
-
-                Welcome to the team!
-                """
-                send_alert(subject, msg, [contractor.user.email])
-
-            messages.success(
-                request,
-                f"✓ Contractor {contractor.company_name} approved successfully."
-            )
-            
-        elif action == 'reject':
-            if not reason.strip():
-                messages.error(request, "Please provide a reason for rejection.")
-                return redirect('officers:contractor_approvals')
-                
-            contractor.status = 'rejected'
-            contractor.rejection_reason = reason
-            contractor.save()
-
-            # --- 📧 EMAIL 2: REJECTION (With Reason) ---
-            if contractor.user.email:
-                subject = "Application Status Update"
-                msg = f"""
-                Hello {contractor.name},
-
-                We regret to inform you that your application for '{contractor.company_name}' has been REJECTED.
-
-                Reason for Rejection:
-                ---------------------
-                {reason}
-                ---------------------
+    if request.method == 'POST':
+        _decide_contractors(request, officer)
+        return redirect(request.get_full_path()) # back to the same page and filters
+
+    # Get pending contractors, narrowed by the filter bar
+    pending_contractors = Contractor.objects.filter(status='pending')
+    query = request.GET.get('q', '').strip()
+    region = request.GET.get('region', '')
+    specialization = request.GET.get('specialization', '')
+    if query:
+        pending_contractors = pending_contractors.filter(
+            Q(company_name__icontains=query) | Q(name__icontains=query) | Q(license_number__icontains=query)
+        )
+    if region:
+        pending_contractors = pending_contractors.filter(region=region)
+    if specialization:
+        pending_contractors = pending_contractors.filter(specialization=specialization)
 
-                If you wish to appeal or re-apply, please contact the administration.
-                """
-                send_alert(subject, msg, [contractor.user.email])
+    paginator = Paginator(pending_contractors.order_by('-created_at'), 20)
+    page_obj = paginator.get_page(request.GET.get('page'))
 
-            messages.warning(
-                request,
-                f"✕ Contractor {contractor.company_name} rejected."
-            )
-        
-        return redirect('officers:contractor_approvals')
-    
     context = {
         'officer': officer,
-        'pending_contractors': pending_contractors,
+        'pending_contractors': page_obj,
+        'page_obj': page_obj,
+        'query': query,
+        'region': region,
+        'specialization': specialization,
+        'region_choices': Contractor.REGION_CHOICES,
+        'specialization_choices': Contractor.CATEGORY_CHOICES,
     }
     return render(request, 'officers/contractor_approvals.html', context)
 
 
+@transaction.atomic
+def _decide_contractors(request, officer):
+    """Approve or reject the selected pending contractors with one bulk_update and one email pass."""
+    action = request.POST.get('action')
+    reason = request.POST.get('rejection_reason', '').strip()
+    if action not in ('approve', 'reject'):
+        messages.error(request, "Unknown action.")
+        return
+    if action == 'reject' and not reason:
+        messages.error(request, "Please provide a reason for rejection.")
+        return
+
+    # Per-card buttons send contractor_id, the bulk bar sends contractor_ids.
+    ids = {int(i) for i in request.POST.getlist('contractor_ids') + [request.POST.get('contractor_id', '')] if i.isdigit()}
+    # Already-decided applications drop out here, so a double submit changes nothing.
+    contractors = list(Contractor.objects.select_for_update(of=('self',)).filter(id__in=ids, status='pending')
+                       .select_related('user'))
+    if not contractors:
+        messages.info(request, "No pending applications selected.")
+        return
+
+    now = timezone.now()
+    for contractor in contractors:
+        contractor.updated_at = now
+        if action == 'approve':
+            contractor.status = 'approved'
+            contractor.approved_by = officer
+            contractor.approved_at = now
+        else:
+            contractor.status = 'rejected'
+            contractor.rejection_reason = reason
+    fields = ['status', 'approved_by', 'approved_at'] if action == 'approve' else ['status', 'rejection_reason']
+    Contractor.objects.bulk_update(contractors, fields + ['updated_at'])
+
+    # --- 📧 EMAILS: welcome or rejection, rendered in one pass and sent together ---
+    if action == 'approve':
+        notify_many('contractor_approved', [
+            ([contractor.user.email], {'contractor': contractor}) for contractor in contractors
+        ])
+        messages.success(request, f"✓ Approved {len(contractors)} contractor{'s' if len(contractors) != 1 else ''}.")
+    else:
+        notify_many('contractor_rejected', [
+            ([contractor.user.email], {'contractor': contractor, 'reason': reason}) for contractor in contractors
+        ])
+        messages.warning(request, f"✕ Rejected {len(contractors)} contractor{'s' if len(contractors) != 1 else ''}.")
+    skipped = len(ids) - len(contractors)
+    if skipped:
+        messages.info(request, f"{skipped} selected application{'s were' if skipped != 1 else ' was'} already decided.")
+
+
 @login_required
 @transaction.atomic
 def reject_work(request, complaint_id):
@@ -483,25 +501,8 @@ def reject_work(request, complaint_id):
         complaint.save()
         # --- 📧 EMAIL TO CONTRACTOR (Rejection Alert) ---
         if complaint.contractor and complaint.contractor.user.email:
-            subject = f"ACTION REQUIRED: Work Rejected for '{complaint.title}'"
-            msg = f"""
-            Hello {complaint.contractor.name} from {complaint.contractor.company_name},
-            
-            Officer {officer.name} has reviewed your work for the complaint:
-            "{complaint.title}"
-            
-            Status: REJECTED (Sent back to In Progress)
-            
-            Reason for Rejection:
-            ---------------------
-            "{reason}"
-            ---------------------
-            
-            Action Required:
-            1. Fix the issues mentioned above.
-            2. Re-upload a new Proof of Work photo.
-            """
-            send_alert(subject, msg, [complaint.contractor.user.email])
+            notify_template('work_rejected', {'complaint': complaint, 'officer': officer, 'reason': reason},
+                            [complaint.contractor.user.email])
 
         messages.warning(
             request,
@@ -509,3 +510,272 @@ def reject_work(request, complaint_id):
         )
 
     return redirect('officers:complaint_detail', complaint.id)
+
+
+
+@login_required
+@require_POST
+@transaction.atomic
+def claim_incident(request, incident_id):
+    """Assign every unclaimed complaint of an incident to the current officer."""
+    officer = get_object_or_404(Officer, user=request.user)
+    incident = get_object_or_404(Incident, id=incident_id, region=officer.region)
+
+    # Duplicates follow their original (as in bulk_claim) and are closed along with it.
+    complaints = list(Complaint.objects.select_for_update().filter(
+        incident=incident, officer__isnull=True, status='reported', region=officer.region,
+        duplicate_of__isnull=True,
+    ).select_related('citizen__user'))
+    if not complaints:
+        messages.info(request, "Nothing left to claim in this incident.")
+        return redirect('officers:dashboard')
+
+    now = timezone.now()
+    for complaint in complaints:
+        complaint.officer = officer
+        complaint.assigned_at = complaint.assigned_at or now
+        _set_status(complaint, 'assigned', now)
+    _save_bulk(complaints, STATUS_FIELDS + ['officer', 'assigned_at'])
+
+    # --- 📧 EMAILS: one per citizen, one summary for the officer ---
+    # One render pass for the whole batch (notifications/registry.py).
+    notify_many('officer_assigned', [
+        ([complaint.citizen.user.email], {'complaint': complaint, 'officer': officer}) for complaint in complaints
+    ])
+    if request.user.email:
+        notify_template('incident_claimed', {'count': len(complaints), 'incident': incident}, [request.user.email])
+
+    messages.success(request, f"Claimed {len(complaints)} complaints from this incident.")
+    return redirect('officers:dashboard')
+
+
+@login_required
+@require_POST
+@transaction.atomic
+def close_incident(request, incident_id):
+    """Close every completed complaint of an incident that belongs to the current officer."""
+    officer = get_object_or_404(Officer, user=request.user)
+    incident = get_object_or_404(Incident, id=incident_id, region=officer.region)
+
+    complaints = list(Complaint.objects.select_for_update(of=('self',)).filter(
+        incident=incident, officer=officer, status='completed'
+    ).select_related('citizen__user', 'contractor__user'))
+    if not complaints:
+        messages.info(request, "No completed work to close in this incident.")
+        return redirect('officers:dashboard')
+
+    now = timezone.now()
+    for complaint in complaints:
+        complaint.closed_at = complaint.closed_at or now
+        _set_status(complaint, 'closed', now)
+    _save_bulk(complaints, STATUS_FIELDS + ['closed_at'])
+    # Reports linked as duplicates are resolved by the same work (as in close_complaint).
+    _close_duplicates(complaints, officer, now)
+
+    if not incident.complaints.exclude(status='closed').exists():
+        incident.status = 'closed'
+        incident.save(update_fields=['status', 'updated_at'])
+
+    # --- 📧 EMAILS: citizens and contractors, plus one summary for the officer ---
+    notify_many('complaint_resolved', [
+        ([complaint.citizen.user.email], {'complaint': complaint, 'officer': officer}) for complaint in complaints
+    ])
+    notify_many('work_approved', [
+        ([complaint.contractor.user.email], {'complaint': complaint}) for complaint in complaints if complaint.contractor
+    ])
+    if request.user.email:
+        notify_template('incident_closed', {'count': len(complaints)}, [request.user.email])
+
+    messages.success(request, f"Closed {len(complaints)} complaints from this incident.")
+    return redirect('officers:dashboard')
+
+
+# --- Bulk actions on the dashboard tabs ---
+# The ticked complaints (or the whole tab, with select_all) are locked and checked in one
+# query, saved with one bulk_update, and each person gets one email for the whole batch.
+
+STATUS_FIELDS = ['status', 'updated_at', 'status_changed_at', 'escalation_level', 'priority_updated_at']
+
+
+def _bulk_selection(request, **filters):
+    """
+    Complaints picked for a bulk action that pass `filters`, locked; plus how many
+    picks were no longer eligible and how many eligible ones OFFICER_BULK_LIMIT left out.
+    """
+    queryset = Complaint.objects.filter(**filters)
+    picked = None
+    if request.POST.get('select_all') != '1':
+        picked = {int(i) for i in request.POST.getlist('complaint_ids') if i.isdigit()}
+        queryset = queryset.filter(id__in=picked)
+    limit = settings.OFFICER_BULK_LIMIT
+    complaints = list(queryset.select_for_update(of=('self',)).select_related('citizen__user', 'contractor__user')
+                      .order_by('id')[:limit])
+    # Only a full batch can have left anything out, so the usual case costs no count.
+    eligible = queryset.count() if len(complaints) == limit else len(complaints)
+    skipped = len(picked) - eligible if picked is not None else 0
+    return complaints, skipped, eligible - len(complaints)
+
+
+def _set_status(complaint, status, now):
+    # What save() does on a status change; bulk_update bypasses it.
+    complaint.status = status
+    complaint.updated_at = complaint.status_changed_at = now
+    complaint.escalation_level = 0
+    complaint.priority_updated_at = None
+
+
+def _save_bulk(complaints, fields):
+    Complaint.objects.bulk_update(complaints, fields, batch_size=500)
+    tiles.invalidate_complaints(complaints) # bulk_update skips the signals.
+    cards.invalidate_complaints(complaints)
+    events.record_many(complaints)
+
+
+def _close_duplicates(originals, officer, closed_at):
+    """Close the open reports linked as duplicates of `originals`; the same work resolves them."""
+    open_duplicates = Complaint.objects.filter(duplicate_of__in=originals).exclude(status='closed')
+    tiles.invalidate(open_duplicates.values_list('tile_x', 'tile_y')) # .update() skips the signals.
+    duplicate_ids = list(open_duplicates.values_list('id', flat=True))
+    if not duplicate_ids:
+        return
+    now = timezone.now()
+    Complaint.objects.filter(id__in=duplicate_ids).update(
+        status='closed', officer=officer, closed_at=closed_at, updated_at=now,
+        status_changed_at=now, escalation_level=0, priority_updated_at=None,
+    )
+    events.record_many(Complaint.objects.filter(id__in=duplicate_ids).only('status', 'region', 'officer', 'contractor'))
+
+
+def _by_contractor(complaints):
+    """[(contractor, [complaints]), ...] for contractors with an email address."""
+    groups = {}
+    for complaint in complaints:
+        if complaint.contractor and complaint.contractor.user.email:
+            groups.setdefault(complaint.contractor, []).append(complaint)
+    return list(groups.items())
+
+
+def _report(request, done, skipped, left_out, verb):
+    if done:
+        messages.success(request, f"{verb} {done} complaint{'s' if done != 1 else ''}.")
+    if skipped:
+        messages.warning(request, f"{skipped} selected complaint{'s were' if skipped != 1 else ' was'} skipped (no longer eligible).")
+    if left_out:
+        messages.info(request, f"{left_out} more complaint{'s' if left_out != 1 else ''} left for the next batch "
+                               f"(at most {settings.OFFICER_BULK_LIMIT} per action).")
+    if not done and not skipped:
+        messages.info(request, "No complaints selected.")
+
+
+@login_required
+@require_POST
+@transaction.atomic
+def bulk_claim(request):
+    """Assign the selected unassigned complaints of the officer's region to them."""
+    officer = get_object_or_404(Officer, user=request.user)
+    complaints, skipped, left_out = _bulk_selection(request, region=officer.region, officer__isnull=True,
+                                                    status='reported', duplicate_of__isnull=True)
+    now = timezone.now()
+    for complaint in complaints:
+        _set_status(complaint, 'assigned', now)
+        complaint.officer = officer
+        complaint.assigned_at = complaint.assigned_at or now
+    if complaints:
+        _save_bulk(complaints, STATUS_FIELDS + ['officer', 'assigned_at'])
+        notify_many('officer_assigned', [
+            ([complaint.citizen.user.email], {'complaint': complaint, 'officer': officer}) for complaint in complaints
+        ])
+        if request.user.email:
+            notify_template('bulk_summary', {'action': 'Accepted', 'complaints': complaints}, [request.user.email])
+
+    _report(request, len(complaints), skipped, left_out, "Assigned to you:")
+    return redirect(f"{reverse('officers:dashboard')}?page_taken=1")
+
+
+@login_required
+@require_POST
+@transaction.atomic
+def bulk_assign_contractor(request):
+    """Give the selected active complaints to one contractor (same region and specialization)."""
+    officer = get_object_or_404(Officer, user=request.user)
+    contractor = Contractor.objects.filter(id=request.POST.get('contractor_id') or 0, status='approved',
+                                           region=officer.region).select_related('user').first()
+    if contractor is None:
+        messages.error(request, "Choose an approved contractor from your region.")
+        return redirect(f"{reverse('officers:dashboard')}?page_taken=1")
+
+    complaints, skipped, left_out = _bulk_selection(request, officer=officer, status__in=['assigned', 'in_progress'],
+                                                    region=contractor.region, category=contractor.specialization)
+    now = timezone.now()
+    for complaint in complaints:
+        complaint.contractor = contractor
+        if complaint.can_transition_to('in_progress'):
+            _set_status(complaint, 'in_progress', now)
+            complaint.in_progress_at = complaint.in_progress_at or now
+        complaint.updated_at = now
+    if complaints:
+        _save_bulk(complaints, STATUS_FIELDS + ['contractor', 'in_progress_at'])
+        if contractor.user.email:
+            notify_template('work_order_batch', {'contractor': contractor, 'officer': officer, 'complaints': complaints},
+                            [contractor.user.email])
+
+    _report(request, len(complaints), skipped, left_out, f"Assigned to {contractor.company_name}:")
+    return redirect(f"{reverse('officers:dashboard')}?page_taken=1")
+
+
+@login_required
+@require_POST
+@transaction.atomic
+def bulk_close(request):
+    """Close the selected completed complaints, and the duplicates linked to them."""
+    officer = get_object_or_404(Officer, user=request.user)
+    complaints, skipped, left_out = _bulk_selection(request, officer=officer, status='completed')
+    now = timezone.now()
+    for complaint in complaints:
+        _set_status(complaint, 'closed', now)
+        complaint.closed_at = complaint.closed_at or now
+    if complaints:
+        _save_bulk(complaints, STATUS_FIELDS + ['closed_at'])
+
+        _close_duplicates(complaints, officer, now)
+
+        notify_many('complaint_resolved', [
+            ([complaint.citizen.user.email], {'complaint': complaint, 'officer': officer}) for complaint in complaints
+        ])
+        notify_many('work_approved_batch', [
+            ([contractor.user.email], {'complaints': group}) for contractor, group in _by_contractor(complaints)
+        ])
+        if request.user.email:
+            notify_template('bulk_summary', {'action': 'Closed', 'complaints': complaints}, [request.user.email])
+
+    _report(request, len(complaints), skipped, left_out, "Closed")
+    return redirect(f"{reverse('officers:dashboard')}?page_verify=1")
+
+
+@login_required
+@require_POST
+@transaction.atomic
+def bulk_reject(request):
+    """Send the selected completed complaints back to their contractors with one reason."""
+    officer = get_object_or_404(Officer, user=request.user)
+    reason = request.POST.get('rejection_reason', '').strip()
+    if not reason:
+        messages.error(request, "Rejection reason is required.")
+        return redirect(f"{reverse('officers:dashboard')}?page_verify=1")
+
+    complaints, skipped, left_out = _bulk_selection(request, officer=officer, status='completed')
+    now = timezone.now()
+    for complaint in complaints:
+        _set_status(complaint, 'in_progress', now)
+        complaint.completed_at = None
+        complaint.in_progress_at = now
+        complaint.officer_feedback = reason
+    if complaints:
+        _save_bulk(complaints, STATUS_FIELDS + ['completed_at', 'in_progress_at', 'officer_feedback'])
+        notify_many('work_rejected_batch', [
+            ([contractor.user.email], {'contractor': contractor, 'officer': officer, 'reason': reason, 'complaints': group})
+            for contractor, group in _by_contractor(complaints)
+        ])
+
+    _report(request, len(complaints), skipped, left_out, "Sent back to the contractor:")
+    return redirect(f"{reverse('officers:dashboard')}?page_verify=1")
@@ -1,30 +1,34 @@
 # 1. Import the Complaint model from your complaints app
-from complaints.models import Complaint 
+from complaints import archive
+from complaints.models import ArchivedComplaint, Complaint 
 
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
 from django.contrib import messages
-import random
 
+from complaints.samples import sample_tokens
+from urbanwatch.page_cache import cache_anonymous_page
+from urbanwatch.ratelimit import rate_limit
 
-def home(request):
+
+@cache_anonymous_page
+@rate_limit('track', 'RATELIMIT_TRACK_RATE', methods=('POST',)) #same budget as the tracking page
+async def home(request):
+    # Async so the tracking lookup is cheap under ASGI (urbanwatch/asgi.py); queries use the async ORM.
     # Initialize empty variables
     complaint = None
     timeline = []
 
-    # Get all IDs, pick 3 random ones, then fetch those objects
-    # This is more efficient than order_by('?') on large databases
-    items = list(Complaint.objects.all()[:50]) # Get last 50 to pick from
-    if len(items) > 3:
-        random_complaints = random.sample(items, 3)
-    else:
-        random_complaints = items
+    # 3 random (token, title) pairs from a small cached pool (complaints/samples.py)
+    random_complaints = await sync_to_async(sample_tokens)(3)
 
     # Fetch the 3 most recently completed complaints for the "Wall of Fame"
     # We filter by status='completed' and order by the most recent first
-    recent_resolves = Complaint.objects.filter(status='closed').order_by('-updated_at')[:3]
+    recent_resolves = [c async for c in Complaint.objects.filter(status='closed').order_by('-updated_at')[:3]]
 
     # Fetch total fixed complaints count. For Stats section.
-    total_fixed_count = Complaint.objects.filter(status__in=['closed', 'completed']).count()
+    total_fixed_count = await Complaint.objects.filter(status__in=['closed', 'completed']).acount()
+    total_fixed_count += await ArchivedComplaint.objects.acount()
 
     token = ""
 
@@ -35,7 +39,7 @@ def home(request):
         if token:
             try:
                 # 3. Search Logic
-                complaint = Complaint.objects.get(tracking_token=token)
+                complaint = await archive.afind_by_token(token) # hot or archived
                 
                 # 4. Your Timeline Logic (Copied from your snippet)
                 timeline = [
@@ -74,8 +78,8 @@ def home(request):
             except (Complaint.DoesNotExist, ValueError):
                 messages.error(request, "Invalid Tracking ID. Please check and try again.")
     
-    # 5. Render the Homepage template
-    return render(request, 'home.html', {
+    # 5. Render the Homepage template (in a thread: the auth/messages context processors are sync)
+    return await sync_to_async(render)(request, 'home.html', {
         'complaint': complaint,
         'timeline': timeline,
         'token': token,
@@ -3,6 +3,15 @@ ASGI config for urbanwatch project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+ASGI mode runs the async views (home, track_issue, the health probes and the
+live-events stream) on the event loop, so a handful of workers can hold many
+cheap lookups and open streams while slow sync views run in threads:
+
+    gunicorn urbanwatch.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+
+The WSGI entry point (urbanwatch/wsgi.py) still works; the async views then
+run through async_to_sync. Compare the two with `manage.py bench_tracking`.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
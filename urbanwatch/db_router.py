@@ -0,0 +1,144 @@
+# urbanwatch/db_router.py
+"""
+Primary/replica routing for read-heavy pages.
+
+Replicas are the DATABASES aliases listed in DATABASE_READ_REPLICAS (built
+from DATABASE_REPLICA_URLS in settings). Nothing goes to a replica unless a
+view opts in with @read_from_replica - dashboards, search and the map
+endpoints. Everything else, every write and every locking read
+(select_for_update() routes through db_for_write) uses the primary.
+
+Even inside an opted-in view a read stays on the primary when:
+
+* it runs inside a transaction (transactional code must see one database);
+* the request has already written something (read-your-writes);
+* the visitor wrote something within the last REPLICA_STICKY_SECONDS. The
+  middleware sets a short-lived cookie after any request that wrote, so the
+  redirect that follows a POST never reads from a replica that has not caught
+  up yet.
+
+To try it locally with two SQLite files, copy db.sqlite3 to replica.sqlite3
+and set DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3.
+"""
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+STICKY_COOKIE = 'db_primary_until'
+
+# Per-request routing state. A dict, so writes made in a copied context
+# (sync_to_async threads) are still seen by the request that started them.
+_state = ContextVar('db_routing_state', default=None)
+
+
+def _new_state(sticky=False):
+    return {'replica': False, 'sticky': sticky, 'wrote': False}
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'django_cache':
+            return 'default'
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db  # follow the object's own database for related lookups
+        replicas = settings.DATABASE_READ_REPLICAS
+        state = _state.get()
+        if not replicas or not state or not state['replica'] or state['sticky'] or state['wrote']:
+            return 'default'
+        if connections['default'].in_atomic_block:
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        # Database cache entries (rate-limit counters) are not data a later read needs to see.
+        if state is not None and model._meta.app_label != 'django_cache':
+            state['wrote'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # replicas hold the same data as the primary
+
+
+def read_from_replica(view):
+    """Let `view`'s reads go to a replica (see the module docstring for the exceptions)."""
+    def enter():
+        state = _state.get()
+        if state is None:
+            return _state.set(dict(_new_state(), replica=True))
+        state['replica'] = True
+        return None
+
+    def leave(token):
+        if token is not None:
+            _state.reset(token)
+        else:
+            _state.get()['replica'] = False
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            token = enter()
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                leave(token)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = enter()
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            leave(token)
+    return wrapper
+
+
+class ReplicaStickinessMiddleware:
+    """Tracks writes per request and pins the visitor to the primary for a while after one."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _enter(self, request):
+        try:
+            sticky = float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            sticky = False
+        return _state.set(_new_state(sticky=sticky))
+
+    def _leave(self, response):
+        if _state.get()['wrote'] and settings.DATABASE_READ_REPLICAS:
+            seconds = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(STICKY_COOKIE, str(time.time() + seconds), max_age=seconds,
+                                httponly=True, samesite='Lax')
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self._enter(request)
+        try:
+            return self._leave(self.get_response(request))
+        finally:
+            _state.reset(token)
+
+    async def __acall__(self, request):
+        # Sync views run in a thread with a copy of this context; the state dict itself is shared,
+        # so their writes still show up here.
+        token = self._enter(request)
+        try:
+            return self._leave(await self.get_response(request))
+        finally:
+            _state.reset(token)
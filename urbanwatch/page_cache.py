@@ -0,0 +1,148 @@
+# urbanwatch/page_cache.py
+"""
+Whole-page cache for logged-out visitors.
+
+@cache_anonymous_page stores the rendered HTML of a GET request for
+PAGE_CACHE_SECONDS. After that the copy is stale but still kept for another
+PAGE_CACHE_STALE_SECONDS: the first request to notice re-renders the page,
+and everyone else keeps getting the stale copy until it is done, so an expiry
+never sends a burst of visitors to the database at once.
+
+It stays out of the way of anything per-visitor:
+
+* logged-in users, non-GET requests and visitors with pending flash messages
+  always get a fresh render;
+* the CSRF token of the visitor who primed the cache is swapped for a
+  placeholder before storing, and each hit gets its own token back;
+* responses that are not 200, set cookies or flash a message are never stored.
+
+A visitor without a session cookie is known to be anonymous without touching
+the database, so cache hits run no queries at all. Async views get an async
+wrapper, so under ASGI a hit is served on the event loop without a thread.
+"""
+import hashlib
+import re
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+CSRF_PLACEHOLDER = '__csrf_token__'
+_CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def _cache_key(request):
+    return 'page:' + hashlib.md5(request.get_full_path().encode()).hexdigest()
+
+
+def _is_cacheable_request(request):
+    """True/False, or None when only the session can tell (the caller checks the user)."""
+    if request.method != 'GET' or settings.PAGE_CACHE_SECONDS <= 0:
+        return False
+    if request.COOKIES.get(getattr(settings, 'MESSAGE_COOKIE_NAME', CookieStorage.cookie_name)):
+        return False  # a flash message is waiting to be shown.
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return None  # one session lookup
+    return True
+
+
+def _respond(request, entry):
+    content = entry['content'].replace(CSRF_PLACEHOLDER, get_token(request))
+    response = HttpResponse(content, content_type=entry['content_type'])
+    response['X-Page-Cache'] = entry.get('state', 'hit')
+    return response
+
+
+def _entry(request, response):
+    """The cache entry for a response, or None if it must not be shared."""
+    if response.status_code != 200 or response.cookies or getattr(response, 'streaming', False):
+        return None
+    if getattr(getattr(request, '_messages', None), 'added_new', False):
+        return None  # the view flashed a message for this visitor only.
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+    content = _CSRF_INPUT_RE.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', response.content.decode(response.charset))
+    return {
+        'content': content,
+        'content_type': response['Content-Type'],
+        'fresh_until': time.time() + settings.PAGE_CACHE_SECONDS,
+    }
+
+
+def _timeout():
+    return settings.PAGE_CACHE_SECONDS + settings.PAGE_CACHE_STALE_SECONDS
+
+
+def cache_anonymous_page(view):
+    """Serve logged-out GET requests for `view` from the page cache."""
+    if iscoroutinefunction(view):
+        return _cache_anonymous_page_async(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        cacheable = _is_cacheable_request(request)
+        if cacheable is None:
+            cacheable = not request.user.is_authenticated
+        if not cacheable:
+            return view(request, *args, **kwargs)
+
+        key = _cache_key(request)
+        entry = cache.get(key)
+        locked = False
+        if entry is not None:
+            if entry['fresh_until'] > time.time():
+                return _respond(request, entry)
+            # Stale: only the request that wins the lock re-renders; the rest get the old copy.
+            if not cache.add(f'{key}:refresh', 1, settings.PAGE_CACHE_STALE_SECONDS or 30):
+                return _respond(request, dict(entry, state='stale'))
+            locked = True
+
+        try:
+            response = view(request, *args, **kwargs)
+            entry = _entry(request, response)
+            if entry:
+                cache.set(key, entry, _timeout())
+        finally:
+            # Even when the view raised; a stuck lock would keep serving the stale copy.
+            if locked:
+                cache.delete(f'{key}:refresh')
+        return response
+    return wrapper
+
+
+def _cache_anonymous_page_async(view):
+    """The same as the sync wrapper, using the cache's async API."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        cacheable = _is_cacheable_request(request)
+        if cacheable is None:
+            cacheable = not (await request.auser()).is_authenticated
+        if not cacheable:
+            return await view(request, *args, **kwargs)
+
+        key = _cache_key(request)
+        entry = await cache.aget(key)
+        locked = False
+        if entry is not None:
+            if entry['fresh_until'] > time.time():
+                return _respond(request, entry)
+            if not await cache.aadd(f'{key}:refresh', 1, settings.PAGE_CACHE_STALE_SECONDS or 30):
+                return _respond(request, dict(entry, state='stale'))
+            locked = True
+
+        try:
+            response = await view(request, *args, **kwargs)
+            entry = _entry(request, response)
+            if entry:
+                await cache.aset(key, entry, _timeout())
+        finally:
+            if locked:
+                await cache.adelete(f'{key}:refresh')
+        return response
+    return wrapper
@@ -0,0 +1,202 @@
+# urbanwatch/ratelimit.py
+"""
+Request rate limits for the public and upload endpoints.
+
+@rate_limit('track', '30/m') allows each client 30 requests a minute to the
+view and answers the rest with 429 Too Many Requests (and a Retry-After
+header). A client is its IP address (see client_ip()), or with key='user' the
+logged-in user, falling back to the IP for anonymous visitors.
+
+The limit is a sliding window: two fixed-window counters in the 'ratelimit'
+cache, the previous one weighted by how much of it still overlaps the last
+`period` seconds. That cache is shared by every worker, so a flood spread
+over gunicorn workers is still counted once. With REDIS_URL it is Redis, whose
+add()/incr() are atomic. The fallback DatabaseCache is neither atomic nor
+cheap: a counted request runs several SQL statements, and its incr() is a read
+followed by a write, so two workers counting the same client can lose a hit.
+The limits are approximate either way, which is fine for shielding, not for
+billing.
+
+Once a client is over the limit, the worker that refused it remembers that
+in memory until Retry-After passes, so the rest of a flood is rejected
+without any I/O at all.
+
+RateLimitMiddleware applies one site-wide per-IP ceiling (RATELIMIT_GLOBAL_RATE);
+it is off unless that setting is given.
+"""
+import math
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# key -> monotonic time until which it is refused, for clients already over a limit.
+_blocked = {}
+_BLOCKED_MAX = 10000
+
+
+def parse_rate(rate):
+    """'30/m' -> (30, 60)."""
+    count, _, period = rate.partition('/')
+    multiplier, unit = period[:-1], period[-1:]
+    return int(count), int(multiplier or 1) * PERIODS[unit.lower()]
+
+
+def client_ip(request):
+    """
+    The client's address. Behind RATELIMIT_PROXY_COUNT trusted proxies it is
+    taken from X-Forwarded-For, counting from the right so a client cannot
+    spoof it by sending its own header.
+    """
+    proxies = settings.RATELIMIT_PROXY_COUNT
+    if proxies:
+        forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _is_blocked(key):
+    until = _blocked.get(key)
+    if until is None:
+        return 0
+    left = until - time.monotonic()
+    if left <= 0:
+        _blocked.pop(key, None)
+        return 0
+    return math.ceil(left)
+
+
+def _block(key, seconds):
+    if len(_blocked) >= _BLOCKED_MAX:
+        now = time.monotonic()
+        for stale in [k for k, until in _blocked.items() if until <= now]:
+            del _blocked[stale]
+        if len(_blocked) >= _BLOCKED_MAX:
+            _blocked.clear()
+    _blocked[key] = time.monotonic() + seconds
+
+
+def _window(key, period, now):
+    """Cache keys of the current and previous windows, and how far into the current one `now` is."""
+    index = int(now // period)
+    return f'rl:{key}:{index}', f'rl:{key}:{index - 1}', (now % period) / period
+
+
+def _retry_after(limit, period, current, previous, elapsed):
+    """Seconds until the sliding count drops below the limit again, assuming no more requests."""
+    if current >= limit or not previous:
+        return max(1, math.ceil((1 - elapsed) * period))
+    # previous * (1 - t) + current < limit  =>  t > 1 - (limit - current) / previous
+    return max(1, math.ceil((1 - (limit - current) / previous - elapsed) * period))
+
+
+def hit(key, limit, period):
+    """Count one request for `key`; returns 0 if allowed, otherwise the Retry-After seconds."""
+    blocked = _is_blocked(key)
+    if blocked:
+        return blocked
+    cache = caches['ratelimit']
+    current_key, previous_key, elapsed = _window(key, period, time.time())
+    counts = cache.get_many([current_key, previous_key])
+    current, previous = counts.get(current_key, 0), counts.get(previous_key, 0)
+    if previous * (1 - elapsed) + current >= limit:
+        retry = _retry_after(limit, period, current, previous, elapsed)
+        _block(key, retry)
+        return retry
+    if not cache.add(current_key, 1, period * 2):
+        try:
+            cache.incr(current_key)
+        except ValueError:  # expired between add() and incr()
+            cache.set(current_key, 1, period * 2)
+    return 0
+
+
+async def ahit(key, limit, period):
+    """hit() for async views."""
+    blocked = _is_blocked(key)
+    if blocked:
+        return blocked
+    cache = caches['ratelimit']
+    current_key, previous_key, elapsed = _window(key, period, time.time())
+    counts = await cache.aget_many([current_key, previous_key])
+    current, previous = counts.get(current_key, 0), counts.get(previous_key, 0)
+    if previous * (1 - elapsed) + current >= limit:
+        retry = _retry_after(limit, period, current, previous, elapsed)
+        _block(key, retry)
+        return retry
+    if not await cache.aadd(current_key, 1, period * 2):
+        try:
+            await cache.aincr(current_key)
+        except ValueError:
+            await cache.aset(current_key, 1, period * 2)
+    return 0
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse("Too many requests. Please wait a moment and try again.",
+                            status=429, content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit(scope, rate, key='ip', methods=None):
+    """
+    Limit a view to `rate` ('30/m', '5/10s', '1000/d') per client, or to the rate
+    in the setting named `rate` (read per request, so it can be overridden).
+    `scope` names the counter, so views sharing a scope share a budget;
+    `methods` limits counting to those HTTP methods (all by default).
+    """
+    def applies(request):
+        return settings.RATELIMIT_ENABLED and (methods is None or request.method in methods)
+
+    def limits():
+        return parse_rate(rate if '/' in rate else getattr(settings, rate))
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if applies(request):
+                    user = await request.auser() if key == 'user' else None
+                    ident = f'user:{user.pk}' if user and user.is_authenticated else f'ip:{client_ip(request)}'
+                    retry = await ahit(f'{scope}:{ident}', *limits())
+                    if retry:
+                        return too_many_requests(retry)
+                return await view(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if applies(request):
+                user = request.user if key == 'user' else None
+                ident = f'user:{user.pk}' if user and user.is_authenticated else f'ip:{client_ip(request)}'
+                retry = hit(f'{scope}:{ident}', *limits())
+                if retry:
+                    return too_many_requests(retry)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RateLimitMiddleware:
+    """Site-wide per-IP ceiling of RATELIMIT_GLOBAL_RATE requests; unused when that is empty."""
+
+    def __init__(self, get_response):
+        if not settings.RATELIMIT_GLOBAL_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.limit, self.period = parse_rate(settings.RATELIMIT_GLOBAL_RATE)
+
+    def __call__(self, request):
+        if settings.RATELIMIT_ENABLED:
+            retry = hit(f'global:ip:{client_ip(request)}', self.limit, self.period)
+            if retry:
+                return too_many_requests(retry)
+        return self.get_response(request)
@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import os
 import dj_database_url
 import platform
@@ -60,6 +60,7 @@ INSTALLED_APPS = [
     'users',
     'officers',
     'contractors',
+    'notifications',
     
 
     #allauth apps.
@@ -72,10 +73,12 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware", #for serving static files in production.
+    'urbanwatch.ratelimit.RateLimitMiddleware', #site-wide per-IP ceiling, off unless RATELIMIT_GLOBAL_RATE is set.
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'urbanwatch.db_router.ReplicaStickinessMiddleware', #read-your-writes for replica reads.
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware', #allauth middleware.
@@ -84,23 +87,32 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'urbanwatch.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader', #for project wide templates.
+    'django.template.loaders.app_directories.Loader', #this enables django to look in app/templates/
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [BASE_DIR / 'templates'], #for project wide templates.
-        'APP_DIRS': True, #this enables django to look in app/templates/
+        'DIRS': [BASE_DIR / 'templates'],
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'django.template.context_processors.media', #to handle media files
+                'complaints.context_processors.cards', #viewer role + timeout for cached complaint cards
             ],
+            # Production compiles each template once per process; DEBUG re-reads them so edits show up.
+            'loaders': TEMPLATE_LOADERS if DEBUG else [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)],
         },
     },
 ]
 
 WSGI_APPLICATION = 'urbanwatch.wsgi.application'
+# ASGI deployment mode for the async views (see urbanwatch/asgi.py).
+ASGI_APPLICATION = 'urbanwatch.asgi.application'
 
 
 # Database
@@ -116,6 +128,18 @@ DATABASES = {
     )
 }
 
+# Read replicas for dashboards and reports (urbanwatch/db_router.py), e.g.
+# DATABASE_REPLICA_URLS=postgres://.../urbanwatch,postgres://.../urbanwatch
+# Tests mirror them onto the default test database.
+DATABASE_READ_REPLICAS = []
+for i, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv()), start=1):
+    DATABASES[f'replica{i}'] = dj_database_url.parse(url, conn_max_age=600)
+    DATABASES[f'replica{i}']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_READ_REPLICAS.append(f'replica{i}')
+DATABASE_ROUTERS = ['urbanwatch.db_router.PrimaryReplicaRouter']
+# After a write, the visitor reads from the primary for this long (longer than the replication lag).
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -193,16 +217,128 @@ else:
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
-# This forces Django to use Cloudinary for ALL environments (Local + Render)
-STORAGES = {
-    "default": {
+# Pick the media backend per environment (see urbanwatch/storage.py):
+#   local             -> content-addressed files under MEDIA_ROOT (no Cloudinary needed)
+#   cached-cloudinary -> local content-addressed cache that writes through to Cloudinary
+#   cloudinary        -> upload straight to Cloudinary
+# Without an explicit choice, only a production run with a Cloudinary account uses
+# Cloudinary; DEBUG and unconfigured installs keep files local. Run the tests with
+# MEDIA_BACKEND=local so they never upload anything.
+MEDIA_BACKEND = config('MEDIA_BACKEND', default='cloudinary' if (
+    not DEBUG and config('CLOUD_NAME', default='')) else 'local')
+MEDIA_REMOTE_BACKEND = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+MEDIA_BACKENDS = {
+    'local': {
+        "BACKEND": "urbanwatch.storage.ContentAddressedStorage",
+    },
+    'cached-cloudinary': {
+        "BACKEND": "urbanwatch.storage.CachedCloudinaryStorage",
+    },
+    'cloudinary': {
         "BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage",
     },
+}
+
+STORAGES = {
+    "default": MEDIA_BACKENDS[MEDIA_BACKEND],
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
     },
 }
 
+# Complaint photos are staged locally and processed by a background worker
+# (see complaints/images.py) before they are pushed to the storage above.
+IMAGE_STAGING_ROOT = config('IMAGE_STAGING_ROOT', default=str(BASE_DIR / 'media_staging'))
+IMAGE_PIPELINE_ASYNC = config('IMAGE_PIPELINE_ASYNC', default=True, cast=bool)
+
+# Duplicate detection at submit time (complaints/dedup.py).
+DEDUP_RADIUS_METRES = config('DEDUP_RADIUS_METRES', default=150, cast=int)
+DEDUP_MIN_SIMILARITY = config('DEDUP_MIN_SIMILARITY', default=0.2, cast=float)
+
+# Live dashboard updates over Server-Sent Events (complaints/events.py). Under ASGI each stream is held
+# open for EVENT_STREAM_SECONDS and then recycled; under WSGI every request answers one poll, so the
+# browser reconnects every EVENT_STREAM_RETRY_MS. Either way it resumes from its last event id.
+EVENT_POLL_SECONDS = config('EVENT_POLL_SECONDS', default=2, cast=float)
+EVENT_STREAM_SECONDS = config('EVENT_STREAM_SECONDS', default=55, cast=int)
+EVENT_STREAM_RETRY_MS = config('EVENT_STREAM_RETRY_MS', default=3000, cast=int)
+# Ids are allocated at insert but visible at commit, so each poll also re-reads this many ids behind the cursor.
+EVENT_LOOKBACK_IDS = config('EVENT_LOOKBACK_IDS', default=200, cast=int)
+EVENT_RETENTION_HOURS = config('EVENT_RETENTION_HOURS', default=48, cast=int)
+
+# Offline reverse geocoding of map pins (complaints/geocode.py). Blank gazetteer = the bundled Mumbai CSV.
+GEOCODE_GAZETTEER = config('GEOCODE_GAZETTEER', default='')
+GEOCODE_MAX_DISTANCE_METRES = config('GEOCODE_MAX_DISTANCE_METRES', default=5000, cast=int)
+
+# A repeat of the same complaint submission within this window returns the original (complaints/idempotency.py).
+SUBMISSION_REPLAY_SECONDS = config('SUBMISSION_REPLAY_SECONDS', default=600, cast=int)
+
+# Closed complaints older than this move to the archive table (complaints/archive.py, manage.py archive_complaints).
+ARCHIVE_AFTER_DAYS = config('ARCHIVE_AFTER_DAYS', default=180, cast=int)
+
+# Grid size used to group open complaints into incidents (complaints/clustering.py).
+INCIDENT_RADIUS_METRES = config('INCIDENT_RADIUS_METRES', default=100, cast=int)
+
+# Public heatmap: aggregated tiles are cached as JSON files here (complaints/tiles.py).
+TILE_CACHE_ROOT = config('TILE_CACHE_ROOT', default=str(BASE_DIR / 'tile_cache'))
+MAP_FEATURE_LIMIT = config('MAP_FEATURE_LIMIT', default=5000, cast=int)
+
+# SLA escalation (complaints/sla.py). Supervisors default to the superusers' emails.
+SLA_MAX_LEVEL = config('SLA_MAX_LEVEL', default=3, cast=int)
+SLA_SUPERVISOR_EMAILS = config('SLA_SUPERVISOR_EMAILS', default='', cast=Csv())
+
+# Queue priority scores older than this are recomputed by `manage.py refresh_priorities`.
+PRIORITY_REFRESH_MINUTES = config('PRIORITY_REFRESH_MINUTES', default=15, cast=int)
+
+# Shared cache. Local memory works for a single process; point CACHE_BACKEND/CACHE_LOCATION
+# at Redis or Memcached when running several workers.
+REDIS_URL = config('REDIS_URL', default='')
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='urbanwatch'),
+    },
+    # Rate-limit counters must be shared by all workers. With REDIS_URL set they live in Redis,
+    # where incr() is atomic and a counted request is two round trips. Otherwise they fall back
+    # to a DB table (created by `manage.py createcachetable`): that works anywhere, but costs
+    # several SQL statements per counted request and its incr() is a read then a write, so
+    # concurrent requests can be under-counted.
+    'ratelimit': {
+        'BACKEND': config('RATELIMIT_CACHE_BACKEND', default='django.core.cache.backends.redis.RedisCache'
+                          if REDIS_URL else 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': config('RATELIMIT_CACHE_LOCATION', default=REDIS_URL or 'ratelimit_cache'),
+    },
+}
+
+# Request rate limits (urbanwatch/ratelimit.py). Rates are "<count>/<period>", period s, m, h or d.
+RATELIMIT_ENABLED = config('RATELIMIT_ENABLED', default=True, cast=bool)
+RATELIMIT_TRACK_RATE = config('RATELIMIT_TRACK_RATE', default='30/m')  # tracking page and home-page lookup, per IP
+RATELIMIT_SUBMIT_RATE = config('RATELIMIT_SUBMIT_RATE', default='10/h')  # complaint submissions, per user
+RATELIMIT_GLOBAL_RATE = config('RATELIMIT_GLOBAL_RATE', default='')  # every request, per IP; empty = off
+# Number of reverse proxies in front of the app that append to X-Forwarded-For (0 = use REMOTE_ADDR).
+# Must match the deployment: too low and every visitor shares the proxy's budget, too high and clients
+# can spoof their address. Render (which sets RENDER=true) puts one proxy in front of the app.
+RATELIMIT_PROXY_COUNT = config('RATELIMIT_PROXY_COUNT', default=1 if config('RENDER', default=False, cast=bool) else 0, cast=int)
+
+# Most complaints one officer bulk action (multi-claim/close/reject) touches at once (officers/views.py).
+OFFICER_BULK_LIMIT = config('OFFICER_BULK_LIMIT', default=100, cast=int)
+
+# Rendered complaint cards are cached per (complaint, updated_at, viewer role) (complaints/cards.py).
+CARD_CACHE_SECONDS = config('CARD_CACHE_SECONDS', default=0 if DEBUG else 600, cast=int)
+
+# Pages served to logged-out visitors from the cache (urbanwatch/page_cache.py); 0 turns it off.
+PAGE_CACHE_SECONDS = config('PAGE_CACHE_SECONDS', default=0 if DEBUG else 60, cast=int)
+PAGE_CACHE_STALE_SECONDS = config('PAGE_CACHE_STALE_SECONDS', default=300, cast=int)
+
+# Home-page sample tokens are picked from a cached pool of the latest complaints (complaints/samples.py).
+SAMPLE_POOL_SIZE = config('SAMPLE_POOL_SIZE', default=50, cast=int)
+SAMPLE_POOL_SECONDS = config('SAMPLE_POOL_SECONDS', default=300, cast=int)
+
+# How stale the per-process bloom filter of tracking codes may get before a miss
+# rebuilds it; new codes are shared through the 'ratelimit' cache for this long, so every
+# filter miss reads that cache (one SQL query with the DatabaseCache; complaints/tracking_codes.py).
+TRACKING_FILTER_SECONDS = config('TRACKING_FILTER_SECONDS', default=300, cast=int)
+
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
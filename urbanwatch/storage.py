@@ -0,0 +1,150 @@
+"""
+Media storage backends selected through settings.MEDIA_BACKEND.
+
+ContentAddressedStorage keeps every upload under the SHA-256 of its bytes
+(e.g. "3f/a9/3fa9...e1.jpg"), so identical photos are stored once and a
+file never changes after it is written. That makes it safe to serve with
+far-future cache headers and straight from disk via sendfile.
+
+Because one file can back several records, delete() leaves content-addressed
+files alone; an orphaned photo only costs disk space.
+
+CachedCloudinaryStorage puts the same local store in front of Cloudinary
+as a write-through cache: each unique file is uploaded once, and reads are
+answered from the local copy instead of downloading it again.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+# ab/cd/<sha256 starting abcd>.ext, as written by ContentAddressedStorage.
+CONTENT_ADDRESSED_NAME = re.compile(r'^([0-9a-f]{2})/([0-9a-f]{2})/(\1\2[0-9a-f]{60})(\.[a-z0-9]+)?$')
+
+
+def hash_file(content):
+    """Return the SHA-256 hex digest of a File/UploadedFile, rewinding it."""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible(path='urbanwatch.storage.ContentAddressedStorage')
+class ContentAddressedStorage(FileSystemStorage):
+    """Local storage that names files after their SHA-256 content hash."""
+
+    def content_name(self, name, content):
+        digest = hash_file(content)
+        ext = os.path.splitext(name)[1].lower()
+        # Two levels of 256-way sharding keep directories small.
+        return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from content, so an existing name is a duplicate,
+        # not a clash.
+        return name
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        return self._save(self.content_name(name, content), content)
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            return name  # identical upload, nothing to write.
+
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temp file and rename, so readers never see a partial file
+        # and two workers saving the same photo can't corrupt each other.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                content.seek(0)
+                for chunk in content.chunks():
+                    tmp.write(chunk if isinstance(chunk, bytes) else chunk.encode())
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return name
+
+    def delete(self, name):
+        # Other records may point at the same content; only legacy names are removed.
+        if not CONTENT_ADDRESSED_NAME.match(name):
+            super().delete(name)
+
+
+@deconstructible(path='urbanwatch.storage.CachedCloudinaryStorage')
+class CachedCloudinaryStorage(ContentAddressedStorage):
+    """Content-addressed local cache that writes through to a remote storage."""
+
+    REMOTE_SUFFIX = '.remote'
+
+    def __init__(self, remote_backend=None, **kwargs):
+        super().__init__(**kwargs)
+        self.remote_backend = remote_backend or getattr(
+            settings, 'MEDIA_REMOTE_BACKEND', 'cloudinary_storage.storage.MediaCloudinaryStorage'
+        )
+
+    @cached_property
+    def remote(self):
+        return import_string(self.remote_backend)()
+
+    def _remote_marker(self, name):
+        return self.path(name) + self.REMOTE_SUFFIX
+
+    def remote_name(self, name):
+        try:
+            with open(self._remote_marker(name)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _save(self, name, content):
+        name = super()._save(name, content)
+        # Only unique content is uploaded; duplicates reuse the earlier upload.
+        if self.remote_name(name) is None:
+            content.seek(0)
+            remote_name = self.remote.save(name, content)
+            with open(self._remote_marker(name), 'w') as f:
+                f.write(remote_name)
+        return name
+
+    def _open(self, name, mode='rb'):
+        if not os.path.exists(self.path(name)):
+            # Cache miss (e.g. a fresh container): pull it down once.
+            remote_name = self.remote_name(name) or name
+            with self.remote.open(remote_name, 'rb') as remote_file:
+                super()._save(name, remote_file)
+        return super()._open(name, mode)
+
+    def exists(self, name):
+        return super().exists(name) or self.remote_name(name) is not None
+
+    def url(self, name):
+        remote_name = self.remote_name(name)
+        if remote_name:
+            return self.remote.url(remote_name)
+        return super().url(name)
@@ -0,0 +1,239 @@
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, InMemoryStorage
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from complaints.models import Complaint
+from officers.models import Officer
+from users.models import Citizen
+from . import ratelimit
+from .db_router import STICKY_COOKIE, ReplicaStickinessMiddleware, read_from_replica
+from .storage import CachedCloudinaryStorage, ContentAddressedStorage
+from .views import serve_media
+
+
+class ContentAddressedStorageTest(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=self.root, base_url='/media/')
+
+    def test_identical_uploads_share_one_file(self):
+        first = self.storage.save('complaint_proofs/a.jpg', ContentFile(b'pothole'))
+        second = self.storage.save('complaint_proofs/b.JPG', ContentFile(b'pothole'))
+        other = self.storage.save('complaint_proofs/c.jpg', ContentFile(b'leak'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertRegex(first, r'^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        with self.storage.open(first) as f:
+            self.assertEqual(f.read(), b'pothole')
+
+    def test_shared_files_survive_a_delete(self):
+        name = self.storage.save('a.jpg', ContentFile(b'pothole'))
+        self.storage.save('b.jpg', ContentFile(b'pothole'))
+        self.storage.delete(name)  # e.g. one of the two complaints was removed
+        self.assertTrue(self.storage.exists(name))
+
+        legacy = FileSystemStorage(location=self.root).save('complaint_proofs/old.jpg', ContentFile(b'old'))
+        self.storage.delete(legacy)
+        self.assertFalse(self.storage.exists(legacy))
+
+    def test_serve_media_is_cacheable_forever(self):
+        name = self.storage.save('x.jpg', ContentFile(b'bytes'))
+        storages = {
+            'default': {'BACKEND': 'urbanwatch.storage.ContentAddressedStorage'},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        }
+        with override_settings(STORAGES=storages, MEDIA_ROOT=self.root):
+            request = RequestFactory().get(f'/media/{name}')
+            response = serve_media(request, name)
+            self.assertEqual(b''.join(response.streaming_content), b'bytes')
+            self.assertIn('immutable', response['Cache-Control'])
+
+            request = RequestFactory().get(f'/media/{name}', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(serve_media(request, name).status_code, 304)
+
+    def test_legacy_names_are_revalidated(self):
+        name = FileSystemStorage(location=self.root).save('complaint_proofs/old.jpg', ContentFile(b'old'))
+        storages = {
+            'default': {'BACKEND': 'urbanwatch.storage.ContentAddressedStorage'},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        }
+        with override_settings(STORAGES=storages, MEDIA_ROOT=self.root):
+            response = serve_media(RequestFactory().get(f'/media/{name}'), name)
+            self.assertNotIn('immutable', response['Cache-Control'])
+            self.assertNotIn('ETag', response)
+            response.close()
+
+            request = RequestFactory().get(f'/media/{name}', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+            self.assertEqual(serve_media(request, name).status_code, 304)
+
+
+class CachedCloudinaryStorageTest(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.storage = CachedCloudinaryStorage(
+            remote_backend='django.core.files.storage.InMemoryStorage', location=self.root
+        )
+
+    def test_uploads_each_unique_file_once(self):
+        name = self.storage.save('a.jpg', ContentFile(b'same'))
+        self.storage.save('b.jpg', ContentFile(b'same'))
+
+        remote = self.storage.remote
+        self.assertIsInstance(remote, InMemoryStorage)
+        self.assertEqual(remote.listdir(name.rsplit('/', 1)[0])[1], [name.rsplit('/', 1)[1]])
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b'same')
+
+    def test_remote_markers_are_not_served(self):
+        name = self.storage.save('a.jpg', ContentFile(b'same'))
+        storages = {
+            'default': {'BACKEND': 'urbanwatch.storage.CachedCloudinaryStorage',
+                        'OPTIONS': {'remote_backend': 'django.core.files.storage.InMemoryStorage'}},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        }
+        with override_settings(STORAGES=storages, MEDIA_ROOT=self.root):
+            marker = name + CachedCloudinaryStorage.REMOTE_SUFFIX
+            with self.assertRaises(Http404):
+                serve_media(RequestFactory().get(f'/media/{marker}'), marker)
+
+
+@override_settings(PAGE_CACHE_SECONDS=60)
+class AsyncEndpointTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        citizen = Citizen.objects.create(user=User.objects.create_user(username='async-c'), name='C')
+        officer = Officer.objects.create(user=User.objects.create_user(username='async-o'), name='Officer A', region='north')
+        self.complaint = Complaint.objects.create(title='Broken lamp', description='x', region='north',
+                                                  citizen=citizen, officer=officer, status='assigned')
+
+    async def test_health_probes(self):
+        self.assertEqual((await self.async_client.get('/health/')).json(), {'status': 'ok'})
+        ready = await self.async_client.get('/health/ready/')
+        self.assertEqual(ready.status_code, 200)
+        self.assertEqual(ready.json()['database'], 'ok')
+
+    async def test_tracking_runs_async_and_is_page_cached(self):
+        url = f'/complaints/track/?token={self.complaint.tracking_token}'
+        first = await self.async_client.get(url)
+        self.assertContains(first, 'Officer A')
+        second = await self.async_client.get(url)
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+
+        response = await self.async_client.post('/', {'token': str(self.complaint.tracking_token)})
+        self.assertContains(response, 'Broken lamp')
+
+
+@override_settings(DATABASE_READ_REPLICAS=['replica1'], REPLICA_STICKY_SECONDS=10)
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        # TestCase wraps every test in a transaction, which would pin every read to the primary.
+        patcher = mock.patch.object(connections['default'], 'in_atomic_block', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self, view, cookies=None):
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies or {})
+        return ReplicaStickinessMiddleware(view)(request)
+
+    def test_only_opted_in_reads_use_a_replica(self):
+        seen = {}
+
+        @read_from_replica
+        def dashboard(request):
+            seen['read'] = Complaint.objects.all().db
+            seen['locking'] = Complaint.objects.select_for_update().db
+            return HttpResponse()
+
+        def plain(request):
+            seen['plain'] = Complaint.objects.all().db
+            return HttpResponse()
+
+        self.request(dashboard)
+        self.request(plain)
+        self.assertEqual(seen, {'read': 'replica1', 'locking': 'default', 'plain': 'default'})
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        seen = []
+
+        @read_from_replica
+        def view(request):
+            seen.append(Complaint.objects.all().db)
+            User.objects.create_user(username=f'writer{len(seen)}')
+            seen.append(Complaint.objects.all().db)
+            return HttpResponse()
+
+        response = self.request(view)
+        self.assertEqual(seen, ['replica1', 'default'])
+
+        # The next request from the same visitor is pinned too.
+        self.request(view, cookies={STICKY_COOKIE: response.cookies[STICKY_COOKIE].value})
+        self.assertEqual(seen[2], 'default')
+
+    async def test_async_requests_are_tracked_too(self):
+        seen = []
+
+        @read_from_replica
+        async def view(request):
+            seen.append(Complaint.objects.all().db)
+            await User.objects.acreate(username='async-writer')
+            seen.append(Complaint.objects.all().db)
+            return HttpResponse()
+
+        middleware = ReplicaStickinessMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(RequestFactory().get('/'))
+        self.assertEqual(seen, ['replica1', 'default'])
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+
+@override_settings(RATELIMIT_TRACK_RATE='3/m', PAGE_CACHE_SECONDS=0)
+class RateLimitTest(TestCase):
+    def setUp(self):
+        ratelimit._blocked.clear()
+        self.addCleanup(ratelimit._blocked.clear)
+
+    def test_tracking_lookups_are_limited_per_ip(self):
+        url = reverse('complaints:track_issue')
+        for _ in range(3):
+            self.assertEqual(self.client.get(url, {'token': 'ABCDE-FGHJK'}).status_code, 200)
+        refused = self.client.get(url, {'token': 'ABCDE-FGHJK'})
+        self.assertEqual(refused.status_code, 429)
+        self.assertGreater(int(refused['Retry-After']), 0)
+        # The home-page lookup shares the budget; a refused client costs no queries at all.
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.post('/', {'token': 'ABCDE-FGHJK'}).status_code, 429)
+        # Someone else is unaffected.
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.9').status_code, 200)
+
+    def test_sliding_window_weights_the_previous_window(self):
+        start = (int(time.time()) // 60 + 1) * 60  # a window boundary (close to now, so entries do not expire)
+        with mock.patch.object(ratelimit.time, 'time', return_value=start - 1):  # end of one window
+            self.assertEqual([ratelimit.hit('demo', 4, 60) for _ in range(4)], [0, 0, 0, 0])
+        with mock.patch.object(ratelimit.time, 'time', return_value=start + 15):
+            # A quarter into the next window, 3 of the last 4 requests still count.
+            self.assertEqual(ratelimit.hit('demo', 4, 60), 0)
+            self.assertGreater(ratelimit.hit('demo', 4, 60), 0)  # 4 * 0.75 + 1 reaches the limit
+        ratelimit._blocked.clear()
+        with mock.patch.object(ratelimit.time, 'time', return_value=start + 50):
+            self.assertEqual(ratelimit.hit('demo', 4, 60), 0)
+
+    @override_settings(RATELIMIT_PROXY_COUNT=1)
+    def test_client_ip_comes_from_the_trusted_proxy(self):
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(ratelimit.client_ip(request), '2.2.2.2')
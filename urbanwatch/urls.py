@@ -4,6 +4,9 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
 
+from .page_cache import cache_anonymous_page
+from .views import health, ready, serve_media
+
 urlpatterns = [
     path('admin/', admin.site.urls),
 
@@ -16,10 +19,21 @@ urlpatterns = [
     path('officers/', include('officers.urls')),
     path('contractors/', include('contractors.urls')),
     path('users/', include('users.urls')),
-    path('about/', TemplateView.as_view(template_name='about.html'), name='about'),
+    path('notifications/', include('notifications.urls')),
+    path('about/', cache_anonymous_page(TemplateView.as_view(template_name='about.html')), name='about'),
+
+    # Async probes for the load balancer / orchestrator.
+    path('health/', health, name='health'),
+    path('health/ready/', ready, name='health_ready'),
 ]
 
 
+# Locally stored media is content-addressed and safe to serve in any environment.
+if settings.MEDIA_BACKEND != 'cloudinary':
+    urlpatterns += [
+        path(settings.MEDIA_URL.lstrip('/') + '<path:name>', serve_media, name='serve_media'),
+    ]
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
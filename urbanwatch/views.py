@@ -0,0 +1,77 @@
+"""Project-level views that don't belong to a single app."""
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.db import DatabaseError
+from django.http import FileResponse, Http404, HttpResponseNotModified, JsonResponse
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+from django.views.static import was_modified_since
+
+from .storage import CONTENT_ADDRESSED_NAME, CachedCloudinaryStorage
+
+
+@require_GET
+def serve_media(request, name):
+    """
+    Serve a file from the local media store.
+
+    Content-addressed names never change once written, so the hash doubles as
+    the ETag and the response can be cached forever. Anything else (uploads
+    from before the content-addressed store) may be replaced under the same
+    name, so browsers revalidate it against its modification time.
+    FileResponse hands the open file to the server's wsgi.file_wrapper, which
+    uses sendfile() where available. Dotfiles (half-written uploads) and
+    CachedCloudinaryStorage's .remote markers are never served.
+    """
+    if any(part.startswith('.') for part in name.split('/')) or name.endswith(CachedCloudinaryStorage.REMOTE_SUFFIX):
+        raise Http404("Media file not found.")
+    match = CONTENT_ADDRESSED_NAME.match(name)
+    etag = '"%s"' % match[3] if match else None
+    if etag and request.headers.get('If-None-Match') == etag:
+        return HttpResponseNotModified()
+
+    try:
+        modified = None if match else default_storage.get_modified_time(name).timestamp()
+        if modified and not was_modified_since(request.headers.get('If-Modified-Since'), modified):
+            return HttpResponseNotModified()
+        response = FileResponse(default_storage.open(name, 'rb'))
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("Media file not found.")
+
+    if etag:
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Last-Modified'] = http_date(modified)
+        response['Cache-Control'] = 'public, no-cache'
+    return response
+
+
+@require_GET
+async def health(request):
+    """Liveness probe: the process is up and serving. Touches nothing else."""
+    return JsonResponse({'status': 'ok'})
+
+
+@require_GET
+async def ready(request):
+    """Readiness probe: one async query and one cache round trip; 503 if either fails."""
+    from complaints.models import Complaint
+
+    checks = {}
+    try:
+        await Complaint.objects.aexists()
+        checks['database'] = 'ok'
+    except DatabaseError as e:
+        checks['database'] = str(e)
+    try:
+        await cache.aset('health:ready', 1, 10)
+        checks['cache'] = 'ok' if await cache.aget('health:ready') == 1 else 'miss'
+    except Exception as e:  # any backend error means "not ready"
+        checks['cache'] = str(e)
+
+    ok = all(value == 'ok' for value in checks.values())
+    response = JsonResponse({'status': 'ok' if ok else 'unavailable', **checks}, status=200 if ok else 503)
+    response['Cache-Control'] = 'no-store'
+    return response
@@ -1,5 +1,6 @@
 from django import forms
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from .models import Citizen
 from officers.models import Officer
 from contractors.models import Contractor
@@ -45,4 +46,14 @@ class ContractorProfileForm(forms.ModelForm):
         widgets = {
             'phone': forms.TextInput(attrs={'class': 'input input-bordered w-full'}),
             'profile_pic': forms.FileInput(attrs={'class': 'file-input file-input-bordered w-full'}),
-        }
\ No newline at end of file
+        }
+
+    def save(self, commit=True):
+        """Saves the profile; returns None (with a phone error) if another contractor took the number meanwhile."""
+        # is_valid() already checked the phone is free, but two edits can still race to the unique index.
+        try:
+            with transaction.atomic():
+                return super().save(commit)
+        except IntegrityError:
+            self.add_error('phone', 'This phone number is already in use by another contractor.')
+            return None
@@ -1,3 +1,31 @@
+from unittest import mock
+
 from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from contractors.models import Contractor
+from .forms import ContractorProfileForm
 
 # Create your tests here.
+class ContractorProfileTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='ravi', password='Test@123')
+        self.contractor = Contractor.objects.create(user=self.user, name='Ravi', email='ravi@example.com',
+                                                    phone='9876543210', license_number='MH12AB', region='north',
+                                                    specialization='road', company_name='Kumar Roads')
+        Contractor.objects.create(user=User.objects.create_user(username='other'), name='Other',
+                                  email='other@example.com', phone='9123456780', license_number='MH12CD',
+                                  region='north', specialization='road', company_name='Other Roads')
+        self.client.login(username='ravi', password='Test@123')
+
+    def test_phone_taken_during_the_edit_is_a_form_error(self):
+        # Skipping the form's own uniqueness check stands in for another edit winning the race.
+        with mock.patch.object(ContractorProfileForm, 'validate_unique'):
+            response = self.client.post(reverse('users:profile'), {
+                'first_name': 'Ravi', 'last_name': '', 'email': 'ravi@example.com', 'phone': '9123456780',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('phone', response.context['p_form'].errors)
+        self.contractor.refresh_from_db()
+        self.assertEqual(self.contractor.phone, '9876543210')
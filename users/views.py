@@ -4,7 +4,11 @@ from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Count  # NEEDED FOR BADGE COUNTS
 
+from complaints import archive
 from complaints.models import Complaint
+from notifications.forms import NotificationPreferenceForm
+from notifications.models import NotificationPreference
+from urbanwatch.db_router import read_from_replica
 from .models import Citizen
 from .forms import UserUpdateForm, CitizenProfileForm, OfficerProfileForm, ContractorProfileForm
 
@@ -47,6 +51,7 @@ def citizen_dashboard(request):
 
 
 @login_required
+@read_from_replica
 def citizen_dashboard(request):
     """
     Citizen dashboard with Tabs, Badges, and Pagination.
@@ -68,12 +73,15 @@ def citizen_dashboard(request):
 
     # 3. Get Counts for Badges
     # Result: {'reported': 5, 'closed': 12, ...}
+    # Complaints closed long ago live in the archive table (complaints/archive.py).
+    archived_qs = archive.archived_for(citizen=citizen).select_related('officer', 'contractor')
+    archived_count = archived_qs.count()
     counts = {
         'reported': base_qs.filter(status='reported').count(),
         'assigned': base_qs.filter(status='assigned').count(),
         'in_progress': base_qs.filter(status='in_progress').count(),
         'completed': base_qs.filter(status='completed').count(),
-        'closed': base_qs.filter(status='closed').count(),
+        'closed': base_qs.filter(status='closed').count() + archived_count,
     }
 
     # --- 4. HANDLE TAB FILTERING ---
@@ -81,7 +89,9 @@ def citizen_dashboard(request):
     active_tab = request.GET.get('status', 'reported')
 
     if active_tab == 'all':
-        complaints_list = base_qs
+        complaints_list = archive.History(base_qs, archived_qs)
+    elif active_tab == 'closed':
+        complaints_list = archive.History(base_qs.filter(status='closed'), archived_qs)
     else:
         # Filter the list to show ONLY what matches the tab
         complaints_list = base_qs.filter(status=active_tab)
@@ -97,7 +107,7 @@ def citizen_dashboard(request):
         'page_obj': page_obj,       # The filtered, paginated list
         'active_tab': active_tab,   # To highlight the correct tab in CSS
         'counts': counts,           # The numbers for the badges
-        'total_count': base_qs.count() # Total stats if needed
+        'total_count': base_qs.count() + archived_count # Total stats if needed
     }
 
     return render(request, "users/citizen_dashboard.html", context)
@@ -112,7 +122,10 @@ def complaint_status_detail(request, complaint_id):
         messages.error(request, "Citizen profile not found.")
         return redirect('home')
     
-    complaint = get_object_or_404(Complaint, id=complaint_id)
+    try:
+        complaint = Complaint.objects.get(id=complaint_id)
+    except Complaint.DoesNotExist:
+        return archive.show_archived(complaint_id, citizen=citizen)
 
     #Verify the complaint belongs to the citizen.
     if complaint.citizen != citizen:
@@ -212,9 +225,9 @@ def profile(request):
         # Initialize the selected form with data and files
         p_form = ProfileForm(request.POST, request.FILES, instance=profile_data)
 
-        if u_form.is_valid() and p_form.is_valid():
+        # The profile goes first: ContractorProfileForm.save() returns None when the phone was taken meanwhile.
+        if u_form.is_valid() and p_form.is_valid() and p_form.save() is not None:
             u_form.save()
-            p_form.save()
             messages.success(request, f'Your profile has been updated!')
             return redirect('users:profile')
         else:
@@ -269,7 +282,10 @@ def profile(request):
         'stat_label_2': stat_label_2,
         'total_count': total_count,
         'success_count': success_count,
-        'success_rate': success_rate
+        'success_rate': success_rate,
+        'notification_form': NotificationPreferenceForm(
+            instance=NotificationPreference.objects.filter(user=user).first()
+        ),
     }
 
     return render(request, 'users/profile.html', context)
@@ -277,6 +293,7 @@ def profile(request):
 
 # Put this import at the top of users/views.py
 from complaints.forms import ComplaintEditForm
+from complaints.images import queue_image
 
 # Put this new view at the bottom of users/views.py
 @login_required
@@ -300,9 +317,17 @@ def edit_complaint(request, complaint_id):
 
     # 4. Handle the form submission
     if request.method == 'POST':
+        previous_image = complaint.proof_image.name or None
         form = ComplaintEditForm(request.POST, request.FILES, instance=complaint)
         if form.is_valid():
-            form.save()
+            complaint = form.save(commit=False)
+            # A replacement photo goes through the background image pipeline.
+            new_image = request.FILES.get('proof_image')
+            if new_image:
+                complaint.proof_image = previous_image
+            complaint.save()
+            if new_image:
+                queue_image(complaint, 'proof_image', new_image)
             messages.success(request, "Your complaint was updated successfully!")
             return redirect('users:complaint_status_detail', complaint_id=complaint.id)
     else: